@@ -1,12 +1,60 @@
-from django.contrib import admin
-from .models import CustomUser, Project, ProjectStatus, Responsibility,Escalation
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .models import ChangeLog, CustomUser, Project, ProjectStatus, Responsibility,Escalation
 from django.contrib.auth.admin import UserAdmin
+from . import audit, snapshots
 
 admin.site.site_header = "Project Management Admin"
 admin.site.site_title = "Project Management Admin Portal"
 admin.site.index_title = "Welcome to the Project Management Admin Portal"
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Unfiltered changelists of big tables use the planner's row estimate
+    instead of COUNT(*); small tables and filtered lists are counted exactly.
+    """
+    EXACT_BELOW = 10000
+
+    def _estimate(self):
+        table = self.object_list.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [table],
+                )
+            elif connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = self._estimate()
+            if estimate is not None and estimate >= self.EXACT_BELOW:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows."""
+    paginator = EstimatedCountPaginator
+    # skip the second, unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
+    list_per_page = 50
+
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     fieldsets = (
@@ -33,26 +81,76 @@ class ProjectAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'created_at', 'updated_at')
     search_fields = ('code', 'name')
     ordering = ('-created_at',)
+    autocomplete_fields = ('manager',)
 
 
 @admin.register(ProjectStatus)
-class ProjectStatusAdmin(admin.ModelAdmin):
+class ProjectStatusAdmin(LargeTableAdmin):
     list_display = ('project', 'status_date', 'phase', 'is_baseline', 'is_final', 'created_by', 'created_at')
+    list_select_related = ('project', 'created_by')
     search_fields = ('project__code', 'phase')
     list_filter = ('phase', 'is_baseline', 'is_final')
-    ordering = ('-status_date',)
+    ordering = ('-status_date', '-id')
+    autocomplete_fields = ('project', 'created_by')
+
+
+class ReassignForm(ActionForm):
+    # a username, not a dropdown: the user table can be large
+    username = forms.CharField(required=False, label='New responsible (username)')
+
 
 @admin.register(Responsibility)
-class ResponsibilityAdmin(admin.ModelAdmin):
+class ResponsibilityAdmin(LargeTableAdmin):
     list_display = ('title', 'project_status', 'responsible', 'status', 'last_updated')
+    list_select_related = ('project_status__project', 'responsible')
     search_fields = ('title', 'project_status__project__code', 'responsible__username')
     list_filter = ('status', 'project_status__phase')
-    ordering = ('-last_updated',)
+    # newest first along the primary key: LIMIT/OFFSET without a sort
+    ordering = ('-id',)
+    sortable_by = ('title', 'status', 'last_updated')
+    autocomplete_fields = ('project_status', 'responsible', 'deputy')
+    action_form = ReassignForm
+    actions = ['reassign_responsible']
+
+    @admin.action(description='Reassign selected responsibilities to the given user')
+    def reassign_responsible(self, request, queryset):
+        username = request.POST.get('username', '').strip()
+        user = CustomUser.objects.filter(username=username).first() if username else None
+        if user is None:
+            self.message_user(request, f'Unknown user "{username}".', messages.ERROR)
+            return
+
+        rows = list(queryset.exclude(responsible=user).values_list('id', 'responsible_id', 'project_status_id'))
+        ids = [row[0] for row in rows]
+        with transaction.atomic():
+            # auto_now is not applied by update(); set it so caches see a new version,
+            # and bump `version` so edits based on the old rows conflict (api.concurrency)
+            Responsibility.objects.filter(id__in=ids).update(
+                responsible=user, last_updated=timezone.now(), version=F('version') + 1,
+            )
+            audit.record_bulk(Responsibility, {pk: {'responsible': [old, user.pk]} for pk, old, _ in rows})
+            ChangeLog.log(Responsibility, ids)
+            snapshots.mark_stale(*{status_id for _, _, status_id in rows})
+        self.message_user(request, f'{len(ids)} responsibilities reassigned to {user.username}.')
+
 
 @admin.register(Escalation)
-class EscalationAdmin(admin.ModelAdmin):
+class EscalationAdmin(LargeTableAdmin):
     list_display = ('responsibility', 'reason', 'created_by', 'created_at', 'resolved')
+    list_select_related = ('responsibility__project_status__project', 'created_by')
     search_fields = ('responsibility__title', 'created_by__username')
     list_filter = ('resolved',)
-    ordering = ('-created_at',)
-# Register your models here.
+    ordering = ('-id',)
+    sortable_by = ('created_at', 'resolved')
+    autocomplete_fields = ('responsibility', 'created_by', 'resolved_by')
+    actions = ['resolve_selected']
+
+    @admin.action(description='Resolve selected escalations')
+    def resolve_selected(self, request, queryset):
+        ids = list(queryset.filter(resolved=False).values_list('id', flat=True))
+        with transaction.atomic():
+            Escalation.objects.filter(id__in=ids).update(
+                resolved=True, resolved_at=timezone.now(), resolved_by=request.user,
+            )
+            ChangeLog.log(Escalation, ids)
+        self.message_user(request, f'{len(ids)} escalations resolved.')
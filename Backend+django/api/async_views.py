@@ -0,0 +1,127 @@
+"""
+ASGI-native report endpoints: GET /api/async/reports/<name>/
+
+Same payloads as the ReportingViewSet actions, served as plain Django async
+views so a slow aggregate waits on the database without holding a worker
+thread. Run under backend.asgi (e.g. `uvicorn backend.asgi:application`);
+under WSGI they still work, one request per thread.
+
+Django's async ORM methods all queue on one shared thread, so independent
+queries are started with `_query` instead: each runs on a thread of a
+fixed pool (REPORT_QUERY_THREADS), every thread keeping its own database
+connection for up to CONN_MAX_AGE, and asyncio.gather awaits them together.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+
+from . import reports
+from .models import CustomUser
+from .renderers import ORJSONRenderer
+from .throttling import ExportThrottle, ReportThrottle
+
+
+def _json(data, status=200, **headers):
+    response = HttpResponse(ORJSONRenderer().render(data), content_type='application/json', status=status)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+_executor = ThreadPoolExecutor(settings.REPORT_QUERY_THREADS, thread_name_prefix='report-query')
+
+
+def _query(function, *args):
+    def run():
+        # pool threads are not covered by the request_started/finished cleanup:
+        # apply CONN_MAX_AGE and CONN_HEALTH_CHECKS around every task instead
+        close_old_connections()
+        try:
+            return function(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False, executor=_executor)()
+
+
+@cache
+def _jwt():
+    # imported on first use, like the token views (see api.lazy)
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    return JWTAuthentication()
+
+
+async def _authenticate(request):
+    """Token checks of JWTAuthentication; only the user lookup touches the database."""
+    from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+    header = _jwt().get_header(request)
+    raw_token = _jwt().get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    token = _jwt().get_validated_token(raw_token)
+    return await CustomUser.objects.filter(
+        **{jwt_settings.USER_ID_FIELD: token.get(jwt_settings.USER_ID_CLAIM)}, is_active=True
+    ).afirst()
+
+
+def report_view(throttle_class=ReportThrottle):
+    """GET only, JWT authentication and the sliding-window throttle of the sync view."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return _json({'detail': f'Method "{request.method}" not allowed.'}, status=405, Allow='GET')
+            try:
+                user = await _authenticate(request)
+            except AuthenticationFailed as exc:
+                detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+                return _json(detail, status=401)
+            if user is None:
+                return _json({'detail': 'Authentication credentials were not provided.'}, status=401)
+            request.user = user
+
+            throttle = throttle_class()
+            if not await sync_to_async(throttle.allow_request)(request, None):
+                return _json({'detail': 'Request was throttled.'}, status=429, **{'Retry-After': str(int(throttle.wait()))})
+            try:
+                return _json(await view(request, *args, **kwargs))
+            except ValidationError as exc:
+                return _json(exc.detail, status=400)
+        return wrapper
+    return decorator
+
+
+@report_view()
+async def project_summary(request):
+    total, in_production, escalated = await asyncio.gather(
+        _query(reports.total_projects),
+        _query(reports.projects_in_production),
+        _query(reports.escalated_projects),
+    )
+    return reports.project_summary(total, in_production, escalated)
+
+
+@report_view()
+async def dashboard(request):
+    return reports.dashboard(*await asyncio.gather(
+        _query(reports.projects_by_phase),
+        _query(reports.latest_rag_counts),
+        _query(reports.open_escalations),
+        _query(reports.my_open_items, request.user.pk),
+    ))
+
+
+@report_view()
+async def workload(request):
+    return await _query(reports.workload, request.GET.get('department') or '')
+
+
+@report_view(ExportThrottle)
+async def escalation_report(request):
+    return await _query(reports.escalation_rows, request.GET)
@@ -0,0 +1,144 @@
+"""
+Buffered audit trail.
+
+Signals call `record()` for every tracked change. Events never cause a write
+of their own while a batch is open:
+- inside a transaction they are written on commit, one batch per savepoint,
+  so events of a savepoint that rolls back are dropped with it;
+- during a request (AuditMiddleware) they are written when the response leaves;
+- otherwise (shell, commands) they are written immediately.
+Every flush is a single bulk_create.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import transaction
+
+from .models import AuditEvent
+
+_request_events = ContextVar('audit_request_events', default=None)
+_current_request = ContextVar('audit_current_request', default=None)
+
+
+def _actor_id():
+    request = _current_request.get()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def _write(events):
+    buffered = _request_events.get()
+    if buffered is not None:
+        buffered.extend(events)
+    elif events:
+        AuditEvent.objects.bulk_create(events)
+
+
+class TransactionBatch:
+    """on_commit callback collecting the events of one savepoint."""
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self):
+        _write(self.events)
+
+
+def _transaction_batch(connection):
+    # rolling a savepoint back discards the on_commit callbacks registered in it
+    savepoint = set(connection.savepoint_ids)
+    for savepoints, callback, _ in connection.run_on_commit:
+        if isinstance(callback, TransactionBatch) and savepoints == savepoint:
+            return callback
+    batch = TransactionBatch()
+    transaction.on_commit(batch)
+    return batch
+
+
+def diff(instance, created):
+    """[before, after] pairs for the fields watched by the instance's FieldTracker."""
+    tracker = instance.tracker
+    current = tracker.current()
+    if created:
+        return {field: [None, value] for field, value in current.items()}
+    return {field: [previous, current[field]] for field, previous in tracker.changed().items()}
+
+
+def _buffer(events):
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        _transaction_batch(connection).events.extend(events)
+    else:
+        _write(events)
+
+
+def record(instance, action, changes=None):
+    _buffer([AuditEvent(
+        entity=instance._meta.model_name,
+        object_id=instance.pk,
+        action=action,
+        changes=changes or {},
+        actor_id=_actor_id(),
+    )])
+
+
+def record_created(instances):
+    """'created' events for rows inserted with bulk_create."""
+    actor_id = _actor_id()
+    _buffer([
+        AuditEvent(
+            entity=instance._meta.model_name, object_id=instance.pk, action='created',
+            changes=diff(instance, True), actor_id=actor_id,
+        )
+        for instance in instances
+    ])
+
+
+def record_bulk(model, changes_by_id):
+    """'updated' events for rows changed with queryset.update(); maps pk -> changes."""
+    actor_id = _actor_id()
+    _buffer([
+        AuditEvent(entity=model._meta.model_name, object_id=pk, action='updated', changes=changes, actor_id=actor_id)
+        for pk, changes in changes_by_id.items()
+    ])
+
+
+class AuditMiddleware:
+    """Collect the audit events of a request and flush them in one insert."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        events = []
+        events_token = _request_events.set(events)
+        request_token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_events.reset(events_token)
+            _current_request.reset(request_token)
+            if events:
+                AuditEvent.objects.bulk_create(events)
+
+    async def __acall__(self, request):
+        # sync views run through sync_to_async, which copies this context,
+        # so they append to the same list
+        events = []
+        events_token = _request_events.set(events)
+        request_token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_events.reset(events_token)
+            _current_request.reset(request_token)
+            if events:
+                await AuditEvent.objects.abulk_create(events)
@@ -0,0 +1,124 @@
+"""
+In-process execution of batched GET requests (POST /api/batch/).
+
+Each sub-request is resolved against the URLconf and dispatched straight to
+its view with the caller's already-authenticated user, so authentication
+runs once and all sub-requests share the request thread's DB connection.
+Identical sub-requests are answered once, and `cached()` lets views share
+lookups (e.g. side-loaded users) across the sub-requests of one batch.
+"""
+import json
+import logging
+from contextvars import ContextVar
+from urllib.parse import urlencode, urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUESTS = 25
+PREFIX = '/api/'
+
+_identity = ContextVar('batch_identity_cache', default=None)
+
+
+def cached(kind, ids, load):
+    """
+    Return {id: value} for `ids`. `load(missing_ids)` returns {id: value};
+    inside a batch, values loaded by earlier sub-requests are reused.
+    """
+    store = _identity.get()
+    if store is None:
+        return load(ids)
+    bucket = store.setdefault(kind, {})
+    missing = [i for i in ids if i not in bucket]
+    if missing:
+        bucket.update(load(missing))
+    return {i: bucket[i] for i in ids if i in bucket}
+
+
+def _target(item):
+    """Normalize a string or {"path", "params"} item to (path, query string)."""
+    if isinstance(item, str):
+        item = {'path': item}
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        raise ValueError('each request must be a path or an object with a "path"')
+    parts = urlsplit(item['path'])
+    query = parts.query
+    params = item.get('params') or {}
+    if not isinstance(params, dict):
+        raise ValueError('"params" must be an object')
+    if params:
+        query = '&'.join(filter(None, [query, urlencode(params, doseq=True)]))
+    path = parts.path if parts.path.startswith('/') else PREFIX + parts.path
+    if not path.startswith(PREFIX) or path.rstrip('/') == PREFIX + 'batch':
+        raise ValueError(f'path must be an API endpoint: {item["path"]}')
+    return path, query
+
+
+def _subrequest(request, path, query):
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = dict(request.META, REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query)
+    for header in ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_ACCEPT_ENCODING', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE'):
+        sub.META.pop(header, None)
+    sub.GET = QueryDict(query)
+    sub.COOKIES = request.COOKIES
+    sub.user = request.user
+    # DRF ForcedAuthentication: reuse the outer request's user and token
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def _body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    content = b''.join(response) if response.streaming else response.content
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode('utf-8', errors='replace')
+
+
+def _dispatch(request, path, query):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return {'status': 404, 'body': {'detail': 'Not found.'}}
+    view = match.func
+    if iscoroutinefunction(view):
+        # ASGI-native views (api.async_views) authenticate from the copied headers
+        view = async_to_sync(view)
+    try:
+        response = view(_subrequest(request, path, query), *match.args, **match.kwargs)
+        result = {'status': response.status_code, 'body': _body(response)}
+        if response.has_header('ETag'):
+            result['etag'] = response['ETag']
+    except Http404:
+        return {'status': 404, 'body': {'detail': 'Not found.'}}
+    except Exception:
+        # one failing sub-request is one failed entry, never a failed batch
+        logger.exception("Batched request %s?%s failed", path, query)
+        return {'status': 500, 'body': {'detail': 'Server error.'}}
+    return result
+
+
+def run(request, items):
+    """Execute the GET requests in `items`; returns one result per item, in order."""
+    if len(items) > MAX_REQUESTS:
+        raise ValueError(f'at most {MAX_REQUESTS} requests per batch')
+    targets = [_target(item) for item in items]
+
+    token = _identity.set({})
+    try:
+        results = {}
+        for path, query in targets:
+            if (path, query) not in results:
+                results[path, query] = _dispatch(request, path, query)
+    finally:
+        _identity.reset(token)
+    return [dict(results[path, query], path=path + ('?' + query if query else '')) for path, query in targets]
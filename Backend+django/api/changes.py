@@ -0,0 +1,131 @@
+"""
+Delta feed over ChangeLog (GET /api/changes/).
+
+The cursor is ChangeLog.seq, assigned in commit order after each
+transaction commits (ChangeLog.sequence_pending). Rows of open transactions
+have no seq yet, so a page never moves past a change that is still in
+flight, however long its transaction runs. Rows left unnumbered by a worker
+that died between commit and numbering are picked up by the next poll once
+they are older than settings.CHANGES_SETTLE_SECONDS.
+
+Within a page only the latest change per object is returned; upserts carry
+the current serialized row, and rows the caller can no longer see are sent
+as deletes.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ChangeLog, CustomUser, Escalation, Project, ProjectStatus, Responsibility, Watermark
+from .serializers import (
+    EscalationSerializer,
+    ProjectSerializer,
+    ProjectStatusSerializer,
+    ResponsibilitySerializer,
+    UserSerializer,
+)
+
+PURGE_WATERMARK = 'change_log_purged'
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def _settle_time():
+    return timezone.now() - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+
+
+def current_cursor():
+    """Cursor to take before a full load; changes committed while loading are replayed."""
+    return ChangeLog.objects.filter(seq__isnull=False).order_by('-seq').values_list('seq', flat=True).first() or 0
+
+
+def _sources(user):
+    """entity -> (queryset of rows visible to `user`, serializer class)"""
+    projects = Project.objects.all()
+    if getattr(user, 'role', None) not in ['PM', 'ADMIN']:
+        projects = projects.filter(
+            Q(statuses__responsibilities__responsible=user) |
+            Q(statuses__responsibilities__deputy=user)
+        ).distinct()
+    visible = projects.values('id')
+    return {
+        'project': (projects.select_related('manager'), ProjectSerializer),
+        'status': (
+            ProjectStatus.objects.filter(project_id__in=visible).select_related('created_by').prefetch_related(
+                'responsibilities__responsible', 'responsibilities__deputy'
+            ),
+            ProjectStatusSerializer,
+        ),
+        'responsibility': (
+            Responsibility.objects.filter(project_status__project_id__in=visible).select_related('responsible', 'deputy'),
+            ResponsibilitySerializer,
+        ),
+        'escalation': (
+            Escalation.objects.filter(responsibility__project_status__project_id__in=visible).select_related(
+                'responsibility', 'created_by', 'resolved_by'
+            ),
+            EscalationSerializer,
+        ),
+        'user': (CustomUser.objects.all(), UserSerializer),
+    }
+
+
+def changes_since(cursor, request, limit):
+    purged = Watermark.objects.filter(name=PURGE_WATERMARK).values_list('last_id', flat=True).first() or 0
+    if cursor < purged:
+        raise CursorExpired()
+
+    if ChangeLog.objects.filter(seq__isnull=True, created_at__lt=_settle_time()).exists():
+        ChangeLog.sequence_pending()
+
+    rows = list(
+        ChangeLog.objects.filter(seq__gt=cursor).order_by('seq')
+        .values_list('seq', 'entity', 'object_id', 'action')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    latest = {}
+    position = cursor
+    for seq, entity, object_id, action in rows[:limit]:
+        latest.pop((entity, object_id), None)
+        latest[entity, object_id] = (seq, action)
+        position = seq
+
+    upserts = {}
+    for entity, object_id in latest:
+        if latest[entity, object_id][1] == 'upsert':
+            upserts.setdefault(entity, []).append(object_id)
+    data = {}
+    sources = _sources(request.user)
+    for entity, ids in upserts.items():
+        queryset, serializer_class = sources[entity]
+        for item in serializer_class(queryset.filter(id__in=ids), many=True, context={'request': request}).data:
+            data[entity, item['id']] = item
+
+    changes = []
+    for (entity, object_id), (seq, action) in latest.items():
+        item = data.get((entity, object_id))
+        if item is None:
+            changes.append({'seq': seq, 'entity': entity, 'id': object_id, 'action': 'delete'})
+        else:
+            changes.append({'seq': seq, 'entity': entity, 'id': object_id, 'action': 'upsert', 'data': item})
+    return {'cursor': position, 'has_more': has_more, 'changes': changes}
+
+
+def purge(days, batch_size):
+    """Delete change-log rows older than `days`; clients behind them must reload."""
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    while True:
+        rows = list(
+            ChangeLog.objects.filter(created_at__lt=cutoff, seq__isnull=False).order_by('seq')
+            .values_list('id', 'seq')[:batch_size]
+        )
+        if not rows:
+            return total
+        # last_id holds the last purged seq: the oldest cursor still served
+        Watermark.objects.update_or_create(name=PURGE_WATERMARK, defaults={'last_id': rows[-1][1]})
+        total += ChangeLog.objects.filter(id__in=[pk for pk, _ in rows]).delete()[0]
@@ -0,0 +1,79 @@
+"""
+Project codes (100000000<n>-01S).
+
+`taken_codes()` serves the set of existing codes from process memory. The
+set is tagged with a token kept in the shared cache; Project saves and
+deletes replace the token on commit, and every process reloads its copy the
+next time it sees a different token. With the default LocMemCache the token
+is per process, so multi-worker deployments should point CACHES at a shared
+backend.
+
+`allocate_code()` hands out the next free code from a Sequence row. The
+UPDATE locks the row until the transaction commits, so two callers can
+never receive the same number.
+"""
+import re
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Project, Sequence
+
+CODE_RE = re.compile(r'^100000000(\d+)-01S$')
+SEQUENCE_NAME = 'project_code'
+VERSION_KEY = 'project_codes:version'
+
+_local = {'version': None, 'codes': frozenset()}
+
+
+def format_code(number):
+    return f'100000000{number}-01S'
+
+
+def code_number(code):
+    match = CODE_RE.match(code)
+    return int(match.group(1)) if match else None
+
+
+def taken_codes():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY)
+    if _local['version'] != version:
+        _local['codes'] = frozenset(Project.objects.values_list('code', flat=True))
+        _local['version'] = version
+    return _local['codes']
+
+
+def invalidate():
+    """Make every process reload its code set once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def check_codes(codes):
+    taken = taken_codes()
+    return {
+        code: {'valid': bool(CODE_RE.match(code)), 'exists': code in taken}
+        for code in codes
+    }
+
+
+def allocate_code():
+    taken = taken_codes()
+    with transaction.atomic():
+        # first use: start after the highest existing code
+        Sequence.objects.get_or_create(
+            name=SEQUENCE_NAME,
+            defaults={'value': max(filter(None, map(code_number, taken)), default=0)},
+        )
+        sequence = Sequence.objects.filter(name=SEQUENCE_NAME)
+        while True:
+            sequence.update(value=F('value') + 1)
+            code = format_code(sequence.values_list('value', flat=True).get())
+            # skip numbers that were typed in by hand or imported
+            if code not in taken:
+                return code
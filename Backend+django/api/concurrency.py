@@ -0,0 +1,118 @@
+"""
+Optimistic concurrency for statuses and responsibilities.
+
+VersionedModel rows carry a `version`. Every save first claims the next
+version with a conditional
+
+    UPDATE ... SET version = n + 1 WHERE id = ? AND version = n
+
+where n is the version the change was based on, then writes the fields.
+Nothing is locked between a client's read and its write. A writer that lost
+the race matches no row and gets VersionConflict (412) instead of silently
+overwriting the other change, or NotFound (404) when the row was deleted.
+
+Clients state the version they edited in one of two ways:
+- as If-Match with the object's ETag ("v<n>"), sent by detail reads and writes;
+- as `version` in the request body (also the bulk path).
+
+Without either, the version loaded by the request itself is used. That
+protects the request's own read-modify-write window, but not edits made from
+an outdated page. Frozen statuses read from their snapshot carry
+"v<n>-<content hash>" ETags; only the version part is compared.
+"""
+from django.db import models, router, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+
+class VersionConflict(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'This object was changed by someone else; reload it and retry.'
+    default_code = 'version_conflict'
+
+    def __init__(self, current_version=None):
+        super().__init__()
+        self.current_version = current_version
+
+
+def etag(version):
+    return f'"v{version}"'
+
+
+def if_match(request):
+    """Versions listed in If-Match; None without the header, '*' for any."""
+    header = request.META.get('HTTP_IF_MATCH')
+    if not header:
+        return None
+    versions = set()
+    for tag in header.split(','):
+        # CompressionMiddleware weakens the ETags it sends, so compare weakly
+        tag = tag.strip().removeprefix('W/').strip('"')
+        if tag == '*':
+            return '*'
+        # snapshot ETags append the content hash: "v<n>-<hash>"
+        tag = tag.split('-', 1)[0]
+        if tag.startswith('v') and tag[1:].isdigit():
+            versions.add(int(tag[1:]))
+    return versions
+
+
+class VersionedModel(models.Model):
+    # set by save() only; serializers declare it to accept the client's base version
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get('force_insert'):
+            return super().save(*args, **kwargs)
+        expected = self.version
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            rows = type(self)._base_manager.using(using).filter(pk=self.pk)
+            if not rows.filter(version=expected).update(version=expected + 1):
+                current = rows.values_list('version', flat=True).first()
+                if current is None:
+                    # deleted meanwhile; saving would insert the row again
+                    raise NotFound()
+                raise VersionConflict(current)
+            self.version = expected + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version'}
+            return super().save(*args, **kwargs)
+
+
+class VersionedViewSetMixin:
+    """
+    If-Match on writes to a detail route and an ETag on detail responses.
+    Precondition failures and lost races both answer 412 with the current
+    version of the object.
+    """
+
+    def get_object(self):
+        instance = super().get_object()
+        if self.request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            versions = if_match(self.request)
+            if versions is not None and versions != '*':
+                if instance.version not in versions:
+                    raise VersionConflict(instance.version)
+        return instance
+
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+        if isinstance(exc, VersionConflict) and exc.current_version is not None:
+            response.data['current_version'] = exc.current_version
+            response['ETag'] = etag(exc.current_version)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        data = getattr(response, 'data', None)
+        if (
+            self.detail and response.status_code < 300 and 'ETag' not in response
+            and isinstance(data, dict) and isinstance(data.get('version'), int)
+        ):
+            response['ETag'] = etag(data['version'])
+        return response
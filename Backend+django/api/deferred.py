@@ -0,0 +1,175 @@
+"""
+Buffered bookkeeping of model signals.
+
+Besides the audit trail (api.audit), a save or delete of a tracked model
+updates the change log, the search index, the status snapshots and the
+project forecasts. Signals queue this work in a Pending buffer instead of
+writing it row by row:
+- inside a transaction it is written on commit, one buffer per savepoint, so
+  work queued in a savepoint that rolls back is dropped with it;
+- during a request (DeferredMiddleware) it is written when the response leaves;
+- otherwise (shell, commands) it is written immediately.
+A flush costs one statement per kind of work, whatever the number of saves.
+
+Change-log rows made inside a transaction are the exception: they are
+inserted right away so they commit, or roll back, with the change itself.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import transaction
+
+from . import forecasting, search, snapshots
+from .models import ChangeLog, ProjectStatus
+
+_request_pending = ContextVar('deferred_request_pending', default=None)
+
+
+class Pending:
+    """Work queued by one savepoint (as its on_commit callback) or one request."""
+
+    def __init__(self):
+        self.changes = {}       # (model, action) -> {pk}, change-log rows
+        self.index = {}         # (model, pk) -> instance to index, None to remove
+        self.stale = set()      # status ids whose snapshot is outdated
+        self.frozen = set()     # status ids to snapshot, after the stale flags
+        self.forecast_projects = set()
+        self.forecast_statuses = set()  # projects to forecast, by status id
+
+    def merge(self, other):
+        for key, ids in other.changes.items():
+            self.changes.setdefault(key, set()).update(ids)
+        self.index.update(other.index)
+        self.stale |= other.stale
+        self.frozen |= other.frozen
+        self.forecast_projects |= other.forecast_projects
+        self.forecast_statuses |= other.forecast_statuses
+
+    def __bool__(self):
+        return bool(
+            self.changes or self.index or self.stale or self.frozen
+            or self.forecast_projects or self.forecast_statuses
+        )
+
+    def __call__(self):
+        request_pending = _request_pending.get()
+        if request_pending is not None:
+            request_pending.merge(self)
+        else:
+            self.flush()
+
+    def flush(self):
+        if not self:
+            return
+        with transaction.atomic():
+            for (model, action), ids in self.changes.items():
+                ChangeLog.log(model, sorted(ids), action)
+            if self.index:
+                search.apply(self.index)
+            if self.stale:
+                snapshots.mark_stale(*self.stale)
+        for status_id in sorted(self.frozen):
+            snapshots.render(status_id)
+        project_ids = set(self.forecast_projects)
+        if self.forecast_statuses:
+            project_ids.update(
+                ProjectStatus.objects.filter(id__in=self.forecast_statuses).values_list('project_id', flat=True)
+            )
+        if project_ids:
+            forecasting.refresh(project_ids)
+
+
+def _pending():
+    """(buffer to add to, whether to flush it right away)"""
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        # rolling a savepoint back discards the on_commit callbacks registered in it
+        savepoint = set(connection.savepoint_ids)
+        for savepoints, callback, _ in connection.run_on_commit:
+            if isinstance(callback, Pending) and savepoints == savepoint:
+                return callback, False
+        pending = Pending()
+        transaction.on_commit(pending)
+        return pending, False
+    request_pending = _request_pending.get()
+    if request_pending is not None:
+        return request_pending, False
+    return Pending(), True
+
+
+@contextmanager
+def _queued():
+    pending, immediate = _pending()
+    yield pending
+    if immediate:
+        pending.flush()
+
+
+def log_change(model, pk, action='upsert'):
+    if transaction.get_connection().in_atomic_block:
+        ChangeLog.log(model, [pk], action)
+        return
+    with _queued() as pending:
+        pending.changes.setdefault((model, action), set()).add(pk)
+
+
+def index(instance):
+    with _queued() as pending:
+        pending.index[type(instance), instance.pk] = instance
+
+
+def unindex(instance):
+    with _queued() as pending:
+        pending.index[type(instance), instance.pk] = None
+
+
+def mark_stale(status_id):
+    with _queued() as pending:
+        pending.stale.add(status_id)
+
+
+def render_snapshot(status_id):
+    with _queued() as pending:
+        pending.frozen.add(status_id)
+
+
+def forecast(project_id=None, status_id=None):
+    with _queued() as pending:
+        if project_id:
+            pending.forecast_projects.add(project_id)
+        else:
+            pending.forecast_statuses.add(status_id)
+
+
+class DeferredMiddleware:
+    """Flush the bookkeeping queued outside transactions once per request."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        pending = Pending()
+        token = _request_pending.set(pending)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_pending.reset(token)
+            pending.flush()
+
+    async def __acall__(self, request):
+        # sync views run through sync_to_async, which copies this context,
+        # so they add to the same buffer
+        pending = Pending()
+        token = _request_pending.set(pending)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_pending.reset(token)
+            await sync_to_async(pending.flush)()
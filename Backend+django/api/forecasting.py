@@ -0,0 +1,184 @@
+"""
+Schedule-risk forecasts (ProjectForecast) for every active project.
+
+One batch reads three narrow result sets: the project dates and phases,
+the responsibility progress and RAG counts on each latest status, and the
+(project, date, phase) history. These become NumPy arrays, and every metric
+is computed for all projects at once:
+
+- expected progress: share of the planned duration already elapsed;
+- actual progress: phase progress (phase index / 4) averaged with the mean
+  responsibility progress of the latest status, when it has any;
+- schedule variance: actual - expected, in percentage points;
+- projected end: start + elapsed / actual, never before today nor after
+  ten times the planned duration, null for a started project without any
+  progress; slip days against the planned end;
+- risk (0..1): logistic score over the slip (as a share of the planned
+  duration), the red and yellow shares and time stalled in the current
+  phase beyond a quarter of the plan.
+
+Results are upserted with one bulk statement. `refresh()` recomputes the
+portfolio (refresh_forecasts command); saves queue the projects they touch
+in api.deferred, which recomputes them with one refresh per request or
+transaction.
+"""
+import time
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .models import Project, ProjectForecast, ProjectStatus, Responsibility
+
+PHASES = [phase for phase, _ in Project.PHASE_CHOICES]
+HIGH_RISK = 0.66
+MEDIUM_RISK = 0.33
+FIELDS = [
+    'expected_progress', 'actual_progress', 'schedule_variance', 'projected_end_date',
+    'slip_days', 'days_in_phase', 'risk', 'risk_level', 'computed_at',
+]
+
+
+def _load(project_ids=None):
+    active = Q(project__current_phase__in=PHASES[:-1])
+    if project_ids is not None:
+        active &= Q(project_id__in=project_ids)
+    projects = Project.objects.filter(current_phase__in=PHASES[:-1])
+    if project_ids is not None:
+        projects = projects.filter(id__in=project_ids)
+    projects = projects.order_by('id').values_list('id', 'start_date', 'end_date', 'current_phase')
+
+    latest = Responsibility.objects.filter(
+        project_status__in=ProjectStatus.objects.latest_per_project().filter(active)
+    ).values_list('project_status__project').annotate(
+        progress=Avg('progress'), total=Count('id'),
+        red=Count('id', filter=Q(status='R')), yellow=Count('id', filter=Q(status='Y')),
+    ).order_by()
+
+    history = ProjectStatus.objects.filter(active).values_list(
+        'project_id', 'status_date', 'phase'
+    ).order_by('project_id', 'status_date', 'id')
+    return list(projects), list(latest), list(history)
+
+
+def _align(np, ids, keys):
+    """Positions of `keys` in the sorted `ids`, and which keys are present at all."""
+    at = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+    return at, ids[at] == keys
+
+
+def compute(projects, latest, history, today):
+    """Forecast fields per project id, for the rows returned by _load()."""
+    # loaded here so workers that never compute forecasts do not import numpy
+    import numpy as np
+
+    if not projects:
+        return {}
+    phase_index = {phase: index for index, phase in enumerate(PHASES)}
+    epoch = date(1970, 1, 1).toordinal()
+    now = today.toordinal() - epoch
+
+    ids = np.array([row[0] for row in projects], dtype=np.int64)
+    start = np.array([row[1].toordinal() - epoch for row in projects], dtype=np.float64)
+    end = np.array([row[2].toordinal() - epoch for row in projects], dtype=np.float64)
+    phase = np.array([phase_index.get(row[3], 0) for row in projects], dtype=np.float64)
+
+    # per-project aggregates aligned with ids (ids are sorted)
+    resp_progress = np.full(len(ids), np.nan)
+    red_share = np.zeros(len(ids))
+    yellow_share = np.zeros(len(ids))
+    if latest:
+        agg = np.array(latest, dtype=np.float64)
+        at, known = _align(np, ids, agg[:, 0].astype(np.int64))
+        at, agg = at[known], agg[known]
+        resp_progress[at] = agg[:, 1] / 100
+        red_share[at] = agg[:, 3] / agg[:, 2]
+        yellow_share[at] = agg[:, 4] / agg[:, 2]
+
+    # date the project entered its current phase: start of its last run of equal phases
+    entered = start.copy()
+    if history:
+        project = np.array([row[0] for row in history], dtype=np.int64)
+        day = np.array([row[1].toordinal() - epoch for row in history], dtype=np.float64)
+        run_phase = np.array([phase_index.get(row[2], -1) for row in history])
+        boundary = np.ones(len(history), dtype=bool)
+        boundary[1:] = (project[1:] != project[:-1]) | (run_phase[1:] != run_phase[:-1])
+        run_start = day[np.maximum.accumulate(np.where(boundary, np.arange(len(history)), 0))]
+        last = np.ones(len(history), dtype=bool)
+        last[:-1] = project[1:] != project[:-1]
+        at, known = _align(np, ids, project[last])
+        entered[at[known]] = run_start[last][known]
+
+    duration = np.maximum(end - start, 1)
+    elapsed = now - start
+    expected = np.clip(elapsed / duration, 0, 1)
+    phase_progress = phase / (len(PHASES) - 1)
+    actual = np.where(np.isnan(resp_progress), phase_progress, (phase_progress + resp_progress) / 2)
+
+    started = elapsed > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        projected = np.where(started, start + elapsed / actual, start + duration)
+    # no progress yet (inf/nan): nothing to extrapolate, left null; a barely
+    # started project would extrapolate centuries out, so the rest is capped
+    extrapolated = np.isfinite(projected)
+    projected = np.where(
+        extrapolated, np.maximum(np.minimum(projected, start + 10 * duration), now), np.nan
+    )
+    slip = projected - end
+    # started without any progress: nothing to extrapolate, count as a full plan late
+    slip_ratio = np.where(np.isnan(slip), 1.0, slip / duration)
+    days_in_phase = np.maximum(now - entered, 0)
+    stall = np.maximum(days_in_phase / (duration / 4) - 1, 0)
+
+    score = 4 * slip_ratio + 2 * red_share + yellow_share + 0.5 * stall - 1
+    risk = 1 / (1 + np.exp(-3 * np.clip(score, -10, 10)))
+
+    level = np.where(risk >= HIGH_RISK, 'HIGH', np.where(risk >= MEDIUM_RISK, 'MEDIUM', 'LOW'))
+    variance = np.round((actual - expected) * 100, 2)
+    return {
+        int(pk): {
+            'expected_progress': round(float(e) * 100, 2),
+            'actual_progress': round(float(a) * 100, 2),
+            'schedule_variance': float(v),
+            'projected_end_date': None if np.isnan(p) else date.fromordinal(int(round(p)) + epoch),
+            'slip_days': None if np.isnan(s) else int(round(s)),
+            'days_in_phase': int(d),
+            'risk': round(float(r), 4),
+            'risk_level': str(lvl),
+        }
+        for pk, e, a, v, p, s, d, r, lvl in zip(
+            ids, expected, actual, variance, projected, slip, days_in_phase, risk, level
+        )
+    }
+
+
+def refresh(project_ids=None, today=None):
+    """Recompute and store forecasts; all active projects when project_ids is None."""
+    today = today or timezone.localdate()
+    started = time.perf_counter()
+    projects, latest, history = _load(project_ids)
+    loaded = time.perf_counter()
+    forecasts = compute(projects, latest, history, today)
+    computed = time.perf_counter()
+
+    now = timezone.now()
+    # MySQL upserts with ON DUPLICATE KEY UPDATE and rejects a conflict target
+    target = ['project'] if transaction.get_connection().features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        ProjectForecast.objects.bulk_create(
+            [ProjectForecast(project_id=pk, computed_at=now, **fields) for pk, fields in forecasts.items()],
+            update_conflicts=True, unique_fields=target, update_fields=FIELDS, batch_size=1000,
+        )
+        # completed since the last run (deleted projects cascade)
+        if project_ids is None:
+            ProjectForecast.objects.filter(project__current_phase=PHASES[-1]).delete()
+        else:
+            ProjectForecast.objects.filter(project_id__in=project_ids).exclude(project_id__in=list(forecasts)).delete()
+    return {
+        'projects': len(forecasts),
+        'load_ms': (loaded - started) * 1000,
+        'compute_ms': (computed - loaded) * 1000,
+        'store_ms': (time.perf_counter() - computed) * 1000,
+    }
+
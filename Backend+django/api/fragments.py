@@ -0,0 +1,99 @@
+"""
+Serialized fragment cache.
+
+Serializer output of one object is cached under
+(model, pk, shape, version), where `shape` is the set of fields rendered for
+the request and `version` is the object's modification time plus that of
+every nested object in the fragment. An edit therefore changes the key, and
+no process can read a stale fragment, including processes that missed the
+save. Saves and deletes also evict the object's entries from the local tier
+through signals. Old shared entries expire after FRAGMENT_CACHE['TIMEOUT'].
+
+Lookups go through a bounded in-process LRU first, then the shared cache
+(one get_many per list), and only misses are serialized.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+_local = OrderedDict()
+_keys_by_object = {}
+_lock = threading.Lock()
+_stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+
+def _config(name):
+    return settings.FRAGMENT_CACHE[name]
+
+
+def make_key(label, pk, shape, version):
+    return f'frag:{label}:{pk}:{shape}:{version}'
+
+
+def shape_of(fields):
+    """Short checksum of a (nested) field-name structure."""
+    return format(zlib.crc32(repr(fields).encode()), 'x')
+
+
+def _remember(key, value):
+    label, pk = key.split(':')[1:3]
+    with _lock:
+        _local[key] = value
+        _local.move_to_end(key)
+        _keys_by_object.setdefault((label, pk), set()).add(key)
+        while len(_local) > _config('LOCAL_SIZE'):
+            old_key, _ = _local.popitem(last=False)
+            old_object = tuple(old_key.split(':')[1:3])
+            keys = _keys_by_object.get(old_object)
+            if keys is not None:
+                keys.discard(old_key)
+                if not keys:
+                    del _keys_by_object[old_object]
+
+
+def get_many(keys):
+    """{key: fragment} for the cached keys; updates the hit counters."""
+    found = {}
+    with _lock:
+        for key in keys:
+            if key in _local:
+                _local.move_to_end(key)
+                found[key] = _local[key]
+        _stats['local_hits'] += len(found)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        shared = caches[_config('ALIAS')].get_many(missing)
+        for key, value in shared.items():
+            _remember(key, value)
+        found.update(shared)
+        with _lock:
+            _stats['shared_hits'] += len(shared)
+            _stats['misses'] += len(missing) - len(shared)
+    return found
+
+
+def set_many(fragments):
+    if not fragments:
+        return
+    for key, value in fragments.items():
+        _remember(key, value)
+    caches[_config('ALIAS')].set_many(fragments, _config('TIMEOUT'))
+
+
+def evict(label, pk):
+    """Drop the local entries of one object (called on save/delete)."""
+    with _lock:
+        for key in _keys_by_object.pop((label, str(pk)), ()):
+            _local.pop(key, None)
+
+
+def stats():
+    with _lock:
+        counters = dict(_stats)
+        counters['local_entries'] = len(_local)
+    lookups = counters['local_hits'] + counters['shared_hits'] + counters['misses']
+    counters['hit_ratio'] = round((lookups - counters['misses']) / lookups, 4) if lookups else None
+    return counters
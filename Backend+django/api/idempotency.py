@@ -0,0 +1,193 @@
+"""
+Idempotency-Key support for POST endpoints (IdempotencyMixin).
+
+A client retrying a POST after a timeout or a dropped connection sends the
+same Idempotency-Key header again. The first request with a key inserts an
+IdempotencyKey row for (user, key) before the view runs and stores the
+response once it is rendered; later requests with that key get the stored
+response back, with an Idempotent-Replayed header, without running the view.
+
+- A request arriving while the first one is still running waits up to
+  IDEMPOTENCY["WAIT_SECONDS"] for its response, then gets 409.
+- A first request that never answered within IDEMPOTENCY["LEASE_SECONDS"]
+  (its worker was killed or timed out, so the key was never released) is
+  abandoned: the next retry takes the key over and runs the view.
+- Reusing a key for a different method, path or body is a 422.
+- 5xx responses are not stored, so the request can be retried.
+- Keys expire after IDEMPOTENCY["TTL_HOURS"] (purged by apply_retention).
+
+The row lives in the database rather than the cache so the unique
+constraint serializes concurrent requests across all workers. Keys are
+scoped per user and checked after authentication, so a retry made with a
+refreshed access token still matches.
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.1
+
+
+class RequestInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still in progress; retry later.'
+    default_code = 'idempotency_in_progress'
+
+
+class KeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+class Replay(Exception):
+    """Raised from IdempotencyMixin.initial() to answer with a stored response."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def fingerprint(request):
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    try:
+        digest.update(request.body)
+    except RawPostDataException:
+        # multipart body already streamed by the CSRF check
+        digest.update(request.POST.urlencode().encode())
+    return digest.hexdigest()
+
+
+def _expired():
+    return timezone.now() - timedelta(hours=settings.IDEMPOTENCY['TTL_HOURS'])
+
+
+def _replay(record):
+    response = HttpResponse(bytes(record.body), status=record.status_code, content_type=record.content_type)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _take_over(record):
+    """
+    Claim a pending key whose request outlived its lease; None while the lease
+    runs. Only one retry wins the conditional update.
+    """
+    now = timezone.now()
+    abandoned = now - timedelta(seconds=settings.IDEMPOTENCY['LEASE_SECONDS'])
+    if record.created_at >= abandoned:
+        return None
+    if not IdempotencyKey.objects.filter(
+        pk=record.pk, status_code__isnull=True, created_at=record.created_at
+    ).update(created_at=now):
+        return None
+    record.created_at = now
+    return record
+
+
+def claim(request):
+    """
+    The IdempotencyKey row this request now owns, None without a key header;
+    raises Replay when the key was already answered.
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValidationError({HEADER: f'Must be at most {MAX_KEY_LENGTH} characters.'})
+    request_fingerprint = fingerprint(request._request)
+    IdempotencyKey.objects.filter(user=request.user, key=key, created_at__lt=_expired()).delete()
+
+    deadline = time.monotonic() + settings.IDEMPOTENCY['WAIT_SECONDS']
+    while True:
+        try:
+            # savepoint: a duplicate key must not break an enclosing transaction
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=request.user, key=key, fingerprint=request_fingerprint)
+        except IntegrityError:
+            pass
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+        if record is None:
+            # the first request failed and released the key
+            continue
+        if record.fingerprint != request_fingerprint:
+            raise KeyReused()
+        if record.status_code is not None:
+            raise Replay(_replay(record))
+        taken_over = _take_over(record)
+        if taken_over is not None:
+            return taken_over
+        if time.monotonic() >= deadline:
+            raise RequestInProgress()
+        time.sleep(POLL_SECONDS)
+
+
+def complete(record, response):
+    """Store the response for the claimed key, or release the key after a server error."""
+    if response.status_code >= 500:
+        record.delete()
+        return
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    record.status_code = response.status_code
+    record.content_type = response.get('Content-Type', '')
+    record.body = response.content
+    record.save(update_fields=['status_code', 'content_type', 'body'])
+
+
+def purge(batch_size):
+    """Delete expired keys (apply_retention)."""
+    total = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(created_at__lt=_expired()).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+
+class IdempotencyMixin:
+    """
+    POSTs of the viewset honour the Idempotency-Key header (api.idempotency).
+    The key is claimed after authentication, permission and throttle checks,
+    so rejected requests never store a response.
+    """
+    idempotent_methods = ('POST',)
+
+    def initial(self, request, *args, **kwargs):
+        self._idempotency_key = None
+        super().initial(request, *args, **kwargs)
+        if request.method in self.idempotent_methods:
+            self._idempotency_key = claim(request)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Replay):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # unhandled error (500): release the key, the request may be retried
+            record = getattr(self, '_idempotency_key', None)
+            if record is not None:
+                record.delete()
+                self._idempotency_key = None
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        record = getattr(self, '_idempotency_key', None)
+        if record is not None:
+            complete(record, response)
+        return response
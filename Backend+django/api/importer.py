@@ -0,0 +1,279 @@
+"""
+Streaming bulk import of projects, statuses and responsibilities.
+
+Rows are read one at a time from CSV (or XLSX through openpyxl's read-only
+mode), validated in batches and written with bulk_create, so memory stays
+bounded by the batch size. Lookups are batched too: usernames come from one
+preloaded username -> id map, project codes and (code, status_date) pairs
+are resolved with one query per batch.
+
+bulk_create bypasses the post_save signals, so each batch runs their
+bookkeeping itself: search and change-log entries and audit events for the
+new rows, stale snapshots and forecast refreshes for the statuses and
+projects they touch (api.deferred, after commit). No notifications or mails
+are sent.
+
+Columns per kind:
+  projects:         code, name, description, manager, start_date, end_date, current_phase
+  statuses:         project_code, status_date, phase, notes, is_baseline, is_final
+  responsibilities: project_code, status_date, title, responsible, deputy, status, progress, comments
+"""
+import csv
+import io
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_date
+
+from .models import ChangeLog, CustomUser, Project, ProjectStatus, Responsibility
+from . import audit, codes, deferred, search
+from .serializers import ProjectSerializer
+
+KINDS = ('projects', 'statuses', 'responsibilities')
+PHASES = {choice for choice, _ in Project.PHASE_CHOICES}
+RAG = {choice for choice, _ in Responsibility.STATUS_CHOICES}
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_rows(file, filename):
+    """Yield one dict per data row, streaming from a binary file object."""
+    if filename.lower().endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportFormatError("XLSX import requires the openpyxl package.")
+        sheet = load_workbook(file, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, [])]
+        for values in rows:
+            yield {
+                key: '' if value is None else (value.isoformat()[:10] if hasattr(value, 'isoformat') else str(value))
+                for key, value in zip(header, values)
+            }
+    else:
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+        try:
+            yield from reader
+        except csv.Error as exc:
+            raise ImportFormatError(f"Invalid CSV after line {reader.line_num}: {exc}")
+
+
+def _clean(row, key):
+    return (row.get(key) or '').strip()
+
+
+def _bool(value):
+    return value.lower() in ('1', 'true', 'yes', 'y')
+
+
+class Importer:
+    def __init__(self, kind, user=None, batch_size=1000, dry_run=False):
+        if kind not in KINDS:
+            raise ImportFormatError(f"kind must be one of {', '.join(KINDS)}")
+        self.kind = kind
+        self.user = user
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.users = dict(CustomUser.objects.values_list('username', 'id'))
+
+    def _error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': line, 'errors': errors})
+
+    def _user(self, row, key, errors, required=False):
+        username = _clean(row, key)
+        if not username:
+            if required:
+                errors[key] = 'This field is required.'
+            return None
+        user_id = self.users.get(username)
+        if user_id is None:
+            errors[key] = f'Unknown user "{username}".'
+        return user_id
+
+    def _date(self, row, key, errors):
+        value = _clean(row, key)
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            errors[key] = 'Date must be YYYY-MM-DD.'
+        return parsed
+
+    # ---- per-kind batch handlers: return model instances for valid rows ----
+
+    def _projects(self, batch):
+        batch_codes = {_clean(row, 'code') for _, row in batch}
+        taken = set(Project.objects.filter(code__in=batch_codes).values_list('code', flat=True))
+        objects = []
+        for line, row in batch:
+            errors = {}
+            code = _clean(row, 'code')
+            if not ProjectSerializer.CODE_REGEX.match(code):
+                errors['code'] = 'Code must match pattern 100000000<number>-01S.'
+            elif code in taken:
+                errors['code'] = 'Project with this code already exists.'
+            if not _clean(row, 'name'):
+                errors['name'] = 'This field is required.'
+            start = self._date(row, 'start_date', errors)
+            end = self._date(row, 'end_date', errors)
+            if start and end and start > end:
+                errors['end_date'] = 'End date must be the same or after start date.'
+            phase = _clean(row, 'current_phase') or 'PLAN'
+            if phase not in PHASES:
+                errors['current_phase'] = f'Invalid phase "{phase}".'
+            manager = self._user(row, 'manager', errors)
+            if errors:
+                self._error(line, errors)
+                continue
+            taken.add(code)
+            objects.append(Project(
+                code=code, name=_clean(row, 'name'), description=_clean(row, 'description'),
+                manager_id=manager, start_date=start, end_date=end, current_phase=phase,
+            ))
+        return objects
+
+    def _project_ids(self, batch):
+        project_codes = {_clean(row, 'project_code') for _, row in batch}
+        return dict(Project.objects.filter(code__in=project_codes).values_list('code', 'id'))
+
+    def _statuses(self, batch):
+        projects = self._project_ids(batch)
+        objects = []
+        for line, row in batch:
+            errors = {}
+            project_id = projects.get(_clean(row, 'project_code'))
+            if project_id is None:
+                errors['project_code'] = 'Unknown project.'
+            status_date = self._date(row, 'status_date', errors)
+            phase = _clean(row, 'phase')
+            if phase not in PHASES:
+                errors['phase'] = f'Invalid phase "{phase}".'
+            if errors:
+                self._error(line, errors)
+                continue
+            objects.append(ProjectStatus(
+                project_id=project_id, status_date=status_date, phase=phase,
+                notes=_clean(row, 'notes'), created_by=self.user,
+                is_baseline=_bool(_clean(row, 'is_baseline')), is_final=_bool(_clean(row, 'is_final')),
+            ))
+        return objects
+
+    def _responsibilities(self, batch):
+        projects = self._project_ids(batch)
+        statuses = {}
+        for status_id, project_id, status_date in ProjectStatus.objects.filter(
+            project_id__in=projects.values()
+        ).values_list('id', 'project_id', 'status_date').order_by('id'):
+            # several statuses on one date: the most recent one wins
+            statuses[(project_id, status_date)] = status_id
+
+        objects = []
+        for line, row in batch:
+            errors = {}
+            project_id = projects.get(_clean(row, 'project_code'))
+            status_date = self._date(row, 'status_date', errors)
+            status_id = statuses.get((project_id, status_date))
+            if project_id is None:
+                errors['project_code'] = 'Unknown project.'
+            elif status_date and status_id is None:
+                errors['status_date'] = 'No status on this date for the project.'
+            if not _clean(row, 'title'):
+                errors['title'] = 'This field is required.'
+            responsible = self._user(row, 'responsible', errors, required=True)
+            deputy = self._user(row, 'deputy', errors)
+            rag = _clean(row, 'status') or 'G'
+            if rag not in RAG:
+                errors['status'] = f'Invalid status "{rag}".'
+            try:
+                # XLSX numeric cells arrive as "50.0"
+                progress = int(float(_clean(row, 'progress') or '0'))
+            except (ValueError, OverflowError):
+                progress = None
+            if progress is None or not 0 <= progress <= 100:
+                errors['progress'] = 'Progress must be an integer between 0 and 100.'
+            if errors:
+                self._error(line, errors)
+                continue
+            objects.append(Responsibility(
+                project_status_id=status_id, title=_clean(row, 'title'),
+                responsible_id=responsible, deputy_id=deputy, status=rag,
+                progress=progress, comments=_clean(row, 'comments'),
+            ))
+        return objects
+
+    def _inserted(self, model, objects, last_id):
+        """The rows just created by bulk_create."""
+        if all(obj.pk is not None for obj in objects):
+            return model.objects.filter(pk__in=[obj.pk for obj in objects])
+        # MySQL does not return the ids of a bulk insert: they are the new ids
+        # in the scope of the batch (rows committed meanwhile by others are
+        # outside this transaction's snapshot)
+        if self.kind == 'projects':
+            return Project.objects.filter(code__in=[obj.code for obj in objects])
+        if self.kind == 'statuses':
+            scope = {'project_id__in': {obj.project_id for obj in objects}}
+        else:
+            scope = {'project_status_id__in': {obj.project_status_id for obj in objects}}
+        return model.objects.filter(pk__gt=last_id, **scope)
+
+    def _after_insert(self, model, instances):
+        """What the post_save signals would have done for `instances`."""
+        ChangeLog.log(model, [instance.pk for instance in instances])
+        search.apply({(model, instance.pk): instance for instance in instances})
+        if self.kind == 'projects':
+            codes.invalidate()
+            for project in instances:
+                deferred.forecast(project_id=project.pk)
+            return
+        audit.record_created(instances)
+        for instance in instances:
+            if self.kind == 'statuses':
+                deferred.forecast(project_id=instance.project_id)
+                if instance.is_frozen:
+                    deferred.render_snapshot(instance.pk)
+            else:
+                deferred.mark_stale(instance.project_status_id)
+                deferred.forecast(status_id=instance.project_status_id)
+
+    def run(self, rows, all_or_nothing=False):
+        handler = getattr(self, f'_{self.kind}')
+        model = {'projects': Project, 'statuses': ProjectStatus, 'responsibilities': Responsibility}[self.kind]
+        # line 1 is the header
+        numbered = enumerate(rows, start=2)
+        with transaction.atomic():
+            while True:
+                batch = list(islice(numbered, self.batch_size))
+                if not batch:
+                    break
+                objects = handler(batch)
+                if objects and not self.dry_run:
+                    last_id = None
+                    if not connection.features.can_return_rows_from_bulk_insert:
+                        last_id = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+                    model.objects.bulk_create(objects, batch_size=self.batch_size)
+                    self._after_insert(model, list(self._inserted(model, objects, last_id)))
+                self.created += len(objects)
+            if self.dry_run or (all_or_nothing and self.error_count):
+                transaction.set_rollback(True)
+                if not self.dry_run:
+                    self.created = 0
+        return self.result()
+
+    def result(self):
+        return {
+            'kind': self.kind,
+            'created': self.created,
+            'dry_run': self.dry_run,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.retention import apply_retention
+
+
+class Command(BaseCommand):
+    help = "Archive old statuses of completed projects, purge read notifications, old change-log rows and expired idempotency keys (settings.RETENTION)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        result = apply_retention(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {result['archived_statuses']} statuses, "
+            f"purged {result['purged_notifications']} notifications, "
+            f"{result['purged_changes']} change-log rows "
+            f"and {result['purged_idempotency_keys']} idempotency keys."
+        ))
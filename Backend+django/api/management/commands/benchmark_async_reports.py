@@ -0,0 +1,81 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a report served by the sync DRF view on a thread pool (WSGI worker) "
+        "with its async variant on one event loop (ASGI worker) under concurrent load."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--report', default='dashboard',
+                            choices=['project_summary', 'dashboard', 'workload', 'escalation_report'])
+        parser.add_argument('--user', required=True, help="Username the requests are made as.")
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--threads', type=int, default=4, help="Threads of the simulated WSGI worker.")
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f"Unknown user {options['user']}")
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        self.host = next((host for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost')
+        self.options = options
+
+        # no rate limit while measuring
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'reports': None, 'export': None}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            results = [
+                ('wsgi', self.run_sync(f"/api/reports/{options['report']}/")),
+                ('asgi', asyncio.run(self.run_async(f"/api/async/reports/{options['report']}/"))),
+            ]
+
+        self.stdout.write(f"{'path':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for name, (elapsed, latencies, errors) in results:
+            latencies.sort()
+            self.stdout.write(
+                f"{name:<6} {len(latencies) / elapsed:>8.1f} {statistics.median(latencies):>8.1f} "
+                f"{latencies[int(len(latencies) * 0.95) - 1]:>8.1f} {errors:>7}"
+            )
+
+    def run_sync(self, path):
+        client = Client(SERVER_NAME=self.host)
+
+        def one(_):
+            started = time.perf_counter()
+            status = client.get(path, secure=True, headers=self.headers).status_code
+            return (time.perf_counter() - started) * 1000, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.options['threads']) as pool:
+            results = list(pool.map(one, range(self.options['requests'])))
+        return self._summary(time.perf_counter() - started, results)
+
+    async def run_async(self, path):
+        client = AsyncClient(SERVER_NAME=self.host)
+        slots = asyncio.Semaphore(self.options['concurrency'])
+
+        async def one():
+            async with slots:
+                started = time.perf_counter()
+                response = await client.get(path, secure=True, headers=self.headers)
+                return (time.perf_counter() - started) * 1000, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(self.options['requests'])))
+        return self._summary(time.perf_counter() - started, results)
+
+    def _summary(self, elapsed, results):
+        return elapsed, [ms for ms, _ in results], sum(1 for _, status in results if status != 200)
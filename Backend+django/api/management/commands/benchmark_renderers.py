@@ -0,0 +1,61 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Escalation, ProjectStatus
+from api.renderers import ColumnarJSONRenderer, MessagePackRenderer, ORJSONRenderer, msgpack
+from api.serializers import EscalationSerializer, ProjectStatusSerializer
+from api.middleware import brotli
+
+
+class Command(BaseCommand):
+    help = "Compare payload size and encode time of the API renderers on the current dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=2000, help="Rows per payload.")
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        statuses = ProjectStatus.objects.prefetch_related(
+            'created_by', 'responsibilities__responsible', 'responsibilities__deputy'
+        )[:limit]
+        escalations = Escalation.objects.select_related(
+            'responsibility__responsible', 'responsibility__deputy', 'created_by', 'resolved_by'
+        ).order_by('-created_at')[:limit]
+        payloads = {
+            'status history': ProjectStatusSerializer(statuses, many=True).data,
+            'escalation report': EscalationSerializer(escalations, many=True).data,
+        }
+
+        renderers = [
+            ('drf json', JSONRenderer()),
+            ('orjson', ORJSONRenderer()),
+            ('columnar', ColumnarJSONRenderer()),
+        ]
+        if msgpack is not None:
+            renderers.append(('msgpack', MessagePackRenderer()))
+
+        header = f"{'payload':<18} {'renderer':<10} {'rows':>6} {'bytes':>10} {'gzip':>9}"
+        if brotli is not None:
+            header += f" {'br':>9}"
+        header += f" {'encode ms':>10}"
+        self.stdout.write(header)
+
+        for payload_name, data in payloads.items():
+            for renderer_name, renderer in renderers:
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    body = renderer.render(data)
+                elapsed = (time.perf_counter() - started) / options['repeat'] * 1000
+
+                line = (
+                    f"{payload_name:<18} {renderer_name:<10} {len(data):>6} {len(body):>10} "
+                    f"{len(gzip.compress(body, compresslevel=6)):>9}"
+                )
+                if brotli is not None:
+                    line += f" {len(brotli.compress(body, quality=5)):>9}"
+                line += f" {elapsed:>10.2f}"
+                self.stdout.write(line)
@@ -0,0 +1,72 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter, like a newly booted worker
+WORKER = """
+import json, os, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls = time.perf_counter()
+from django.test import Client
+client = Client(HTTP_HOST=os.environ['BENCHMARK_HOST'])
+requests = []
+for path in json.loads(os.environ['BENCHMARK_PATHS']):
+    before = time.perf_counter()
+    status = client.get(path, secure=True).status_code
+    requests.append([path, status, (time.perf_counter() - before) * 1000])
+print(json.dumps({
+    'setup': (setup - started) * 1000,
+    'urls': (urls - setup) * 1000,
+    'modules': len(sys.modules),
+    'requests': requests,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure import time and first-request latency of freshly started worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=5)
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help="Request path, repeatable (default: /api/projects/ and the OpenAPI schema).",
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/api/projects/', '/swagger/?format=openapi']
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'),
+            BENCHMARK_HOST=next((host for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost'),
+            BENCHMARK_PATHS=json.dumps(paths),
+        )
+
+        results = []
+        for _ in range(options['workers']):
+            output = subprocess.run(
+                [sys.executable, '-c', WORKER], env=env, cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+        self.stdout.write(f"{'worker':>6} {'setup ms':>9} {'urls ms':>8} {'modules':>8}  first requests (ms)")
+        for number, result in enumerate(results, start=1):
+            requests = ', '.join(f"{path} {status} {ms:.1f}" for path, status, ms in result['requests'])
+            self.stdout.write(
+                f"{number:>6} {result['setup']:>9.1f} {result['urls']:>8.1f} {result['modules']:>8}  {requests}"
+            )
+        self.stdout.write(
+            f"{'median':>6} {statistics.median(r['setup'] for r in results):>9.1f} "
+            f"{statistics.median(r['urls'] for r in results):>8.1f}"
+        )
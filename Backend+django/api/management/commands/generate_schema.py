@@ -0,0 +1,18 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import schema
+
+
+class Command(BaseCommand):
+    help = "Precompute the OpenAPI schema served by /swagger/ and /redoc/ (run at deploy)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.OPENAPI_SCHEMA_PATH)
+
+    def handle(self, *args, **options):
+        body = schema.generate()
+        Path(options['output']).write_bytes(body)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(body)} bytes to {options['output']}"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import KINDS, Importer, ImportFormatError, read_rows
+from api.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV/XLSX file of projects, statuses or responsibilities into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--user', help="Username recorded as creator of imported statuses.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, write nothing.")
+        parser.add_argument('--atomic', action='store_true', help="Roll back everything if any row fails.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = CustomUser.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Unknown user {options['user']}")
+
+        importer = Importer(options['kind'], user=user, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['path'], 'rb') as file:
+                result = importer.run(read_rows(file, options['path']), all_or_nothing=options['atomic'])
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+
+        for error in result['errors']:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Validated' if result['dry_run'] else 'Imported'} {result['created']} {result['kind']}, "
+            f"{result['error_count']} rows rejected."
+        ))
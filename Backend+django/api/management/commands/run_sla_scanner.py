@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.sla import scan
+
+
+class Command(BaseCommand):
+    help = "Escalate yellow/red responsibilities that exceeded their SLA (incremental, batched)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--user', default=settings.SLA_SCANNER_USERNAME,
+                            help="Username recorded as creator of the escalations (default: first superuser).")
+        parser.add_argument('--loop', action='store_true', help="Keep running, scanning every --interval seconds.")
+        parser.add_argument('--interval', type=int, default=300)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['user']:
+            system_user = User.objects.filter(username=options['user']).first()
+        else:
+            system_user = User.objects.filter(is_superuser=True, is_active=True).order_by('id').first()
+        if system_user is None:
+            raise CommandError("No user to record escalations as; pass --user or create a superuser.")
+
+        while True:
+            escalated = scan(system_user, batch_size=options['batch_size'])
+            self.stdout.write(", ".join(f"{status}: {count} escalated" for status, count in escalated.items()))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,79 @@
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def etag_matches(request, etag):
+    """Weak If-None-Match comparison; CompressionMiddleware weakens the ETags it sends."""
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+class CompressionMiddleware:
+    """
+    Compress API responses above API_COMPRESSION_MIN_SIZE bytes, preferring
+    brotli (when installed and accepted by the client) over gzip.
+    Works in both sync and async chains, so ASGI requests stay async.
+
+    Only /api/ data responses (COMPRESSIBLE_TYPES) are compressed. Responses
+    setting the CSRF cookie are left alone: compressing a secret next to
+    request-controlled content lets its length leak the secret (BREACH).
+    """
+    PATH_PREFIX = '/api/'
+    COMPRESSIBLE_TYPES = ('application/json', 'application/vnd.columnar+json', 'application/msgpack')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not request.path.startswith(self.PATH_PREFIX)
+            or response.get('Content-Type', '').split(';')[0].strip() not in self.COMPRESSIBLE_TYPES
+            or settings.CSRF_COOKIE_NAME in response.cookies
+            or len(response.content) < self.min_size
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and 'br' in accepted:
+            content, encoding = brotli.compress(response.content, quality=5), 'br'
+        elif 'gzip' in accepted:
+            content, encoding = gzip.compress(response.content, compresslevel=6, mtime=0), 'gzip'
+        else:
+            return response
+
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            # the compressed body differs, keep the validator weak
+            etag = response['ETag']
+            if not etag.startswith('W/'):
+                response['ETag'] = f'W/{etag}'
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_alter_escalation_options_alter_notification_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectstatus',
+            index=models.Index(fields=['project', 'status_date'], name='status_project_date_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_projectstatus_project_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='escalation',
+            index=models.Index(fields=['created_at'], name='escalation_created_idx'),
+        ),
+    ]
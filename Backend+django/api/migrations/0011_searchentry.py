@@ -0,0 +1,116 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FULLTEXT_SQL = {
+    'mysql': (
+        ["CREATE FULLTEXT INDEX searchentry_fulltext ON api_searchentry (title, body)"],
+        ["DROP INDEX searchentry_fulltext ON api_searchentry"],
+    ),
+    'postgresql': (
+        ["CREATE INDEX searchentry_tsvector ON api_searchentry "
+         "USING GIN (to_tsvector('simple', title || ' ' || body))"],
+        ["DROP INDEX searchentry_tsvector"],
+    ),
+    'sqlite': (
+        [
+            "CREATE VIRTUAL TABLE api_searchentry_fts USING fts5("
+            "title, body, content='api_searchentry', content_rowid='id')",
+            "CREATE TRIGGER api_searchentry_ai AFTER INSERT ON api_searchentry BEGIN "
+            "INSERT INTO api_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+            "CREATE TRIGGER api_searchentry_ad AFTER DELETE ON api_searchentry BEGIN "
+            "INSERT INTO api_searchentry_fts(api_searchentry_fts, rowid, title, body) "
+            "VALUES ('delete', old.id, old.title, old.body); END",
+            "CREATE TRIGGER api_searchentry_au AFTER UPDATE ON api_searchentry BEGIN "
+            "INSERT INTO api_searchentry_fts(api_searchentry_fts, rowid, title, body) "
+            "VALUES ('delete', old.id, old.title, old.body); "
+            "INSERT INTO api_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+        ],
+        [
+            "DROP TRIGGER IF EXISTS api_searchentry_au",
+            "DROP TRIGGER IF EXISTS api_searchentry_ad",
+            "DROP TRIGGER IF EXISTS api_searchentry_ai",
+            "DROP TABLE IF EXISTS api_searchentry_fts",
+        ],
+    ),
+}
+
+
+def create_fulltext_index(apps, schema_editor):
+    forward, _ = FULLTEXT_SQL.get(schema_editor.connection.vendor, ([], []))
+    for statement in forward:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    _, backward = FULLTEXT_SQL.get(schema_editor.connection.vendor, ([], []))
+    for statement in backward:
+        schema_editor.execute(statement)
+
+
+def index_existing_rows(apps, schema_editor):
+    """Entries for the rows that predate the index, as search.rebuild_index builds them."""
+    SearchEntry = apps.get_model('api', 'SearchEntry')
+    Project = apps.get_model('api', 'Project')
+    ProjectStatus = apps.get_model('api', 'ProjectStatus')
+    Responsibility = apps.get_model('api', 'Responsibility')
+    phases = dict(ProjectStatus._meta.get_field('phase').flatchoices)
+    sources = [
+        (
+            'project',
+            Project.objects.values_list('id', 'id', 'code', 'name', 'description'),
+            lambda code, name, description: (f"{code} - {name}", description),
+        ),
+        (
+            'status',
+            ProjectStatus.objects.values_list('id', 'project_id', 'status_date', 'phase', 'notes'),
+            lambda status_date, phase, notes: (f"Status {status_date} ({phases.get(phase, phase)})", notes),
+        ),
+        (
+            'responsibility',
+            Responsibility.objects.values_list('id', 'project_status__project_id', 'title', 'comments'),
+            lambda title, comments: (title, comments),
+        ),
+    ]
+    for kind, rows, document in sources:
+        batch = []
+        for object_id, project_id, *fields in rows.order_by('id').iterator(chunk_size=1000):
+            title, body = document(*fields)
+            batch.append(SearchEntry(
+                kind=kind, object_id=object_id, project_id=project_id, title=title[:255], body=body or '',
+            ))
+            if len(batch) >= 1000:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_escalation_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('status', 'Project Status'), ('responsibility', 'Responsibility')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.project')),
+            ],
+            options={
+                'verbose_name_plural': 'Search Entries',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        # after the full-text index, so the SQLite triggers index these too
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:48
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def merge_open_duplicates(apps, schema_editor):
+    """
+    Keep the oldest open escalation of each responsibility, fold the other
+    open ones into its occurrence counter and mark them resolved.
+    """
+    Escalation = apps.get_model('api', 'Escalation')
+    Escalation.objects.update(last_triggered_at=F('created_at'))
+    duplicated = (
+        Escalation.objects.filter(resolved=False)
+        .values('responsibility_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+    )
+    now = django.utils.timezone.now()
+    for row in duplicated:
+        open_ones = list(
+            Escalation.objects.filter(responsibility_id=row['responsibility_id'], resolved=False)
+            .order_by('created_at', 'id')
+        )
+        keep, extra = open_ones[0], open_ones[1:]
+        Escalation.objects.filter(pk=keep.pk).update(
+            occurrences=len(open_ones),
+            last_triggered_at=extra[-1].created_at,
+        )
+        Escalation.objects.filter(pk__in=[e.pk for e in extra]).update(resolved=True, resolved_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_auditevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='escalation',
+            name='last_triggered_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='escalation',
+            name='occurrences',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(merge_open_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='escalation',
+            constraint=models.UniqueConstraint(models.Case(models.When(resolved=False, then=models.F('responsibility'))), name='open_escalation_per_responsibility'),
+        ),
+    ]
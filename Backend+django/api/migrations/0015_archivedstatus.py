@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_sla_scanner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField(unique=True)),
+                ('status_date', models.DateField()),
+                ('phase', models.CharField(choices=[('PLAN', 'Planning'), ('DEV', 'Development'), ('TEST', 'Testing'), ('PROD', 'Serial Production'), ('COMP', 'Completed')], max_length=5)),
+                ('payload', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_statuses', to='api.project')),
+            ],
+            options={
+                'verbose_name_plural': 'Archived Statuses',
+                'ordering': ['-status_date'],
+                'indexes': [models.Index(fields=['project', 'status_date'], name='archived_project_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_changelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('etag', models.CharField(max_length=64)),
+                ('content', models.BinaryField()),
+                ('stale', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='api.projectstatus')),
+            ],
+            options={
+                'ordering': ['-version'],
+                'constraints': [models.UniqueConstraint(fields=('status', 'version'), name='snapshot_status_version_uniq')],
+            },
+        ),
+    ]
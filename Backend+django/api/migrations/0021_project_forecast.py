@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_user_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectForecast',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast', serialize=False, to='api.project')),
+                ('expected_progress', models.FloatField()),
+                ('actual_progress', models.FloatField()),
+                ('schedule_variance', models.FloatField(db_index=True)),
+                ('projected_end_date', models.DateField(blank=True, null=True)),
+                ('slip_days', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('days_in_phase', models.PositiveIntegerField(default=0)),
+                ('risk', models.FloatField(db_index=True)),
+                ('risk_level', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High')], db_index=True, max_length=6)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectstatus',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='responsibility',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_rows(apps, schema_editor):
+    """Existing cursors are ids: keep them valid by numbering every row with its id."""
+    ChangeLog = apps.get_model('api', 'ChangeLog')
+    Sequence = apps.get_model('api', 'Sequence')
+    ChangeLog.objects.update(seq=F('id'))
+    Sequence.objects.update_or_create(
+        name='change_log', defaults={'value': ChangeLog.objects.aggregate(value=Max('id'))['value'] or 0},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_row_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelog',
+            name='seq',
+            field=models.PositiveBigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(number_existing_rows, migrations.RunPython.noop),
+    ]
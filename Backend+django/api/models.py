@@ -1,10 +1,15 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.core.validators import RegexValidator
 from model_utils import FieldTracker
 from datetime import timedelta
+import json
+import zlib
+
+from .concurrency import VersionedModel
 
 
 class CustomUser(AbstractUser):
@@ -19,6 +24,16 @@ class CustomUser(AbstractUser):
     phone = models.CharField(max_length=20, blank=True)
     email=models.EmailField()
     department = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):
+        # prefix lookups of the user directory (username is already unique)
+        indexes = [
+            models.Index(fields=['first_name'], name='user_first_name_idx'),
+            models.Index(fields=['last_name'], name='user_last_name_idx'),
+            models.Index(fields=['email'], name='user_email_idx'),
+            models.Index(fields=['updated_at'], name='user_updated_at_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
@@ -58,7 +73,16 @@ class Project(models.Model):
         except ValueError:
             return 0
 
-class ProjectStatus(models.Model):
+class ProjectStatusQuerySet(models.QuerySet):
+    def latest_per_project(self):
+        # Keep only the most recent status of each project (ties broken by id)
+        latest = ProjectStatus.objects.filter(
+            project=models.OuterRef('project')
+        ).order_by('-status_date', '-id').values('id')[:1]
+        return self.filter(id=models.Subquery(latest))
+
+
+class ProjectStatus(VersionedModel):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='statuses')
     status_date = models.DateField(default=timezone.now)
     phase = models.CharField(max_length=5, choices=Project.PHASE_CHOICES)
@@ -67,16 +91,26 @@ class ProjectStatus(models.Model):
     is_final = models.BooleanField(default=False)
     created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    tracker = FieldTracker(fields=['status_date', 'phase', 'notes', 'is_baseline', 'is_final'])
+
+    objects = ProjectStatusQuerySet.as_manager()
     
     class Meta:
         ordering = ['-status_date']
         verbose_name_plural = "Project Statuses"
         #unique_together = ['project', 'status_date']
+        indexes = [
+            models.Index(fields=['project', 'status_date'], name='status_project_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.project.code} Status - {self.status_date}"
 
-class Responsibility(models.Model):
+    @property
+    def is_frozen(self):
+        return self.is_baseline or self.is_final
+
+class Responsibility(VersionedModel):
     STATUS_CHOICES = [
         ('G', 'Green'),
         ('Y', 'Yellow'),
@@ -94,15 +128,53 @@ class Responsibility(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(100)],
         default=0
     )
-    tracker = FieldTracker(fields=['status', 'needs_escalation'])
+    tracker = FieldTracker(fields=[
+        'title', 'responsible', 'deputy', 'status', 'needs_escalation', 'progress', 'comments',
+    ])
     comments = models.TextField(blank=True)
     
     class Meta:
         verbose_name_plural = "Responsibilities"
+        indexes = [
+            # range scans of stale items by the SLA scanner
+            models.Index(fields=['status', 'last_updated', 'id'], name='resp_status_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.project_status.project.code}"
 
+class EscalationQuerySet(models.QuerySet):
+    def trigger(self, responsibility, reason, created_by):
+        """
+        Open an escalation for `responsibility`, or register one more occurrence
+        on the one already open. Returns (escalation, created).
+        The open_escalation_per_responsibility constraint makes this safe when
+        two requests trigger the same responsibility concurrently.
+        """
+        now = timezone.now()
+        open_escalations = self.filter(responsibility=responsibility, resolved=False)
+        with transaction.atomic():
+            if open_escalations.update(occurrences=models.F('occurrences') + 1, last_triggered_at=now):
+                return self._retriggered(open_escalations), False
+            try:
+                with transaction.atomic():
+                    return self.create(
+                        responsibility=responsibility,
+                        reason=reason,
+                        created_by=created_by,
+                        last_triggered_at=now,
+                    ), True
+            except IntegrityError:
+                # lost the race: another request opened it in the meantime
+                open_escalations.update(occurrences=models.F('occurrences') + 1, last_triggered_at=now)
+                return self._retriggered(open_escalations), False
+
+    def _retriggered(self, open_escalations):
+        escalation = open_escalations.get()
+        ChangeLog.log(Escalation, [escalation.pk])
+        return escalation
+
+
 class Escalation(models.Model):
     responsibility = models.ForeignKey(Responsibility, on_delete=models.CASCADE, related_name='escalations')
     reason = models.TextField()
@@ -111,6 +183,24 @@ class Escalation(models.Model):
     resolved = models.BooleanField(default=False)
     resolved_at = models.DateTimeField(null=True, blank=True)
     resolved_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='resolved_escalations')
+    occurrences = models.PositiveIntegerField(default=1)
+    last_triggered_at = models.DateTimeField(default=timezone.now)
+
+    objects = EscalationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='escalation_created_idx'),
+        ]
+        constraints = [
+            # At most one open escalation per responsibility. Written as a
+            # functional unique index (NULL once resolved) because MySQL has
+            # no partial indexes; equivalent to UNIQUE (responsibility) WHERE NOT resolved.
+            models.UniqueConstraint(
+                models.Case(models.When(resolved=False, then=models.F('responsibility'))),
+                name='open_escalation_per_responsibility',
+            ),
+        ]
     
     def __str__(self):
         return f"Escalation for {self.responsibility.title}"
@@ -153,3 +243,258 @@ class PasswordResetToken(models.Model):
 
     def __str__(self):
         return f"PasswordResetToken(user={self.user.email}, token={self.token})"
+
+
+class SearchEntry(models.Model):
+    """
+    Denormalized search document for projects, statuses and responsibilities.
+    Kept in sync by signals; the full-text index on (title, body) is created
+    per database backend in the migration.
+    """
+    KIND_CHOICES = [
+        ('project', 'Project'),
+        ('status', 'Project Status'),
+        ('responsibility', 'Responsibility'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        verbose_name_plural = "Search Entries"
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
+
+
+class AuditEvent(models.Model):
+    """
+    Structured change history for statuses and responsibilities.
+    `changes` maps each tracked field to [before, after].
+    """
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+
+    entity = models.CharField(max_length=30)  # model_name, e.g. "responsibility"
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    actor = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['entity', 'object_id', 'created_at'], name='audit_entity_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} #{self.object_id} {self.action}"
+
+
+class Watermark(models.Model):
+    """
+    Progress marker of an incremental background job: (position, last_id) is
+    the keyset of the last processed row.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField(null=True, blank=True)
+    last_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position} #{self.last_id}"
+
+
+class Sequence(models.Model):
+    """Named counter; incremented with a row-locking UPDATE, never a max() scan."""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class StatusSnapshot(models.Model):
+    """
+    Pre-rendered, gzip-compressed JSON of a baseline/final ProjectStatus,
+    exactly as GET /api/status/{id}/ returns it. Versions are never rewritten:
+    editing a frozen status (or its responsibilities) only flags the latest
+    version stale, and the next read stores a new version.
+    """
+    status = models.ForeignKey(ProjectStatus, on_delete=models.CASCADE, related_name='snapshots')
+    version = models.PositiveIntegerField()
+    etag = models.CharField(max_length=64)
+    content = models.BinaryField()
+    stale = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-version']
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'version'], name='snapshot_status_version_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Snapshot v{self.version} of status #{self.status_id}"
+
+
+class ArchivedStatus(models.Model):
+    """
+    Frozen, zlib-compressed JSON snapshot of a ProjectStatus with its
+    responsibilities and escalations, written by the retention job before the
+    live rows are deleted.
+    """
+    original_id = models.PositiveBigIntegerField(unique=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='archived_statuses')
+    status_date = models.DateField()
+    phase = models.CharField(max_length=5, choices=Project.PHASE_CHOICES)
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-status_date']
+        verbose_name_plural = "Archived Statuses"
+        indexes = [
+            models.Index(fields=['project', 'status_date'], name='archived_project_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived status #{self.original_id} - {self.status_date}"
+
+    @staticmethod
+    def pack(data):
+        return zlib.compress(json.dumps(data, cls=DjangoJSONEncoder).encode(), 6)
+
+    @property
+    def data(self):
+        return json.loads(zlib.decompress(self.payload))
+
+
+
+class ChangeLog(models.Model):
+    """
+    Append-only change sequence behind GET /api/changes/. One row per saved
+    or deleted object, written in the same transaction as the change; deletes
+    are tombstones.
+
+    The client's cursor is `seq`, not the id: ids are taken when a row is
+    inserted, so a long transaction can commit ids below a cursor clients have
+    already passed. `seq` is assigned once the rows are committed
+    (sequence_pending), in commit order.
+    """
+    SEQUENCE_NAME = 'change_log'
+
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    entity = models.CharField(max_length=20)  # "project", "status", "responsibility", "escalation", "user"
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    seq = models.PositiveBigIntegerField(null=True, blank=True, unique=True)  # null until committed
+
+    ENTITIES = {
+        Project: 'project',
+        ProjectStatus: 'status',
+        Responsibility: 'responsibility',
+        Escalation: 'escalation',
+        CustomUser: 'user',
+    }
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.entity} {self.object_id}"
+
+    @classmethod
+    def log(cls, model, ids, action='upsert'):
+        """Record changes made without model signals (bulk writes, queryset.update())."""
+        entity = cls.ENTITIES[model]
+        cls.objects.bulk_create([cls(entity=entity, object_id=pk, action=action) for pk in ids], batch_size=1000)
+        connection = transaction.get_connection()
+        # once per transaction; runs immediately outside one
+        if not any(callback == cls.sequence_pending for _, callback, _ in connection.run_on_commit):
+            transaction.on_commit(cls.sequence_pending)
+
+    @classmethod
+    def sequence_pending(cls):
+        """
+        Number the committed rows that have no seq yet, in id order. The
+        Sequence row stays locked until the numbers are committed, so seqs
+        become visible in increasing order and no reader can pass one that is
+        still being written.
+        """
+        with transaction.atomic():
+            sequence, _ = Sequence.objects.select_for_update().get_or_create(
+                name=cls.SEQUENCE_NAME,
+                defaults={'value': cls.objects.aggregate(value=models.Max('seq'))['value'] or 0},
+            )
+            # read after taking the lock: rows numbered by the previous holder are excluded
+            ids = list(cls.objects.filter(seq__isnull=True).order_by('id').values_list('id', flat=True))
+            if not ids:
+                return
+            cls.objects.bulk_update(
+                [cls(id=pk, seq=sequence.value + offset) for offset, pk in enumerate(ids, 1)],
+                ['seq'], batch_size=1000,
+            )
+            Sequence.objects.filter(pk=sequence.pk).update(value=sequence.value + len(ids))
+
+
+class ProjectForecast(models.Model):
+    """
+    Schedule-risk forecast of an active project, recomputed for the whole
+    portfolio at once by api.forecasting (refresh_forecasts command) and per
+    project when its statuses or responsibilities change.
+    """
+    RISK_CHOICES = [
+        ('LOW', 'Low'),
+        ('MEDIUM', 'Medium'),
+        ('HIGH', 'High'),
+    ]
+
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='forecast')
+    # both in percent of the plan: time elapsed vs work done
+    expected_progress = models.FloatField()
+    actual_progress = models.FloatField()
+    schedule_variance = models.FloatField(db_index=True)  # actual - expected, negative = behind
+    projected_end_date = models.DateField(null=True, blank=True)  # null: no progress to extrapolate from
+    slip_days = models.IntegerField(null=True, blank=True, db_index=True)
+    days_in_phase = models.PositiveIntegerField(default=0)
+    risk = models.FloatField(db_index=True)  # 0..1
+    risk_level = models.CharField(max_length=6, choices=RISK_CHOICES, db_index=True)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.project_id}: {self.risk_level} ({self.risk:.2f})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Outcome of a POST sent with an Idempotency-Key header (api.idempotency).
+    The row is inserted before the view runs, so it also serves as the lock
+    for concurrent retries; status_code stays null until the response is stored.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of method, path and body
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    body = models.BinaryField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.status_code or 'pending'})"
@@ -0,0 +1,71 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+_fallback_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson. Types orjson does not know (Decimal,
+    lazy strings, querysets...) go through DRF's JSONEncoder. Falls back to
+    the stock JSONRenderer when orjson is not installed.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_fallback_encoder.default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Binary MessagePack output, selected with `Accept: application/msgpack`."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_fallback_encoder.default, use_bin_type=True)
+
+
+def to_columns(rows):
+    """[{'a': 1, 'b': 2}, {'a': 3}] -> {'a': [1, 3], 'b': [2, None]}"""
+    keys = {}
+    for row in rows:
+        keys.update(dict.fromkeys(row))
+    return {key: [row.get(key) for row in rows] for key in keys}
+
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    """
+    `?format=columnar`: list results are sent as one array per field instead of
+    one object per row, so repeated keys are written once per response.
+    Non-list payloads are rendered unchanged.
+    """
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+            data = {'count': len(data), 'columns': to_columns(data)}
+        elif isinstance(data, dict) and isinstance(data.get('results'), list):
+            data = dict(data, results={
+                'count': len(data['results']),
+                'columns': to_columns(data['results']),
+            })
+        return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,248 @@
+"""
+Report queries shared by ReportingViewSet and the ASGI-native views in
+api.async_views.
+
+Each function is one independent, blocking query (or a cached group of
+them) so the async views can run several concurrently while the sync views
+call them one after another.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Value
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import Escalation, Project, ProjectStatus, Responsibility
+from .serializers import EscalationSerializer
+
+AT_RISK = Q(status='Y') | Q(status='R') | Q(needs_escalation=True)
+
+
+def _start_of_day(value):
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _latest_responsibilities():
+    return Responsibility.objects.filter(project_status__in=ProjectStatus.objects.latest_per_project())
+
+
+# ---- project summary ----
+
+def total_projects():
+    return Project.objects.count()
+
+
+def projects_in_production():
+    return Project.objects.filter(statuses__phase='PROD').distinct().count()
+
+
+def escalated_projects():
+    return Responsibility.objects.filter(AT_RISK).values('project_status__project').distinct().count()
+
+
+def project_summary(total, in_production, escalated):
+    return {
+        'total_projects': total,
+        'in_production': in_production,
+        'escalated_projects': escalated,
+        'escalation_rate': round((escalated / total) * 100, 2) if total else 0
+    }
+
+
+# ---- dashboard ----
+
+def projects_by_phase():
+    rows = Project.objects.values_list('current_phase').annotate(count=Count('id')).order_by()
+    return {phase: 0 for phase, _ in Project.PHASE_CHOICES} | dict(rows)
+
+
+def latest_rag_counts():
+    rows = _latest_responsibilities().values_list('status').annotate(count=Count('id')).order_by()
+    return {rag: 0 for rag, _ in Responsibility.STATUS_CHOICES} | dict(rows)
+
+
+def open_escalations():
+    return Escalation.objects.filter(resolved=False).count()
+
+
+def my_open_items(user_id):
+    """Yellow/red or flagged items of the user on the latest status of each project."""
+    return _latest_responsibilities().filter(
+        Q(responsible_id=user_id) | Q(deputy_id=user_id)
+    ).filter(AT_RISK).count()
+
+
+def dashboard(phases, rag, escalations, my_items):
+    return {
+        'projects_by_phase': phases,
+        'total_projects': sum(phases.values()),
+        'latest_rag': rag,
+        'open_escalations': escalations,
+        'my_open_items': my_items,
+    }
+
+
+# ---- workload ----
+
+def workload(department=''):
+    """
+    Workload per user, computed on the latest status of each project only.
+    Responsible and deputy assignments are counted per RAG status together
+    with the open escalations on those assignments. Cached for
+    REPORTS_CACHE_TIMEOUT seconds per department.
+    """
+    cache_key = f"reports:workload:{department}"
+    data = cache.get(cache_key)
+    if data is not None:
+        return data
+
+    latest = _latest_responsibilities()
+
+    def counts(role, user_field):
+        qs = latest.filter(**{f'{user_field}__isnull': False})
+        if department:
+            qs = qs.filter(**{f'{user_field}__department': department})
+        return qs.values(
+            user_id=F(user_field),
+            username=F(f'{user_field}__username'),
+        ).annotate(
+            role=Value(role),
+            green=Count('id', filter=Q(status='G'), distinct=True),
+            yellow=Count('id', filter=Q(status='Y'), distinct=True),
+            red=Count('id', filter=Q(status='R'), distinct=True),
+            open_escalations=Count('escalations', filter=Q(escalations__resolved=False), distinct=True),
+        ).order_by()
+
+    # one round trip: responsible and deputy groups are combined with UNION ALL
+    rows = counts('responsible', 'responsible').union(counts('deputy', 'deputy'), all=True)
+
+    users = {}
+    for row in rows:
+        entry = users.setdefault(row['user_id'], {
+            'user_id': row['user_id'],
+            'username': row['username'],
+            'responsible': {'G': 0, 'Y': 0, 'R': 0},
+            'deputy': {'G': 0, 'Y': 0, 'R': 0},
+            'open_escalations': 0,
+            'total_responsibilities': 0,
+        })
+        entry[row['role']] = {'G': row['green'], 'Y': row['yellow'], 'R': row['red']}
+        entry['open_escalations'] += row['open_escalations']
+        entry['total_responsibilities'] += row['green'] + row['yellow'] + row['red']
+
+    data = sorted(users.values(), key=lambda u: u['username'])
+    cache.set(cache_key, data, settings.REPORTS_CACHE_TIMEOUT)
+    return data
+
+
+# ---- escalations ----
+
+def filter_escalations(qs, params):
+    """
+    Shared escalation filters for the report and analytics actions.
+    Dates are turned into [start, end) datetime ranges so the created_at
+    index can be used instead of applying DATE() to every row.
+    """
+    # resolved / include_resolved
+    resolved_param = params.get('resolved') or params.get('include_resolved')
+    if resolved_param is not None:
+        if str(resolved_param).lower() in ('true', '1'):
+            qs = qs.filter(resolved=True)
+        elif str(resolved_param).lower() in ('false', '0'):
+            qs = qs.filter(resolved=False)
+
+    # project filter
+    project_q = params.get('project')
+    if project_q:
+        if str(project_q).isdigit():
+            qs = qs.filter(responsibility__project_status__project__id=project_q)
+        else:
+            qs = qs.filter(responsibility__project_status__project__code=project_q)
+
+    # date range
+    try:
+        date_from = params.get('date_from')
+        date_to = params.get('date_to')
+        if date_from:
+            qs = qs.filter(created_at__gte=_start_of_day(date_from))
+        if date_to:
+            qs = qs.filter(created_at__lt=_start_of_day(date_to) + timedelta(days=1))
+    except (TypeError, ValueError):
+        raise ValidationError({"detail": "Invalid date_from or date_to. Use YYYY-MM-DD."})
+
+    # responsibility passthrough
+    resp = params.get('responsibility')
+    if resp:
+        qs = qs.filter(responsibility__id=resp)
+    return qs
+
+
+def escalations(params):
+    return filter_escalations(
+        Escalation.objects.select_related(
+            'responsibility__project_status__project',
+            'created_by',
+            'resolved_by'
+        ).order_by('-created_at'),
+        params,
+    )
+
+
+def escalation_rows(params):
+    """Serialized escalation report (unpaginated)."""
+    return EscalationSerializer(escalations(params), many=True).data
+
+
+# ---- heatmap ----
+
+# cells hold a rank while the matrix is built (worst status wins when a
+# title repeats) and are translated to one character each at the end
+_RAG_RANK = {'G': 1, 'Y': 2, 'R': 3}
+_CELL_CODES = bytes.maketrans(b'\x00\x01\x02\x03', b'.GYR')
+
+
+def heatmap(phase='', manager='', department='', titles=None, max_columns=100):
+    """
+    Active projects x responsibility titles, colored by the latest status.
+
+    Built from one values_list over the responsibilities of each project's
+    latest status. Columns are the requested titles, or the most frequent
+    ones. `cells` is the row-major matrix packed into a string, one
+    character per cell: G, Y, R or '.' for no such responsibility.
+    """
+    qs = _latest_responsibilities().exclude(project_status__project__current_phase='COMP')
+    if phase:
+        qs = qs.filter(project_status__project__current_phase=phase)
+    if manager:
+        qs = qs.filter(project_status__project__manager_id=manager)
+    if department:
+        qs = qs.filter(responsible__department=department)
+    if titles:
+        qs = qs.filter(title__in=titles)
+    rows = list(qs.values_list('project_status__project_id', 'project_status__project__code', 'title', 'status'))
+
+    if not titles:
+        frequency = Counter(title for _, _, title, _ in rows)
+        titles = sorted(frequency, key=lambda title: (-frequency[title], title))[:max_columns]
+    column = {title: index for index, title in enumerate(titles)}
+    projects = sorted({(code, project_id) for project_id, code, _, _ in rows})
+    row = {project_id: index for index, (_, project_id) in enumerate(projects)}
+
+    ranks = bytearray(len(projects) * len(titles))
+    for project_id, _, title, rag in rows:
+        index = column.get(title)
+        if index is not None:
+            cell = row[project_id] * len(titles) + index
+            ranks[cell] = max(ranks[cell], _RAG_RANK.get(rag, 0))
+    return {
+        'rows': [{'id': project_id, 'code': code} for code, project_id in projects],
+        'columns': list(titles),
+        'cells': ranks.translate(_CELL_CODES).decode('ascii'),
+    }
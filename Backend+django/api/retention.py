@@ -0,0 +1,110 @@
+"""
+Retention policies (settings.RETENTION):
+- statuses of completed projects older than STATUS_MONTHS are moved into
+  ArchivedStatus snapshots together with their responsibilities and
+  escalations; the latest status of each project always stays live;
+- read notifications older than READ_NOTIFICATION_DAYS are purged;
+- change-log rows older than CHANGE_LOG_DAYS are purged (api.changes);
+- idempotency keys past settings.IDEMPOTENCY["TTL_HOURS"] are purged
+  (api.idempotency).
+
+Work is done in chunks of BATCH_SIZE rows, each in its own transaction, so
+an interrupted run simply resumes on the next invocation.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import changes, idempotency
+from .models import ArchivedStatus, Escalation, Notification, ProjectStatus, SearchEntry
+from .serializers import ProjectStatusSerializer
+
+
+def _months_ago(day, months):
+    month_index = day.year * 12 + day.month - 1 - months
+    year, month = divmod(month_index, 12)
+    # clamp to the 28th so every month has the day
+    return day.replace(year=year, month=month + 1, day=min(day.day, 28))
+
+
+def archivable_statuses(months):
+    cutoff = _months_ago(timezone.now().date(), months)
+    return ProjectStatus.objects.filter(
+        project__current_phase='COMP',
+        status_date__lt=cutoff,
+    ).exclude(
+        id__in=ProjectStatus.objects.latest_per_project().values('id')
+    ).order_by('id')
+
+
+def archive_chunk(statuses):
+    """Snapshot and delete one chunk of ProjectStatus rows."""
+    statuses = list(
+        statuses.select_related('created_by').prefetch_related(
+            'responsibilities__responsible', 'responsibilities__deputy'
+        )
+    )
+    if not statuses:
+        return 0
+    ids = [status.id for status in statuses]
+
+    escalations = {}
+    for row in Escalation.objects.filter(responsibility__project_status__in=ids).values().order_by('id'):
+        escalations.setdefault(row['responsibility_id'], []).append(row)
+
+    snapshots = []
+    for status, data in zip(statuses, ProjectStatusSerializer(statuses, many=True).data):
+        data = dict(data, archived=True)
+        data['responsibilities'] = [
+            dict(resp, escalations=escalations.get(resp['id'], [])) for resp in data['responsibilities']
+        ]
+        snapshots.append(ArchivedStatus(
+            original_id=status.id,
+            project_id=status.project_id,
+            status_date=status.status_date,
+            phase=status.phase,
+            payload=ArchivedStatus.pack(data),
+        ))
+
+    with transaction.atomic():
+        ArchivedStatus.objects.bulk_create(snapshots, ignore_conflicts=True)
+        responsibility_ids = [resp.id for status in statuses for resp in status.responsibilities.all()]
+        SearchEntry.objects.filter(kind='status', object_id__in=ids).delete()
+        SearchEntry.objects.filter(kind='responsibility', object_id__in=responsibility_ids).delete()
+        ProjectStatus.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_statuses(months, batch_size):
+    total = 0
+    while True:
+        archived = archive_chunk(archivable_statuses(months)[:batch_size])
+        total += archived
+        if archived < batch_size:
+            return total
+
+
+def purge_read_notifications(days, batch_size):
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    while True:
+        ids = list(
+            Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += Notification.objects.filter(id__in=ids).delete()[0]
+
+
+def apply_retention(batch_size=None):
+    policy = settings.RETENTION
+    batch_size = batch_size or policy['BATCH_SIZE']
+    return {
+        'archived_statuses': archive_statuses(policy['STATUS_MONTHS'], batch_size),
+        'purged_notifications': purge_read_notifications(policy['READ_NOTIFICATION_DAYS'], batch_size),
+        'purged_changes': changes.purge(policy['CHANGE_LOG_DAYS'], batch_size),
+        'purged_idempotency_keys': idempotency.purge(batch_size),
+    }
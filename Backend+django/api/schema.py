@@ -0,0 +1,73 @@
+"""
+Precomputed OpenAPI schema.
+
+drf_yasg introspects every view on each schema request, yet the schema only
+changes with the code. `generate_schema` writes it to OPENAPI_SCHEMA_PATH at
+deploy time and workers serve those bytes from memory. Without the file the
+schema is generated on the first request and kept for the life of the
+process.
+
+This module imports drf_yasg; the URLconf reaches it through api.lazy, so
+workers that never serve the docs do not load it.
+"""
+import hashlib
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+from .middleware import etag_matches
+
+logger = logging.getLogger(__name__)
+
+INFO = openapi.Info(
+    title="Project Status API",
+    default_version='v1',
+    description="API for project status tracking system",
+)
+# formats served from the precomputed JSON; YAML is still generated on demand
+PRECOMPUTED_FORMATS = ('openapi', 'json')
+
+_schema = None
+
+
+def generate():
+    """Introspect the URLconf and return the schema as JSON bytes."""
+    # no request: the artifact has no host and the docs pages use their own origin
+    schema = OpenAPISchemaGenerator(INFO).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def load():
+    """(body, etag) of the schema, read or generated once per process."""
+    global _schema
+    if _schema is None:
+        path = Path(settings.OPENAPI_SCHEMA_PATH)
+        try:
+            body = path.read_bytes()
+        except FileNotFoundError:
+            logger.warning("%s not found, generating the OpenAPI schema; run generate_schema at deploy", path)
+            body = generate()
+        _schema = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+    return _schema
+
+
+class SchemaView(get_schema_view(INFO, public=True, permission_classes=[permissions.AllowAny])):
+    def get(self, request, version='', format=None):
+        # the swagger/redoc pages are rendered without paths and fetch the spec separately
+        if request.accepted_renderer.format not in PRECOMPUTED_FORMATS:
+            return super().get(request, version, format)
+        body, etag = load()
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, no-cache'
+        return response
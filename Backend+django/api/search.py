@@ -0,0 +1,162 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Project, ProjectStatus, Responsibility, SearchEntry
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TOKENS = 8
+
+KIND_BY_MODEL = {
+    Project: 'project',
+    ProjectStatus: 'status',
+    Responsibility: 'responsibility',
+}
+
+
+def document_for(instance, status_projects=None):
+    """
+    Return (kind, project_id, title, body) for an indexed instance.
+    `status_projects` maps status ids to project ids, so responsibilities do
+    not need their status loaded.
+    """
+    if isinstance(instance, Project):
+        return 'project', instance.pk, f"{instance.code} - {instance.name}", instance.description
+    if isinstance(instance, ProjectStatus):
+        title = f"Status {instance.status_date} ({instance.get_phase_display()})"
+        return 'status', instance.project_id, title, instance.notes
+    if isinstance(instance, Responsibility):
+        if status_projects is not None and instance.project_status_id in status_projects:
+            project_id = status_projects[instance.project_status_id]
+        else:
+            project_id = instance.project_status.project_id
+        return 'responsibility', project_id, instance.title, instance.comments
+    return None
+
+
+def apply(changes):
+    """
+    Write queued index changes (api.deferred): `changes` maps (model, pk) to
+    the instance to index, or None when its entry must go. One upsert and one
+    delete per kind.
+    """
+    instances = [instance for instance in changes.values() if instance is not None]
+    status_ids = {instance.project_status_id for instance in instances if isinstance(instance, Responsibility)}
+    status_projects = dict(
+        ProjectStatus.objects.filter(id__in=status_ids).values_list('id', 'project_id')
+    ) if status_ids else {}
+
+    entries = []
+    for instance in instances:
+        kind, project_id, title, body = document_for(instance, status_projects)
+        entries.append(SearchEntry(
+            kind=kind, object_id=instance.pk, project_id=project_id, title=title[:255], body=body or '',
+        ))
+    if entries:
+        # MySQL upserts with ON DUPLICATE KEY UPDATE and rejects a conflict target
+        target = ['kind', 'object_id'] if connection.features.supports_update_conflicts_with_target else None
+        SearchEntry.objects.bulk_create(
+            entries, update_conflicts=True, unique_fields=target,
+            update_fields=['project', 'title', 'body', 'updated_at'],
+        )
+
+    removed = {}
+    for (model, pk), instance in changes.items():
+        if instance is None:
+            removed.setdefault(KIND_BY_MODEL[model], []).append(pk)
+    for kind, ids in removed.items():
+        SearchEntry.objects.filter(kind=kind, object_id__in=ids).delete()
+
+
+def rebuild_index(batch_size=1000):
+    """Re-create every search entry; used by the rebuild_search_index command."""
+    SearchEntry.objects.all().delete()
+    total = 0
+    sources = [
+        Project.objects.all(),
+        ProjectStatus.objects.all(),
+        Responsibility.objects.select_related('project_status'),
+    ]
+    for qs in sources:
+        batch = []
+        for instance in qs.order_by('pk').iterator(chunk_size=batch_size):
+            kind, project_id, title, body = document_for(instance)
+            batch.append(SearchEntry(
+                kind=kind, object_id=instance.pk, project_id=project_id,
+                title=title[:255], body=body or '',
+            ))
+            if len(batch) >= batch_size:
+                SearchEntry.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        SearchEntry.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def _match(tokens):
+    """
+    Build the backend-specific (rank_sql, where_sql, query) triple. Every token
+    is required and treated as a prefix so partially typed words match.
+    """
+    table = SearchEntry._meta.db_table
+    vendor = connection.vendor
+    if vendor == 'mysql':
+        query = ' '.join(f'+{token}*' for token in tokens)
+        rank = f"MATCH({table}.title, {table}.body) AGAINST (%s IN BOOLEAN MODE)"
+        return rank, rank, query
+    if vendor == 'postgresql':
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        document = f"to_tsvector('simple', {table}.title || ' ' || {table}.body)"
+        return (
+            f"ts_rank({document}, to_tsquery('simple', %s))",
+            f"{document} @@ to_tsquery('simple', %s)",
+            query,
+        )
+    if vendor == 'sqlite':
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        # FTS5 rank is bm25 (lower is better), negate it so higher is better
+        return (
+            f"(SELECT -{table}_fts.rank FROM {table}_fts "
+            f"WHERE {table}_fts MATCH %s AND {table}_fts.rowid = {table}.id)",
+            f"{table}.id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s)",
+            query,
+        )
+    return None
+
+
+def search(query, user, limit=20, kinds=None):
+    """
+    Ranked search over SearchEntry, restricted to projects the user can see.
+    Falls back to icontains on backends without a full-text index.
+    """
+    tokens = TOKEN_RE.findall(query.lower())[:MAX_TOKENS]
+    if not tokens:
+        return SearchEntry.objects.none()
+
+    qs = SearchEntry.objects.all()
+    match = _match(tokens)
+    if match is None:
+        condition = Q()
+        for token in tokens:
+            condition &= Q(title__icontains=token) | Q(body__icontains=token)
+        qs = qs.filter(condition).annotate(rank=Value(0.0, output_field=FloatField()))
+    else:
+        rank_sql, where_sql, fts_query = match
+        qs = qs.filter(RawSQL(where_sql, [fts_query], output_field=BooleanField())).annotate(
+            rank=RawSQL(rank_sql, [fts_query], output_field=FloatField())
+        )
+
+    if kinds:
+        qs = qs.filter(kind__in=kinds)
+
+    if getattr(user, 'role', None) not in ['PM', 'ADMIN']:
+        visible = Project.objects.filter(
+            Q(statuses__responsibilities__responsible=user) |
+            Q(statuses__responsibilities__deputy=user)
+        ).values('id')
+        qs = qs.filter(project_id__in=visible)
+
+    return qs.order_by('-rank', '-updated_at')[:limit]
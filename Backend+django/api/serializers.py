@@ -1,19 +1,205 @@
 from rest_framework import serializers
+from django.db import models
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 import re
 
-from .models import Project, ProjectStatus, Responsibility, Escalation
+from .models import Project, ProjectForecast, ProjectStatus, Responsibility, Escalation, AuditEvent
+from . import fragments
 
 User = get_user_model()
 
+# FK fields holding a user id; used to side-load `included.users`
+USER_REFERENCE_FIELDS = ('manager', 'responsible', 'deputy', 'created_by', 'resolved_by')
 
-class UserSerializer(serializers.ModelSerializer):
+
+def _query_list(request, name):
+    if request is None or name not in request.query_params:
+        return None
+    return {item.strip() for item in request.query_params.get(name, '').split(',') if item.strip()}
+
+
+def _level(selection, prefix):
+    """Names selected at one nesting level, e.g. {'a.b', 'c'} at 'a.' -> {'b'}."""
+    return {item[len(prefix):].split('.')[0] for item in selection if item.startswith(prefix)}
+
+
+def is_user_field(field):
+    return isinstance(field, UserSerializer)
+
+
+class DynamicFieldsMixin:
+    """
+    Read-time field selection driven by query parameters:
+      ?fields=id,title,responsibilities.status   only render the listed fields
+      ?expand=responsible_details,responsibilities  only render these nested fields
+      ?include=users   drop nested user objects; the view side-loads them once
+    Nested paths use dots. Without `expand` every nested field is rendered as
+    before, so existing clients keep the full representation.
+
+    `expandable_fields` maps each nested field to the relation it reads, so the
+    views can prefetch exactly what will be serialized.
+    """
+    expandable_fields = {}
+
+    def _path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return ''.join(f'{name}.' for name in reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return fields
+
+        prefix = self._path()
+        only = _query_list(request, 'fields')
+        expand = _query_list(request, 'expand')
+        include = _query_list(request, 'include') or set()
+
+        for name in self.expandable_fields:
+            drop = expand is not None and name not in _level(expand, prefix)
+            if 'users' in include and is_user_field(self._declared_fields.get(name)):
+                drop = True
+            if drop:
+                fields.pop(name, None)
+
+        if only:
+            selected = _level(only, prefix)
+            if selected:
+                for name in list(fields):
+                    if name not in selected:
+                        fields.pop(name)
+        return fields
+
+
+class FragmentCacheMixin:
+    """
+    Cache `to_representation` per object in api.fragments. Subclasses name
+    the model field that changes on every save in `fragment_version_field`;
+    nested cached serializers add their own versions to the key.
+    """
+    fragment_version_field = None
+
+    def _fragment_shape(self):
+        if not hasattr(self, '_shape'):
+            def names(serializer):
+                return tuple(
+                    (name, names(getattr(field, 'child', field)))
+                    if isinstance(getattr(field, 'child', field), serializers.BaseSerializer) else name
+                    for name, field in serializer.fields.items() if not field.write_only
+                )
+            self._shape = fragments.shape_of(names(self))
+        return self._shape
+
+    def fragment_version(self, instance):
+        """Modification times (microseconds) of the object and its nested cached objects."""
+        parts = [str(int(getattr(instance, self.fragment_version_field).timestamp() * 1e6))]
+        for field in self.fields.values():
+            if isinstance(field, FragmentCacheMixin) and not field.write_only:
+                nested = field.get_attribute(instance)
+                parts.append(field.fragment_version(nested) if nested is not None else '-')
+        return '.'.join(parts)
+
+    def fragment_key(self, instance):
+        return fragments.make_key(
+            self.Meta.model._meta.label_lower, instance.pk,
+            self._fragment_shape(), self.fragment_version(instance),
+        )
+
+    def to_representation(self, instance):
+        if isinstance(self.parent, CachedListSerializer):
+            return super().to_representation(instance)
+        key = self.fragment_key(instance)
+        cached = fragments.get_many([key]).get(key)
+        if cached is None:
+            cached = super().to_representation(instance)
+            fragments.set_many({key: cached})
+        return dict(cached)
+
+
+class VersionedSerializerMixin:
+    """
+    `version` is rendered like any field; on updates the submitted value is
+    the version the change is based on (api.concurrency), on creates it is ignored.
+    Subclasses declare the field (the model field is not editable).
+    """
+
+    def create(self, validated_data):
+        validated_data.pop('version', None)
+        return super().create(validated_data)
+
+
+class CachedListSerializer(serializers.ListSerializer):
+    """Fetch the fragments of a list with one get_many and serialize only the misses."""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        keys = [self.child.fragment_key(item) for item in items]
+        found = fragments.get_many(keys)
+        rendered = {}
+        for key, item in zip(keys, items):
+            if key not in found and key not in rendered:
+                rendered[key] = self.child.to_representation(item)
+        fragments.set_many(rendered)
+        found.update(rendered)
+        return [dict(found[key]) for key in keys]
+
+
+def expansion_lookups(serializer_class, request, prefix='', lookup=''):
+    """
+    Relations to prefetch for the nested fields that `serializer_class` will
+    render for this request (mirrors DynamicFieldsMixin.get_fields).
+    """
+    expand = _query_list(request, 'expand')
+    include = _query_list(request, 'include') or set()
+    selected = _level(_query_list(request, 'fields') or set(), prefix)
+    lookups = []
+    for name, relation in getattr(serializer_class, 'expandable_fields', {}).items():
+        if expand is not None and name not in _level(expand, prefix):
+            continue
+        if selected and name not in selected:
+            continue
+        field = serializer_class._declared_fields.get(name)
+        if 'users' in include and is_user_field(field):
+            continue
+        path = f'{lookup}{relation}'
+        lookups.append(path)
+        child = getattr(field, 'child', field)
+        lookups.extend(expansion_lookups(type(child), request, f'{prefix}{name}.', f'{path}__'))
+    return lookups
+
+
+def collect_user_ids(data, ids=None):
+    """Walk serialized data and gather the ids stored in USER_REFERENCE_FIELDS."""
+    if ids is None:
+        ids = set()
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in USER_REFERENCE_FIELDS and isinstance(value, int):
+                ids.add(value)
+            elif isinstance(value, (dict, list)):
+                collect_user_ids(value, ids)
+    elif isinstance(data, list):
+        for item in data:
+            collect_user_ids(item, ids)
+    return ids
+
+
+class UserSerializer(FragmentCacheMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """
     User serializer. Password is write-only and will be hashed on create/update.
     """
+    fragment_version_field = 'updated_at'
+
     class Meta:
         model = User
+        list_serializer_class = CachedListSerializer
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
             'role', 'phone', 'department', 'is_active', 'password'
@@ -33,21 +219,29 @@ class UserSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class ResponsibilitySerializer(serializers.ModelSerializer):
+class ResponsibilitySerializer(VersionedSerializerMixin, FragmentCacheMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Responsibility serializer with nested read-only user info for responsible and deputy.
     """
+    fragment_version_field = 'last_updated'
+    expandable_fields = {
+        'responsible_details': 'responsible',
+        'deputy_details': 'deputy',
+    }
+
     responsible_details = UserSerializer(source='responsible', read_only=True)
     deputy_details = UserSerializer(source='deputy', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    version = serializers.IntegerField(required=False, min_value=1)
 
     class Meta:
         model = Responsibility
+        list_serializer_class = CachedListSerializer
         # Expose fields explicitly for clarity; adjust if you add/remove model fields
         fields = [
             'id', 'project_status', 'title', 'responsible', 'responsible_details',
             'deputy', 'deputy_details', 'status', 'status_display', 'needs_escalation',
-            'last_updated', 'progress', 'comments'
+            'last_updated', 'progress', 'comments', 'version'
         ]
 
     def validate_progress(self, value):
@@ -58,14 +252,27 @@ class ResponsibilitySerializer(serializers.ModelSerializer):
         return value
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectForecastSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProjectForecast
+        exclude = ['project']
+
+
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Project serializer:
     - `manager` is writeable (PK).
     - `manager_details` provides nested read-only info.
+    - `forecast` is the stored schedule-risk forecast (null until computed).
     - validates code pattern and date order.
     """
+    expandable_fields = {
+        'manager_details': 'manager',
+        'forecast': 'forecast',
+    }
+
     manager_details = UserSerializer(source='manager', read_only=True)
+    forecast = ProjectForecastSerializer(read_only=True)
     progress = serializers.ReadOnlyField()
     phase_display = serializers.CharField(source='get_current_phase_display', read_only=True)
 
@@ -76,9 +283,9 @@ class ProjectSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'code', 'name', 'description', 'manager', 'manager_details',
             'start_date', 'end_date', 'current_phase', 'phase_display',
-            'created_at', 'updated_at', 'progress'
+            'created_at', 'updated_at', 'progress', 'forecast'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'progress', 'phase_display', 'manager_details']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'progress', 'phase_display', 'manager_details', 'forecast']
 
     CODE_REGEX = re.compile(r'^100000000\d+-01S$')
 
@@ -97,28 +304,40 @@ class ProjectSerializer(serializers.ModelSerializer):
         return super().validate(attrs)
 
 
-class ProjectStatusSerializer(serializers.ModelSerializer):
+class ProjectStatusSerializer(VersionedSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """
     ProjectStatus serializer with nested responsibilities and creator details.
     """
+    expandable_fields = {
+        'responsibilities': 'responsibilities',
+        'created_by_details': 'created_by',
+    }
+
     responsibilities = ResponsibilitySerializer(many=True, read_only=True)
     created_by_details = UserSerializer(source='created_by', read_only=True)
     phase_display = serializers.CharField(source='get_phase_display', read_only=True)
+    version = serializers.IntegerField(required=False, min_value=1)
 
     class Meta:
         model = ProjectStatus
         fields = [
             'id', 'project', 'status_date', 'phase', 'phase_display',
             'notes', 'is_baseline', 'is_final', 'created_by', 'created_by_details',
-            'created_at', 'responsibilities'
+            'created_at', 'responsibilities', 'version'
         ]
         read_only_fields = ['id', 'created_at', 'created_by_details', 'responsibilities', 'phase_display']
 
 
-class EscalationSerializer(serializers.ModelSerializer):
+class EscalationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Escalation serializer with nested read-only responsibility and user details.
     """
+    expandable_fields = {
+        'responsibility_details': 'responsibility',
+        'created_by_details': 'created_by',
+        'resolved_by_details': 'resolved_by',
+    }
+
     responsibility_details = ResponsibilitySerializer(source='responsibility', read_only=True)
     created_by_details = UserSerializer(source='created_by', read_only=True)
     resolved_by_details = UserSerializer(source='resolved_by', read_only=True)
@@ -128,12 +347,23 @@ class EscalationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'responsibility', 'responsibility_details', 'reason',
             'created_by', 'created_by_details', 'created_at',
-            'resolved', 'resolved_at', 'resolved_by', 'resolved_by_details'
+            'resolved', 'resolved_at', 'resolved_by', 'resolved_by_details',
+            'occurrences', 'last_triggered_at'
+        ]
+        read_only_fields = [
+            'id', 'created_at', 'created_by_details', 'responsibility_details', 'resolved_by_details',
+            'occurrences', 'last_triggered_at'
         ]
-        read_only_fields = ['id', 'created_at', 'created_by_details', 'responsibility_details', 'resolved_by_details']
 
 
-from rest_framework import serializers
+class AuditEventSerializer(serializers.ModelSerializer):
+    actor_username = serializers.CharField(source='actor.username', read_only=True, default=None)
+
+    class Meta:
+        model = AuditEvent
+        fields = ['id', 'entity', 'object_id', 'action', 'changes', 'actor', 'actor_username', 'created_at']
+        read_only_fields = fields
+
 
 class ChangePasswordSerializer(serializers.Serializer):
     current_password = serializers.CharField(write_only=True, required=True)
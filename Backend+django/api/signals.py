@@ -1,28 +1,122 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 import logging
 
-from .models import ProjectStatus, Responsibility
+from .models import CustomUser, Escalation, Project, ProjectStatus, Responsibility
+from . import audit, codes, deferred, fragments
 
 logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=ProjectStatus)
-def log_project_status_change(sender, instance, created, **kwargs):
-    action = 'Created' if created else 'Updated'
-    logger.info(f"Project Status {action}: {instance.project.code} on {instance.status_date}")
+@receiver(post_save, sender=Responsibility)
+def audit_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    changes = audit.diff(instance, created)
+    if created or changes:
+        audit.record(instance, 'created' if created else 'updated', changes)
+        logger.debug("%s %s %s", sender.__name__, instance.pk, 'created' if created else 'updated')
+
+
+@receiver(post_delete, sender=ProjectStatus)
+@receiver(post_delete, sender=Responsibility)
+def audit_delete(sender, instance, **kwargs):
+    audit.record(instance, 'deleted')
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectStatus)
+@receiver(post_save, sender=Responsibility)
+@receiver(post_save, sender=Escalation)
+@receiver(post_save, sender=CustomUser)
+def log_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    # logins only touch last_login, which is not part of any API payload
+    if raw or update_fields == frozenset(['last_login']):
+        return
+    deferred.log_change(sender, instance.pk)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=ProjectStatus)
+@receiver(post_delete, sender=Responsibility)
+@receiver(post_delete, sender=Escalation)
+@receiver(post_delete, sender=CustomUser)
+def log_delete(sender, instance, **kwargs):
+    deferred.log_change(sender, instance.pk, 'delete')
+
+
+@receiver(post_save, sender=ProjectStatus)
+def freeze_status(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    # every save bumps the version carried by the snapshot
+    if not created:
+        deferred.mark_stale(instance.pk)
+    frozen_now = created or instance.tracker.has_changed('is_baseline') or instance.tracker.has_changed('is_final')
+    if instance.is_frozen and frozen_now:
+        deferred.render_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=Responsibility)
+@receiver(post_delete, sender=Responsibility)
+def refreeze_status(sender, instance, raw=False, **kwargs):
+    if not raw:
+        deferred.mark_stale(instance.project_status_id)
 
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Responsibility)
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=Responsibility)
+def evict_fragments(sender, instance, **kwargs):
+    fragments.evict(sender._meta.label_lower, instance.pk)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def refresh_project_codes(sender, **kwargs):
+    codes.invalidate()
+
+
+# Fields copied into the search entry of each model
+SEARCH_FIELDS = {
+    ProjectStatus: ('status_date', 'phase', 'notes'),
+    Responsibility: ('title', 'comments'),
+}
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectStatus)
+@receiver(post_save, sender=Responsibility)
+def update_search_entry(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    tracked = SEARCH_FIELDS.get(sender)
+    if tracked and not created and not any(instance.tracker.has_changed(f) for f in tracked):
+        return
+    deferred.index(instance)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=ProjectStatus)
+@receiver(post_delete, sender=Responsibility)
+def delete_search_entry(sender, instance, **kwargs):
+    # drops index work still queued for the row; stored entries of a
+    # project also go away through the SearchEntry.project cascade
+    deferred.unindex(instance)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectStatus)
+@receiver(post_delete, sender=ProjectStatus)
 @receiver(post_save, sender=Responsibility)
-def log_responsibility_change(sender, instance, **kwargs):
-    changes = []
-    if instance.tracker.has_changed('status'):
-        prev = instance.tracker.previous('status')
-        changes.append(f"Status: {prev} → {instance.status}")
-    if instance.tracker.has_changed('needs_escalation'):
-        prev = instance.tracker.previous('needs_escalation')
-        changes.append(f"Escalation: {prev} → {instance.needs_escalation}")
-
-    if changes:
-        logger.info(
-            f"Responsibility updated: {instance.title} in {instance.project_status.project.code}. "
-            f"Changes: {', '.join(changes)}"
-        )
+@receiver(post_delete, sender=Responsibility)
+def refresh_forecast(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if sender is Project:
+        deferred.forecast(project_id=instance.pk)
+    elif sender is ProjectStatus:
+        deferred.forecast(project_id=instance.project_id)
+    else:
+        deferred.forecast(status_id=instance.project_status_id)
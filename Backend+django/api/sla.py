@@ -0,0 +1,106 @@
+"""
+SLA scanner: escalates yellow/red responsibilities that were not updated
+within the per-status SLA (settings.ESCALATION_SLA_HOURS).
+
+Each status keeps a Watermark at the last `last_updated` it has scanned up
+to, so a run only looks at items that crossed their SLA since the previous
+run. Batches are read with a keyset range scan on (status, last_updated, id)
+and written with one UPDATE, one bulk_create of escalations and one
+bulk_create of notifications. The watermark row is locked for the duration
+of a batch, so concurrent workers skip instead of double-escalating.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ChangeLog, Escalation, Notification, ProjectStatus, Responsibility, Watermark
+
+
+def _watermark(status):
+    Watermark.objects.get_or_create(name=f'sla_scanner:{status}')
+    # skip_locked: another worker is already scanning this status
+    return Watermark.objects.select_for_update(skip_locked=True).filter(name=f'sla_scanner:{status}').first()
+
+
+def _stale_batch(status, watermark, cutoff, batch_size):
+    qs = Responsibility.objects.filter(
+        status=status,
+        last_updated__lte=cutoff,
+        project_status__in=ProjectStatus.objects.latest_per_project(),
+    )
+    if watermark.position is not None:
+        qs = qs.filter(
+            Q(last_updated__gt=watermark.position) |
+            Q(last_updated=watermark.position, id__gt=watermark.last_id)
+        )
+    return list(
+        qs.order_by('last_updated', 'id').values(
+            'id', 'title', 'last_updated', 'responsible_id', 'deputy_id', 'project_status_id',
+        )[:batch_size]
+    )
+
+
+def _escalate(rows, status, system_user, now):
+    ids = [row['id'] for row in rows]
+    label = dict(Responsibility.STATUS_CHOICES)[status]
+    already_open = set(
+        Escalation.objects.filter(responsibility_id__in=ids, resolved=False).values_list('responsibility_id', flat=True)
+    )
+    if already_open:
+        Escalation.objects.filter(responsibility_id__in=already_open, resolved=False).update(
+            occurrences=F('occurrences') + 1, last_triggered_at=now,
+        )
+    Escalation.objects.bulk_create(
+        [
+            Escalation(
+                responsibility_id=row['id'],
+                reason=f"SLA exceeded: {row['title']} has been {label} since {row['last_updated']:%Y-%m-%d}",
+                created_by=system_user,
+                last_triggered_at=now,
+            )
+            for row in rows if row['id'] not in already_open
+        ],
+        ignore_conflicts=True,  # a concurrent manual trigger already opened it
+    )
+    ChangeLog.log(Escalation, Escalation.objects.filter(
+        responsibility_id__in=ids, resolved=False
+    ).values_list('id', flat=True))
+
+    notifications = []
+    for row in rows:
+        for user_id in {row['responsible_id'], row['deputy_id']} - {None}:
+            notifications.append(Notification(
+                user_id=user_id,
+                message=f"{row['title']} is still {label} and has been escalated.",
+                notification_type='ESCALATION',
+                related_link=f"/status/{row['project_status_id']}/",
+            ))
+    Notification.objects.bulk_create(notifications)
+
+
+def scan(system_user, batch_size=500, now=None):
+    """Run one incremental pass; returns {status: escalated count}."""
+    now = now or timezone.now()
+    escalated = {}
+    for status, hours in settings.ESCALATION_SLA_HOURS.items():
+        cutoff = now - timedelta(hours=hours)
+        escalated[status] = 0
+        while True:
+            with transaction.atomic():
+                watermark = _watermark(status)
+                if watermark is None:
+                    break
+                rows = _stale_batch(status, watermark, cutoff, batch_size)
+                if not rows:
+                    break
+                _escalate(rows, status, system_user, now)
+                watermark.position = rows[-1]['last_updated']
+                watermark.last_id = rows[-1]['id']
+                watermark.save(update_fields=['position', 'last_id', 'updated_at'])
+            escalated[status] += len(rows)
+            if len(rows) < batch_size:
+                break
+    return escalated
@@ -0,0 +1,99 @@
+"""
+Frozen (baseline/final) status snapshots.
+
+A status is rendered once when it is frozen and stored gzip-compressed in
+StatusSnapshot; reads then cost one row fetch and no serialization. The
+stored bytes are sent as-is to clients accepting gzip and inflated for the
+rest. Each representation has its own strong ETag; on the status itself it
+starts with the row version ("v<n>-..."), so it can be echoed in If-Match. A
+specific version (?version=n) never changes and is cacheable for a year.
+
+A snapshot is only kept if the status and its responsibilities still have
+the versions it was rendered from: an edit committed while it was being
+rendered would otherwise have its stale flag overwritten by outdated data.
+"""
+import gzip
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from .middleware import etag_matches
+from .models import ProjectStatus, Responsibility, StatusSnapshot
+from .renderers import ORJSONRenderer
+from .serializers import ProjectStatusSerializer
+
+IMMUTABLE = 'private, max-age=31536000, immutable'
+REVALIDATE = 'private, no-cache'
+
+
+def _versions(status_id):
+    """Row versions of a status and of its responsibilities."""
+    return (
+        ProjectStatus.objects.filter(pk=status_id).values_list('version', flat=True).first(),
+        sorted(Responsibility.objects.filter(project_status_id=status_id).values_list('id', 'version')),
+    )
+
+
+def store(status_id, data):
+    """
+    Store serialized status data as the next snapshot version; None when a
+    concurrent request stored it first or the data is already outdated.
+    """
+    raw = ORJSONRenderer().render(data)
+    latest = StatusSnapshot.objects.filter(status_id=status_id).values_list('version', flat=True).first() or 0
+    try:
+        with transaction.atomic():
+            snapshot = StatusSnapshot.objects.create(
+                status_id=status_id,
+                version=latest + 1,
+                etag=hashlib.sha256(raw).hexdigest()[:32],
+                content=gzip.compress(raw, compresslevel=9, mtime=0),
+            )
+    except IntegrityError:
+        # a concurrent request rendered the same state first
+        return None
+    # Checked once the snapshot is visible: an edit committed before this point
+    # is caught here, a later one flags the snapshot stale after its commit.
+    rendered = (data['version'], sorted((row['id'], row['version']) for row in data['responsibilities']))
+    if _versions(status_id) != rendered:
+        StatusSnapshot.objects.filter(pk=snapshot.pk).update(stale=True)
+        return None
+    return snapshot
+
+
+def render(status_id):
+    status = ProjectStatus.objects.select_related('created_by').prefetch_related(
+        'responsibilities__responsible', 'responsibilities__deputy'
+    ).filter(pk=status_id).first()
+    if status is not None and status.is_frozen:
+        store(status.pk, ProjectStatusSerializer(status).data)
+
+
+def mark_stale(*status_ids):
+    StatusSnapshot.objects.filter(status_id__in=status_ids, stale=False).update(stale=True)
+
+
+def current(status_id):
+    return StatusSnapshot.objects.filter(status_id=status_id, stale=False).first()
+
+
+def response(request, snapshot, cache_control=REVALIDATE, row_version=None):
+    """`row_version`: the status version, leading the ETag so If-Match accepts it."""
+    gzip_ok = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    tag = snapshot.etag if row_version is None else f'v{row_version}-{snapshot.etag}'
+    etag = f'"{tag}-gzip"' if gzip_ok else f'"{tag}"'
+
+    if etag_matches(request, etag):
+        result = HttpResponseNotModified()
+    elif gzip_ok:
+        result = HttpResponse(snapshot.content, content_type='application/json')
+        result['Content-Encoding'] = 'gzip'
+    else:
+        result = HttpResponse(gzip.decompress(snapshot.content), content_type='application/json')
+    result['ETag'] = etag
+    result['Cache-Control'] = cache_control
+    result['X-Snapshot-Version'] = str(snapshot.version)
+    patch_vary_headers(result, ('Accept-Encoding',))
+    return result
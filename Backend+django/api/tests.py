@@ -0,0 +1,953 @@
+import gzip
+import io
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import date, timedelta
+from importlib.util import find_spec
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.exceptions import NotFound
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from . import changes, forecasting, fragments, retention, schema, sla, snapshots
+from .middleware import CompressionMiddleware
+from .importer import Importer, read_rows
+from .models import (
+    ArchivedStatus, AuditEvent, ChangeLog, CustomUser, Escalation, IdempotencyKey, Project, ProjectForecast, ProjectStatus,
+    Responsibility, SearchEntry, StatusSnapshot,
+)
+from .serializers import ProjectStatusSerializer
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pm = CustomUser.objects.create_user('pm', 'pm@example.com', 'pw', role='PM')
+        cls.project = Project.objects.create(
+            code='100000000-01S', name='Project', manager=cls.pm,
+            start_date=date(2025, 1, 1), end_date=date(2026, 1, 1), current_phase='DEV',
+        )
+        cls.status = ProjectStatus.objects.create(
+            project=cls.project, status_date=date(2025, 3, 1), phase='DEV', created_by=cls.pm,
+        )
+        cls.responsibilities = [
+            Responsibility.objects.create(project_status=cls.status, title=f'Task {i}', status='G')
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        # reports, throttles and code sets are cached across requests
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.pm)
+
+    @contextmanager
+    def committed(self):
+        """
+        Run the on_commit callbacks of the block as if its transaction committed.
+        The audit and deferred buffers join the callback already queued on the
+        connection, so the ones left by earlier blocks are dropped first.
+        """
+        connection.run_on_commit.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            yield
+
+
+class VersionConflictTests(ApiTestCase):
+    def test_stale_if_match_is_rejected(self):
+        responsibility = self.responsibilities[0]
+        url = f'/api/responsibilities/{responsibility.pk}/'
+
+        response = self.client.get(url)
+        self.assertEqual(response['ETag'], '"v1"')
+        with self.committed():
+            response = self.client.patch(url, {'comments': 'first'}, format='json', HTTP_IF_MATCH='"v1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"v2"')
+
+        response = self.client.patch(url, {'comments': 'second'}, format='json', HTTP_IF_MATCH='"v1"')
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.data['current_version'], 2)
+        self.assertEqual(response['ETag'], '"v2"')
+        responsibility.refresh_from_db()
+        self.assertEqual(responsibility.comments, 'first')
+
+    def test_bulk_reports_conflicting_rows(self):
+        first, second = self.responsibilities
+        Responsibility.objects.filter(pk=second.pk).update(version=3)
+
+        with self.committed():
+            response = self.client.patch('/api/responsibilities/bulk/', [
+                {'id': first.pk, 'version': 1, 'comments': 'saved'},
+                {'id': second.pk, 'version': 1, 'comments': 'lost'},
+            ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['updated']], [first.pk])
+        self.assertEqual(response.data['conflicts'], [{'id': second.pk, 'current_version': 3}])
+        second.refresh_from_db()
+        self.assertEqual((second.comments, second.version), ('', 3))
+
+    def test_saving_a_deleted_row_does_not_insert_it(self):
+        responsibility = Responsibility.objects.get(pk=self.responsibilities[0].pk)
+        Responsibility.objects.filter(pk=responsibility.pk).delete()
+        responsibility.comments = 'gone'
+        with self.assertRaises(NotFound):
+            responsibility.save()
+        self.assertFalse(Responsibility.objects.filter(pk=responsibility.pk).exists())
+
+
+class IdempotencyTests(ApiTestCase):
+    def post_status(self, key, status_date='2025-04-01'):
+        with self.committed():
+            return self.client.post('/api/status/', {
+                'project': self.project.pk, 'status_date': status_date, 'phase': 'TEST',
+            }, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_duplicate_key_replays_the_first_response(self):
+        first = self.post_status('key-1')
+        self.assertEqual(first.status_code, 201)
+
+        replay = self.post_status('key-1')
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.content, first.content)
+        self.assertEqual(ProjectStatus.objects.filter(project=self.project).count(), 2)
+
+    def test_key_reused_for_another_body(self):
+        self.assertEqual(self.post_status('key-2').status_code, 201)
+        self.assertEqual(self.post_status('key-2', status_date='2025-05-01').status_code, 422)
+
+    def abandon(self, key, seconds_ago):
+        # as left by a worker killed before the response was stored
+        ProjectStatus.objects.filter(project=self.project, status_date=date(2025, 4, 1)).delete()
+        IdempotencyKey.objects.filter(key=key).update(
+            status_code=None, body=b'', created_at=timezone.now() - timedelta(seconds=seconds_ago),
+        )
+
+    @override_settings(IDEMPOTENCY={'TTL_HOURS': 24, 'WAIT_SECONDS': 0, 'LEASE_SECONDS': 60})
+    def test_request_in_progress_within_its_lease(self):
+        self.post_status('key-3')
+        self.abandon('key-3', seconds_ago=5)
+        self.assertEqual(self.post_status('key-3').status_code, 409)
+
+    @override_settings(IDEMPOTENCY={'TTL_HOURS': 24, 'WAIT_SECONDS': 0, 'LEASE_SECONDS': 60})
+    def test_abandoned_request_is_taken_over(self):
+        self.post_status('key-4')
+        self.abandon('key-4', seconds_ago=120)
+
+        response = self.post_status('key-4')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(IdempotencyKey.objects.get(key='key-4').status_code, 201)
+
+
+class EscalationTriggerTests(TransactionTestCase):
+    THREADS = 4
+
+    def setUp(self):
+        pm = CustomUser.objects.create_user('pm', 'pm@example.com', 'pw', role='PM')
+        project = Project.objects.create(
+            code='100000000-01S', name='Project', manager=pm,
+            start_date=date(2025, 1, 1), end_date=date(2026, 1, 1), current_phase='DEV',
+        )
+        status = ProjectStatus.objects.create(
+            project=project, status_date=date(2025, 3, 1), phase='DEV', created_by=pm,
+        )
+        self.pm = pm
+        self.responsibility = Responsibility.objects.create(project_status=status, title='Task', status='R')
+
+    # SQLite test databases reject concurrent writers outright
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_concurrent_triggers_open_one_escalation(self):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def trigger():
+            try:
+                barrier.wait()
+                Escalation.objects.trigger(self.responsibility, reason='Red', created_by=self.pm)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=trigger) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        escalation = Escalation.objects.get(responsibility=self.responsibility, resolved=False)
+        self.assertEqual(escalation.occurrences, self.THREADS)
+
+
+class EscalationDeduplicationTests(ApiTestCase):
+    def escalate(self):
+        return self.client.post(
+            '/api/escalations/', {'responsibility': self.responsibilities[0].pk, 'reason': 'Red', 'created_by': self.pm.pk},
+            format='json',
+        )
+
+    def test_open_escalation_counts_repeated_triggers(self):
+        first = self.escalate()
+        second = self.escalate()
+
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Escalation.objects.get().occurrences, 2)
+
+    def test_resolved_escalation_is_not_reopened_over_an_open_one(self):
+        first = self.escalate().data['id']
+        self.client.post(f'/api/escalations/{first}/resolve_escalation/')
+        self.assertEqual(self.escalate().status_code, 201)
+
+        response = self.client.patch(f'/api/escalations/{first}/', {'resolved': False}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Escalation.objects.filter(resolved=False).count(), 1)
+
+
+class ImporterTests(ApiTestCase):
+    HEADER = 'project_code,status_date,title,responsible,status,progress\n'
+
+    def run_import(self, kind, text, **kwargs):
+        importer = Importer(kind, user=self.pm, batch_size=2, dry_run=kwargs.pop('dry_run', False))
+        with self.committed():
+            return importer.run(read_rows(io.BytesIO(text.encode()), f'{kind}.csv'), **kwargs)
+
+    def responsibility_rows(self, *rows):
+        return self.HEADER + ''.join(
+            f'100000000-01S,2025-03-01,{title},pm,{rag},{progress}\n' for title, rag, progress in rows
+        )
+
+    def test_dry_run_writes_nothing(self):
+        result = self.run_import('responsibilities', self.responsibility_rows(('New', 'G', '10')), dry_run=True)
+        self.assertEqual((result['created'], result['error_count']), (1, 0))
+        self.assertFalse(Responsibility.objects.filter(title='New').exists())
+
+    def test_row_errors_are_reported_and_valid_rows_kept(self):
+        result = self.run_import('responsibilities', self.responsibility_rows(
+            ('First', 'G', '10'), ('Bad', 'X', '10'), ('Third', 'R', '150'), ('Fourth', 'Y', '20'),
+        ))
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([error['row'] for error in result['errors']], [3, 4])
+        self.assertEqual(set(result['errors'][0]['errors']), {'status'})
+        self.assertEqual(set(result['errors'][1]['errors']), {'progress'})
+        self.assertEqual(Responsibility.objects.filter(title__in=['First', 'Fourth']).count(), 2)
+
+    def test_all_or_nothing_rolls_back_on_any_error(self):
+        result = self.run_import(
+            'responsibilities', self.responsibility_rows(('Good', 'G', '10'), ('Bad', 'X', '10')),
+            all_or_nothing=True,
+        )
+        self.assertEqual((result['created'], result['error_count']), (0, 1))
+        self.assertFalse(Responsibility.objects.filter(title='Good').exists())
+
+    def test_imported_rows_get_the_signal_bookkeeping(self):
+        ProjectStatus.objects.filter(pk=self.status.pk).update(is_baseline=True)
+        snapshots.render(self.status.pk)
+        self.run_import('responsibilities', self.responsibility_rows(('Imported', 'R', '50.0')))
+
+        imported = Responsibility.objects.get(title='Imported')
+        self.assertEqual(imported.progress, 50)
+        self.assertTrue(SearchEntry.objects.filter(kind='responsibility', object_id=imported.pk).exists())
+        self.assertTrue(ChangeLog.objects.filter(entity='responsibility', object_id=imported.pk).exists())
+        self.assertTrue(AuditEvent.objects.filter(entity='responsibility', object_id=imported.pk, action='created').exists())
+        self.assertTrue(StatusSnapshot.objects.get(status=self.status).stale)
+        self.assertTrue(ProjectForecast.objects.filter(project=self.project).exists())
+
+    @skipUnless(find_spec('openpyxl'), 'openpyxl is not installed')
+    def test_xlsx_rows(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['project_code', 'status_date', 'title', 'responsible', 'progress'])
+        sheet.append(['100000000-01S', date(2025, 3, 1), 'From XLSX', 'pm', 75])
+        file = io.BytesIO()
+        workbook.save(file)
+        file.seek(0)
+
+        with self.committed():
+            result = Importer('responsibilities', user=self.pm).run(read_rows(file, 'rows.xlsx'))
+        self.assertEqual((result['created'], result['error_count']), (1, 0))
+        self.assertEqual(Responsibility.objects.get(title='From XLSX').progress, 75)
+
+
+class HeatmapTests(ApiTestCase):
+    URL = '/api/reports/heatmap/'
+
+    def test_etag_follows_committed_changes(self):
+        etag = self.client.get(self.URL)['ETag']
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # logged by a transaction that has not committed yet: no seq
+        ChangeLog.objects.create(entity='responsibility', object_id=self.responsibilities[0].pk)
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        ChangeLog.sequence_pending()
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_forwarded_for_header_does_not_reset_the_limit(self):
+        limit = int(api_settings.DEFAULT_THROTTLE_RATES['auth'].split('/')[0])
+        statuses = [
+            self.client.post(
+                '/api/token/', {'username': 'nobody', 'password': 'wrong'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{attempt}',
+            ).status_code
+            for attempt in range(limit + 1)
+        ]
+        self.assertNotIn(429, statuses[:limit])
+        self.assertEqual(statuses[limit], 429)
+
+
+class SnapshotTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        ProjectStatus.objects.filter(pk=self.status.pk).update(is_baseline=True)
+        self.url = f'/api/status/{self.status.pk}/'
+
+    def test_frozen_status_is_served_from_its_snapshot(self):
+        first = self.client.get(self.url)
+        self.assertFalse(first.has_header('X-Snapshot-Version'))
+        second = self.client.get(self.url)
+        self.assertEqual(second['X-Snapshot-Version'], '1')
+        self.assertEqual(json.loads(second.content), first.data)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=second['ETag']).status_code, 304)
+
+    def test_snapshot_etag_is_accepted_by_if_match(self):
+        self.client.get(self.url)
+        etag = self.client.get(self.url)['ETag']
+        self.assertTrue(etag.startswith('"v1-'))
+        with self.committed():
+            response = self.client.patch(self.url, {'notes': 'edited'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url).data['notes'], 'edited')
+
+    def test_snapshot_reads_check_object_permissions(self):
+        self.client.get(self.url)
+        with mock.patch.object(permissions.IsAuthenticated, 'has_object_permission', return_value=False):
+            self.assertEqual(self.client.get(self.url).status_code, 403)
+            self.assertEqual(self.client.get(f'{self.url}snapshot/').status_code, 403)
+
+    def test_outdated_render_is_not_kept(self):
+        status = ProjectStatus.objects.get(pk=self.status.pk)
+        data = ProjectStatusSerializer(status).data
+        # committed by another request while `data` was being rendered
+        Responsibility.objects.filter(pk=self.responsibilities[0].pk).update(version=2)
+
+        self.assertIsNone(snapshots.store(status.pk, data))
+        self.assertIsNone(snapshots.current(status.pk))
+
+
+class AuditTrailTests(ApiTestCase):
+    def test_request_changes_are_recorded_with_the_actor(self):
+        task = self.responsibilities[0]
+        with self.committed():
+            response = self.client.patch(
+                f'/api/responsibilities/{task.pk}/', {'status': 'Y', 'progress': 40}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+        history = self.client.get(f'/api/responsibilities/{task.pk}/history/').data
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0]['action'], 'updated')
+        self.assertEqual(history[0]['actor_username'], 'pm')
+        self.assertEqual(history[0]['changes']['status'], ['G', 'Y'])
+
+    def test_rolled_back_changes_leave_no_events(self):
+        kept, dropped = self.responsibilities
+        with self.committed():
+            kept.status = 'Y'
+            kept.save()
+            try:
+                with transaction.atomic():
+                    dropped.status = 'R'
+                    dropped.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        events = AuditEvent.objects.filter(entity='responsibility').values_list('object_id', flat=True)
+        self.assertEqual(list(events), [kept.pk])
+
+
+class DeferredTests(ApiTestCase):
+    def test_work_queued_in_a_rolled_back_savepoint_is_dropped(self):
+        with self.committed():
+            # the transaction already has work queued when the savepoint starts
+            Responsibility.objects.create(project_status=self.status, title='Before')
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Responsibility.objects.create(project_status=self.status, title='Rolled back')
+                raise RuntimeError
+
+        titles = SearchEntry.objects.filter(kind='responsibility').values_list('title', flat=True)
+        self.assertEqual(list(titles), ['Before'])
+
+
+class WorkloadReportTests(ApiTestCase):
+    def test_counts_latest_status_assignments_per_role(self):
+        alice = CustomUser.objects.create_user('alice', 'alice@example.com', 'pw', role='RESP', department='ENG')
+        first, second = self.responsibilities
+        Responsibility.objects.filter(pk=first.pk).update(responsible=alice, status='R')
+        Responsibility.objects.filter(pk=second.pk).update(deputy=alice, status='Y')
+        Escalation.objects.create(responsibility=first, reason='Red', created_by=self.pm)
+        older = ProjectStatus.objects.create(
+            project=self.project, status_date=date(2025, 2, 1), phase='DEV', created_by=self.pm,
+        )
+        Responsibility.objects.create(project_status=older, title='Old', responsible=alice, status='R')
+
+        rows = self.client.get('/api/reports/workload/').data
+        row = next(row for row in rows if row['username'] == 'alice')
+        self.assertEqual(row['responsible'], {'G': 0, 'Y': 0, 'R': 1})
+        self.assertEqual(row['deputy'], {'G': 0, 'Y': 1, 'R': 0})
+        self.assertEqual((row['open_escalations'], row['total_responsibilities']), (1, 2))
+
+        rows = self.client.get('/api/reports/workload/', {'department': 'OPS'}).data
+        self.assertEqual(rows, [])
+
+
+class EscalationAnalyticsTests(ApiTestCase):
+    def test_groups_with_resolve_time_percentiles(self):
+        created = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        for minutes in (10, 20, 60):
+            escalation = Escalation.objects.create(
+                responsibility=self.responsibilities[0], reason='Late', created_by=self.pm, resolved=True,
+            )
+            Escalation.objects.filter(pk=escalation.pk).update(
+                created_at=created, resolved_at=created + timedelta(minutes=minutes),
+            )
+        Escalation.objects.create(responsibility=self.responsibilities[1], reason='Open', created_by=self.pm)
+
+        results = self.client.get('/api/reports/escalation_analytics/').data['results']
+        by_state = {row['resolved']: row for row in results}
+        self.assertEqual(set(by_state), {True, False})
+        resolved, unresolved = by_state[True], by_state[False]
+        self.assertEqual(resolved['count'], 3)
+        self.assertAlmostEqual(resolved['mean_resolve_seconds'], 1800)
+        self.assertAlmostEqual(resolved['median_resolve_seconds'], 1200)
+        self.assertAlmostEqual(resolved['p90_resolve_seconds'], 3120)
+        self.assertEqual(unresolved['count'], 1)
+        self.assertIsNone(unresolved['median_resolve_seconds'])
+
+    def test_results_are_cached_per_parameters(self):
+        self.client.get('/api/reports/escalation_analytics/')
+        Escalation.objects.create(responsibility=self.responsibilities[0], reason='New', created_by=self.pm)
+
+        self.assertEqual(self.client.get('/api/reports/escalation_analytics/').data['results'], [])
+        self.assertEqual(len(self.client.get('/api/reports/escalation_analytics/', {'period': 'month'}).data['results']), 1)
+
+    def test_rejects_unknown_period(self):
+        response = self.client.get('/api/reports/escalation_analytics/', {'period': 'year'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchTests(ApiTestCase):
+    def search(self, query, **params):
+        response = self.client.get('/api/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(row['type'], row['id']) for row in response.data['results']]
+
+    def test_index_follows_saves_and_deletes(self):
+        task = self.responsibilities[0]
+        with self.committed():
+            task.title = 'Database migration'
+            task.save()
+
+        self.assertEqual(self.search('datab migr'), [('responsibility', task.pk)])
+        self.assertEqual(self.search('datab', type='project'), [])
+
+        with self.committed():
+            task.delete()
+        self.assertEqual(self.search('database'), [])
+
+    def test_results_are_limited_to_visible_projects(self):
+        alice = CustomUser.objects.create_user('alice', 'alice@example.com', 'pw', role='RESP')
+        task = self.responsibilities[0]
+        with self.committed():
+            task.title = 'Database migration'
+            task.save()
+        self.client.force_authenticate(alice)
+        self.assertEqual(self.search('database'), [])
+
+        Responsibility.objects.filter(pk=task.pk).update(responsible=alice)
+        self.assertEqual(self.search('database'), [('responsibility', task.pk)])
+
+    def test_rejects_short_queries(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': 'a'}).status_code, 400)
+
+
+class FieldSelectionTests(ApiTestCase):
+    def get(self, **params):
+        response = self.client.get(f'/api/status/{self.status.pk}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_fields_selects_nested_paths(self):
+        data = self.get(fields='id,responsibilities.title')
+        self.assertEqual(set(data), {'id', 'responsibilities'})
+        self.assertEqual([set(item) for item in data['responsibilities']], [{'title'}, {'title'}])
+
+    def test_expand_limits_nested_fields(self):
+        data = self.get(expand='responsibilities')
+        self.assertNotIn('created_by_details', data)
+        self.assertEqual(len(data['responsibilities']), 2)
+        self.assertNotIn('responsible_details', data['responsibilities'][0])
+
+        self.assertIn('created_by_details', self.get())
+
+    def test_include_users_side_loads_referenced_users(self):
+        data = self.get(include='users')
+        self.assertNotIn('created_by_details', data)
+        self.assertEqual(list(data['included']['users']), [self.pm.pk])
+        self.assertEqual(data['included']['users'][self.pm.pk]['username'], 'pm')
+
+
+class RendererTests(ApiTestCase):
+    def test_columnar_format_sends_one_array_per_field(self):
+        response = self.client.get('/api/responsibilities/', {'format': 'columnar', 'fields': 'id,title'})
+        self.assertEqual(response['Content-Type'].split(';')[0], 'application/vnd.columnar+json')
+        self.assertEqual(json.loads(response.content), {
+            'count': 2,
+            'columns': {
+                'id': [item.pk for item in self.responsibilities],
+                'title': ['Task 0', 'Task 1'],
+            },
+        })
+
+    @skipUnless(find_spec('msgpack'), 'msgpack is not installed')
+    def test_msgpack_is_negotiated_from_accept(self):
+        import msgpack
+
+        response = self.client.get(f'/api/projects/{self.project.pk}/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['code'], self.project.code)
+
+
+class CompressionTests(TestCase):
+    body = json.dumps([{'title': f'Task {i}', 'status': 'G'} for i in range(100)])
+
+    def compress(self, path='/api/projects/', content_type='application/json', csrf_cookie=False):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING='gzip')
+        response = HttpResponse(self.body, content_type=content_type)
+        if csrf_cookie:
+            response.set_cookie(settings.CSRF_COOKIE_NAME, 'secret')
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzips_api_json(self):
+        response = self.compress()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content).decode(), self.body)
+
+    def test_leaves_other_responses_alone(self):
+        for response in (
+            self.compress(path='/admin/'),
+            self.compress(content_type='text/html'),
+            self.compress(csrf_cookie=True),
+        ):
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response.content.decode(), self.body)
+
+
+@override_settings(ESCALATION_SLA_HOURS={'R': 24, 'Y': 48})
+class SlaScanTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+
+    def age(self, responsibility, status, hours):
+        Responsibility.objects.filter(pk=responsibility.pk).update(
+            status=status, last_updated=self.now - timedelta(hours=hours),
+        )
+
+    def test_escalates_each_stale_item_once(self):
+        first, second = self.responsibilities
+        self.age(first, 'R', 30)
+        self.age(second, 'Y', 30)
+
+        self.assertEqual(sla.scan(self.pm, batch_size=1, now=self.now), {'R': 1, 'Y': 0})
+        self.assertEqual(sla.scan(self.pm, now=self.now), {'R': 0, 'Y': 0})
+        self.assertEqual(list(Escalation.objects.values_list('responsibility', 'occurrences')), [(first.pk, 1)])
+
+        later = self.now + timedelta(hours=20)
+        self.assertEqual(sla.scan(self.pm, now=later), {'R': 0, 'Y': 1})
+
+    def test_watermark_picks_up_items_crossing_the_sla_later(self):
+        first, second = self.responsibilities
+        self.age(first, 'R', 30)
+        self.age(second, 'R', 10)
+        self.assertEqual(sla.scan(self.pm, now=self.now), {'R': 1, 'Y': 0})
+
+        self.assertEqual(sla.scan(self.pm, now=self.now + timedelta(hours=15)), {'R': 1, 'Y': 0})
+        self.assertEqual(
+            set(Escalation.objects.values_list('responsibility', flat=True)), {first.pk, second.pk},
+        )
+
+
+class RetentionTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        Project.objects.filter(pk=self.project.pk).update(current_phase='COMP')
+        self.latest = ProjectStatus.objects.create(
+            project=self.project, status_date=timezone.now().date(), phase='COMP', created_by=self.pm,
+        )
+        Escalation.objects.create(responsibility=self.responsibilities[0], reason='Late', created_by=self.pm)
+
+    def test_archives_old_statuses_except_the_latest(self):
+        self.assertEqual(retention.archive_statuses(months=12, batch_size=1), 1)
+
+        self.assertEqual(list(ProjectStatus.objects.values_list('id', flat=True)), [self.latest.pk])
+        data = ArchivedStatus.objects.get(original_id=self.status.pk).data
+        self.assertTrue(data['archived'])
+        self.assertEqual([len(item['escalations']) for item in data['responsibilities']], [1, 0])
+
+    def test_archived_statuses_are_still_served(self):
+        retention.archive_statuses(months=12, batch_size=500)
+
+        rows = self.client.get('/api/status/', {'project_id': self.project.pk}).data
+        self.assertEqual([row['id'] for row in rows], [self.latest.pk, self.status.pk])
+        rows = self.client.get('/api/status/', {'project_id': self.project.pk, 'include_archived': 'false'}).data
+        self.assertEqual([row['id'] for row in rows], [self.latest.pk])
+
+        response = self.client.get(f'/api/status/{self.status.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['archived'])
+        self.assertEqual(self.client.get(f'/api/status/{self.status.pk + 100}/').status_code, 404)
+
+
+class ProjectCodeTests(ApiTestCase):
+    def create_project(self, code):
+        with self.committed():
+            Project.objects.create(
+                code=code, name=code, manager=self.pm,
+                start_date=date(2025, 1, 1), end_date=date(2026, 1, 1), current_phase='DEV',
+            )
+
+    def test_check_code_sees_projects_once_committed(self):
+        response = self.client.get('/api/projects/check-code/', {'code': self.project.code})
+        self.assertEqual(response.data, {'exists': True})
+
+        self.create_project('1000000005-01S')
+        response = self.client.post('/api/projects/check-code/', {'codes': ['1000000005-01S', 'bad']}, format='json')
+        self.assertEqual(response.data['results'], {
+            '1000000005-01S': {'valid': True, 'exists': True},
+            'bad': {'valid': False, 'exists': False},
+        })
+
+    def test_next_code_skips_taken_numbers(self):
+        self.create_project('1000000002-01S')
+        self.assertEqual(self.client.post('/api/projects/next-code/').data['code'], '1000000003-01S')
+        self.assertEqual(self.client.post('/api/projects/next-code/').data['code'], '1000000004-01S')
+
+
+class BatchTests(ApiTestCase):
+    def batch(self, *requests):
+        return self.client.post('/api/batch/', {'requests': list(requests)}, format='json')
+
+    def test_runs_requests_in_order(self):
+        response = self.batch(
+            f'/api/projects/{self.project.pk}/',
+            {'path': '/api/status/', 'params': {'project_id': self.project.pk}},
+            'projects/999999/',
+        )
+        self.assertEqual(response.status_code, 200)
+        first, second, third = response.data['responses']
+        self.assertEqual((first['status'], first['body']['code']), (200, self.project.code))
+        self.assertEqual(second['path'], f'/api/status/?project_id={self.project.pk}')
+        self.assertEqual([row['id'] for row in second['body']], [self.status.pk])
+        self.assertEqual((third['path'], third['status']), ('/api/projects/999999/', 404))
+
+    def test_failing_request_does_not_fail_the_batch(self):
+        with mock.patch('api.timeline.timelines', side_effect=RuntimeError), self.assertLogs('api.batch', 'ERROR'):
+            response = self.batch(f'/api/projects/{self.project.pk}/timeline/', f'/api/projects/{self.project.pk}/')
+        self.assertEqual([item['status'] for item in response.data['responses']], [500, 200])
+
+    def test_rejects_non_api_and_nested_batch_paths(self):
+        self.assertEqual(self.batch('/admin/').status_code, 400)
+        self.assertEqual(self.batch('/api/batch/').status_code, 400)
+        self.assertEqual(self.batch(*['/api/projects/'] * 26).status_code, 400)
+
+
+class ChangesFeedTests(ApiTestCase):
+    def feed(self, since, **params):
+        response = self.client.get('/api/changes/', {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_returns_latest_change_per_object_and_tombstones(self):
+        cursor = self.client.get('/api/changes/').data['cursor']
+        first, second = self.responsibilities
+        deleted_id = second.pk
+        with self.committed():
+            first.title = 'Renamed'
+            first.save()
+        with self.committed():
+            first.status = 'R'
+            first.save()
+        with self.committed():
+            second.delete()
+
+        data = self.feed(cursor)
+        items = {(item['entity'], item['id']): item for item in data['changes']}
+        self.assertEqual(items['responsibility', first.pk]['action'], 'upsert')
+        self.assertEqual(items['responsibility', first.pk]['data']['status'], 'R')
+        self.assertEqual(items['responsibility', deleted_id]['action'], 'delete')
+        self.assertEqual(data['cursor'], changes.current_cursor())
+        self.assertEqual(self.feed(data['cursor'])['changes'], [])
+
+    def test_pages_follow_commit_order(self):
+        cursor = changes.current_cursor()
+        for item in self.responsibilities:
+            with self.committed():
+                item.save()
+
+        page = self.feed(cursor, limit=1)
+        self.assertTrue(page['has_more'])
+        rest = self.feed(page['cursor'])
+        self.assertFalse(rest['has_more'])
+        self.assertEqual(
+            [item['id'] for item in page['changes'] + rest['changes'] if item['entity'] == 'responsibility'],
+            [item.pk for item in self.responsibilities],
+        )
+
+    def test_uncommitted_changes_are_not_served(self):
+        cursor = changes.current_cursor()
+        self.responsibilities[0].save()
+        self.assertEqual(self.feed(cursor)['changes'], [])
+
+    def test_cursor_behind_the_purged_log_is_gone(self):
+        with self.committed():
+            self.responsibilities[0].save()
+        changes.purge(days=-1, batch_size=100)
+        self.assertEqual(self.client.get('/api/changes/', {'since': 0}).status_code, 410)
+
+
+class FragmentCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = CustomUser.objects.create_user('alice', 'alice@example.com', 'pw', role='RESP', first_name='Alice')
+        for item in self.responsibilities:
+            item.responsible = self.alice
+            item.save()
+
+    def get_list(self):
+        return self.client.get('/api/responsibilities/').data
+
+    def test_repeated_reads_hit_the_cache(self):
+        self.get_list()
+        before = fragments.stats()
+        self.get_list()
+        after = fragments.stats()
+        self.assertEqual(after['misses'], before['misses'])
+        self.assertGreater(after['local_hits'], before['local_hits'])
+
+    def test_nested_edits_change_the_key(self):
+        self.get_list()
+        self.alice.first_name = 'Alicia'
+        self.alice.save()
+
+        names = {item['responsible_details']['first_name'] for item in self.get_list()}
+        self.assertEqual(names, {'Alicia'})
+
+    def test_saves_evict_local_entries(self):
+        self.get_list()
+        self.assertIn(('api.customuser', str(self.alice.pk)), fragments._keys_by_object)
+        self.alice.save()
+        self.assertNotIn(('api.customuser', str(self.alice.pk)), fragments._keys_by_object)
+
+
+class AdminActionTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        self.alice = CustomUser.objects.create_user('alice', 'alice@example.com', 'pw', role='RESP')
+
+    def run_action(self, model, action, ids, **data):
+        with self.committed():
+            response = self.client.post(
+                f'/admin/api/{model}/', {'action': action, '_selected_action': ids, **data},
+            )
+        self.assertEqual(response.status_code, 302)
+
+    def test_reassign_bumps_versions_and_records_history(self):
+        ids = [item.pk for item in self.responsibilities]
+        last_change = ChangeLog.objects.order_by('-id').values_list('id', flat=True).first()
+        self.run_action('responsibility', 'reassign_responsible', ids, username='alice')
+
+        rows = Responsibility.objects.filter(pk__in=ids)
+        self.assertEqual({(row.responsible_id, row.version) for row in rows}, {(self.alice.pk, 2)})
+        events = AuditEvent.objects.filter(entity='responsibility', object_id__in=ids, action='updated')
+        self.assertEqual([event.changes for event in events], [{'responsible': [None, self.alice.pk]}] * 2)
+        self.assertEqual(ChangeLog.objects.filter(entity='responsibility', id__gt=last_change).count(), 2)
+
+    def test_reassign_to_unknown_user_changes_nothing(self):
+        self.run_action('responsibility', 'reassign_responsible', [self.responsibilities[0].pk], username='nobody')
+        self.assertIsNone(Responsibility.objects.get(pk=self.responsibilities[0].pk).responsible_id)
+
+    def test_resolve_selected(self):
+        escalation = Escalation.objects.create(responsibility=self.responsibilities[0], reason='Red', created_by=self.pm)
+        self.run_action('escalation', 'resolve_selected', [escalation.pk])
+
+        escalation.refresh_from_db()
+        self.assertTrue(escalation.resolved)
+        self.assertEqual(escalation.resolved_by, self.admin)
+
+
+class UserDirectoryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = CustomUser.objects.create_user(
+            'alice', 'alice@example.com', 'pw', role='RESP', department='ENG', first_name='Alice', last_name='Smith',
+        )
+        CustomUser.objects.create_user('albert', 'albert@example.com', 'pw', role='DEP', is_active=False)
+        CustomUser.objects.create_user('bob', 'bob@example.com', 'pw', role='DEP', last_name='Allen')
+
+    def test_lookup_matches_prefixes_of_active_users(self):
+        results = self.client.get('/api/users/lookup/', {'q': 'al'}).data['results']
+        self.assertEqual([row['username'] for row in results], ['alice', 'bob'])
+        self.assertEqual(results[0]['label'], 'Alice Smith')
+
+        results = self.client.get('/api/users/lookup/', {'q': 'al', 'role': 'RESP'}).data['results']
+        self.assertEqual([row['id'] for row in results], [self.alice.pk])
+
+    def test_directory_is_revalidated_by_etag(self):
+        response = self.client.get('/api/users/directory/')
+        self.assertEqual(len(response.data['users']), 4)
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/users/directory/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.alice.first_name = 'Alicia'
+        self.alice.save()
+        response = self.client.get('/api/users/directory/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Alicia Smith', [user['full_name'] for user in response.data['users']])
+
+
+class SchemaTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'openapi.json'
+        schema._schema = None
+        self.addCleanup(setattr, schema, '_schema', None)
+
+    def test_generate_schema_writes_the_spec(self):
+        call_command('generate_schema', output=str(self.path), stdout=io.StringIO())
+        self.assertIn('/projects/', json.loads(self.path.read_bytes())['paths'])
+
+    def test_serves_the_precomputed_file(self):
+        self.path.write_bytes(b'{"swagger": "2.0", "paths": {}}')
+        with override_settings(OPENAPI_SCHEMA_PATH=str(self.path)):
+            response = self.client.get('/swagger/', {'format': 'openapi'})
+            self.assertEqual(response.content, self.path.read_bytes())
+            response = self.client.get('/swagger/', {'format': 'openapi'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class AsyncReportTests(TransactionTestCase):
+    """The report queries run on pool threads, which only see committed rows."""
+
+    def setUp(self):
+        cache.clear()
+        self.pm = CustomUser.objects.create_user('pm', 'pm@example.com', 'pw', role='PM')
+        Project.objects.create(
+            code='100000000-01S', name='Project', manager=self.pm,
+            start_date=date(2025, 1, 1), end_date=date(2026, 1, 1), current_phase='PROD',
+        )
+        token = APIClient().post('/api/token/', {'username': 'pm', 'password': 'pw'}).data['access']
+        self.headers = {'Authorization': f'Bearer {token}'}
+        client = APIClient()
+        client.force_authenticate(self.pm)
+        self.sync_summary = json.loads(client.get('/api/reports/project_summary/').content)
+
+    async def test_matches_the_sync_report(self):
+        response = await self.async_client.get('/api/async/reports/project_summary/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), self.sync_summary)
+
+    async def test_requires_a_token_and_get(self):
+        response = await self.async_client.get('/api/async/reports/dashboard/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.post('/api/async/reports/dashboard/', headers=self.headers)
+        self.assertEqual(response.status_code, 405)
+
+
+class TimelineTests(ApiTestCase):
+    def add_status(self, day, phase, **flags):
+        return ProjectStatus.objects.create(
+            project=self.project, status_date=day, phase=phase, created_by=self.pm, **flags,
+        )
+
+    def test_collapses_statuses_into_phase_runs(self):
+        self.add_status(date(2025, 3, 8), 'DEV', is_baseline=True)
+        self.add_status(date(2025, 3, 15), 'DEV')
+        self.add_status(date(2025, 4, 1), 'TEST', is_final=True)
+
+        data = self.client.get(f'/api/projects/{self.project.pk}/timeline/').data
+        self.assertEqual(data['origin'], '2025-03-01')
+        self.assertEqual(data['runs'], [[0, 14, 1, 3], [31, 31, 2, 1]])
+        self.assertEqual((data['baseline'], data['final']), ([7], [31]))
+        self.assertEqual(data['phases'], ['PLAN', 'DEV', 'TEST', 'PROD', 'COMP'])
+
+    def test_portfolio_leaves_out_projects_without_statuses(self):
+        empty = Project.objects.create(
+            code='1000000001-01S', name='Empty', manager=self.pm,
+            start_date=date(2025, 1, 1), end_date=date(2026, 1, 1),
+        )
+        data = self.client.get('/api/projects/timeline/', {'ids': f'{self.project.pk},{empty.pk}'}).data
+        self.assertEqual([item['id'] for item in data['projects']], [self.project.pk])
+        self.assertEqual(data['projects'][0]['runs'], [[0, 0, 1, 1]])
+
+
+class ForecastTests(ApiTestCase):
+    today = date(2025, 7, 2)
+
+    def test_compute_extrapolates_the_end_date(self):
+        forecasts = forecasting.compute(
+            [(1, date(2025, 1, 1), date(2026, 1, 1), 'DEV'), (2, date(2025, 1, 1), date(2026, 1, 1), 'PLAN')],
+            [(1, 50.0, 2, 1, 0)],
+            [(1, date(2025, 3, 1), 'DEV')],
+            self.today,
+        )
+        first = forecasts[1]
+        self.assertEqual((first['expected_progress'], first['actual_progress']), (49.86, 37.5))
+        self.assertEqual(first['projected_end_date'], date(2026, 5, 1))
+        self.assertEqual((first['slip_days'], first['days_in_phase']), (120, 123))
+        self.assertEqual(first['risk_level'], 'HIGH')
+        # started without any progress: nothing to extrapolate
+        self.assertIsNone(forecasts[2]['projected_end_date'])
+        self.assertIsNone(forecasts[2]['slip_days'])
+
+    def test_refresh_upserts_and_drops_completed_projects(self):
+        Responsibility.objects.filter(project_status=self.status).update(progress=50)
+        forecasting.refresh(today=self.today)
+        Responsibility.objects.filter(project_status=self.status).update(progress=100)
+        forecasting.refresh(today=self.today)
+
+        forecast = ProjectForecast.objects.get()
+        self.assertEqual(forecast.actual_progress, 62.5)
+
+        Project.objects.filter(pk=self.project.pk).update(current_phase='COMP')
+        forecasting.refresh(today=self.today)
+        self.assertFalse(ProjectForecast.objects.exists())
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Sliding-window rate limit shared by all workers through the cache.
+
+    Requests are counted in fixed windows with one atomic `cache.incr`; the
+    previous window's count is weighted by how much of it still overlaps the
+    sliding window. That count is final once its window is over, so each
+    worker reads it once and keeps it in a small local LRU, leaving a single
+    cache round trip per request.
+
+    Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][scope], e.g. "10/min".
+    Authenticated requests are limited per user, anonymous ones per client IP.
+    """
+    scope = None
+    cache_prefix = 'throttle'
+    DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    _previous_counts = OrderedDict()
+    # shared by the threads of a worker (threaded servers, the report pool)
+    _previous_counts_lock = threading.Lock()
+    PREVIOUS_COUNTS_SIZE = 10000
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_scope(self, view):
+        return self.scope
+
+    def get_rate(self, scope):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+
+    def parse_rate(self, rate):
+        num, period = rate.split('/')
+        return int(num), self.DURATIONS[period[0]]
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def _increment(self, key, timeout):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            if cache.add(key, 1, timeout):
+                return 1
+            return cache.incr(key)
+
+    def _previous_count(self, key):
+        with self._previous_counts_lock:
+            cached = self._previous_counts.get(key)
+            if cached is not None:
+                self._previous_counts.move_to_end(key)
+                return cached
+        cached = cache.get(key, 0)
+        with self._previous_counts_lock:
+            self._previous_counts[key] = cached
+            if len(self._previous_counts) > self.PREVIOUS_COUNTS_SIZE:
+                self._previous_counts.popitem(last=False)
+        return cached
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = self.get_rate(scope) if scope else None
+        if rate is None:
+            return True
+        num_requests, duration = self.parse_rate(rate)
+
+        now = time.time()
+        window = int(now // duration)
+        elapsed = (now % duration) / duration
+        prefix = f'{self.cache_prefix}:{scope}:{self.get_ident_key(request)}:{duration}'
+
+        count = self._increment(f'{prefix}:{window}', duration * 2)
+        previous = self._previous_count(f'{prefix}:{window - 1}')
+        if previous * (1 - elapsed) + count <= num_requests:
+            return True
+
+        if count > num_requests or not previous:
+            self.wait_seconds = duration * (1 - elapsed)
+        else:
+            # time until enough of the previous window has slid out
+            self.wait_seconds = duration * max(1 - elapsed - (num_requests - count) / previous, 0)
+        return False
+
+    def wait(self):
+        if self.wait_seconds is None:
+            return None
+        return max(self.wait_seconds, 1)
+
+
+class ScopedSlidingWindowThrottle(SlidingWindowThrottle):
+    """Uses the view's `throttle_scope`, like DRF's ScopedRateThrottle."""
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
+
+
+class AuthThrottle(SlidingWindowThrottle):
+    """
+    Login, registration and password reset: limited per client IP, as seen
+    through REST_FRAMEWORK["NUM_PROXIES"] trusted proxies.
+    """
+    scope = 'auth'
+
+    def get_ident_key(self, request):
+        return f'ip:{self.get_ident(request)}'
+
+
+class ReportThrottle(SlidingWindowThrottle):
+    scope = 'reports'
+
+
+class ExportThrottle(SlidingWindowThrottle):
+    scope = 'export'
@@ -0,0 +1,67 @@
+"""
+Run-length encoded phase timelines.
+
+Only (project, status_date, phase, is_baseline, is_final) is read. Each
+project's statuses, in date order, are collapsed into runs of the same
+phase:
+
+    {"id": 7, "origin": "2024-01-08",
+     "runs": [[0, 56, 0, 9], [63, 210, 1, 22]],
+     "baseline": [0], "final": []}
+
+Every run is [first day, last day, phase index, statuses], days counted
+from `origin` (the first status date) and the phase index pointing into
+PHASES. `baseline` and `final` list the days of flagged statuses.
+
+Archived statuses (api.retention) contribute their date and phase; their
+baseline/final flags only exist in the archived payload and are left out.
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from .models import ArchivedStatus, Project, ProjectStatus
+
+PHASES = [phase for phase, _ in Project.PHASE_CHOICES]
+_PHASE_INDEX = {phase: index for index, phase in enumerate(PHASES)}
+
+
+def encode(project_id, rows):
+    """rows: (status_date, phase, is_baseline, is_final) sorted by date."""
+    runs, baseline, final = [], [], []
+    origin = rows[0][0] if rows else None
+    for status_date, phase, is_baseline, is_final in rows:
+        day = (status_date - origin).days
+        index = _PHASE_INDEX.get(phase, -1)
+        if runs and runs[-1][2] == index:
+            runs[-1][1] = day
+            runs[-1][3] += 1
+        else:
+            runs.append([day, day, index, 1])
+        if is_baseline:
+            baseline.append(day)
+        if is_final:
+            final.append(day)
+    return {
+        'id': project_id,
+        'origin': origin.isoformat() if origin else None,
+        'runs': runs,
+        'baseline': baseline,
+        'final': final,
+    }
+
+
+def timelines(project_ids):
+    """One query for live and one for archived statuses, whatever the number of projects."""
+    live = ProjectStatus.objects.filter(project_id__in=project_ids).values_list(
+        'project_id', 'status_date', 'phase', 'is_baseline', 'is_final'
+    ).order_by('project_id', 'status_date', 'id')
+    archived = ArchivedStatus.objects.filter(project_id__in=project_ids).values_list(
+        'project_id', 'status_date', 'phase'
+    ).order_by()
+    rows = list(live) + [(project_id, day, phase, False, False) for project_id, day, phase in archived]
+    # stable: statuses sharing a date keep their id order
+    rows.sort(key=itemgetter(0, 1))
+    return [
+        encode(project_id, [row[1:] for row in group])
+        for project_id, group in groupby(rows, key=itemgetter(0))
+    ]
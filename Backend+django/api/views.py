@@ -1,31 +1,45 @@
 # api/views.py
+import hashlib
 import logging
 import secrets
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import send_mail
-from django.db import transaction
-from django.db.models import Q, F
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    Aggregate, Avg, Count, DurationField, ExpressionWrapper, F, IntegerField, Max, Q, Window,
+)
+from django.db.models.functions import Floor, RowNumber, TruncMonth, TruncWeek
+from django.http import Http404
 from django.utils import timezone
 
 from rest_framework import viewsets, permissions, generics, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
 
 from django_filters import rest_framework as filters
 
 from .models import (
+    ArchivedStatus,
+    AuditEvent,
     CustomUser,
     Project,
     ProjectStatus,
     Responsibility,
     Escalation,
     PasswordResetToken,
+    StatusSnapshot,
 )
 from .serializers import (
+    collect_user_ids,
+    expansion_lookups,
+    AuditEventSerializer,
     ChangePasswordSerializer,
     UserSerializer,
     ProjectSerializer,
@@ -34,14 +48,119 @@ from .serializers import (
     EscalationSerializer,
 )
 from .permissions import IsProjectManager, IsResponsibleOrDeputy, IsEscalationManager
+from .throttling import AuthThrottle, ExportThrottle, ReportThrottle
+from . import batch, changes, codes, fragments, reports, search, snapshots, timeline
+from .concurrency import VersionConflict, VersionedViewSetMixin
+from .idempotency import IdempotencyMixin
+from .importer import Importer, ImportFormatError, read_rows
+from .middleware import etag_matches
 
 logger = logging.getLogger(__name__)
 
 
+class PercentileCont(Aggregate):
+    """PostgreSQL ordered-set aggregate: percentile_cont(f) WITHIN GROUP (ORDER BY expr)."""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, fraction, expression, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def _window_percentiles(qs, keys, value, percents):
+    """
+    percentile_cont of `value` within each group of the `keys` annotations,
+    for backends without the aggregate. ROW_NUMBER() and COUNT() windows rank
+    the rows in SQL and only the two rows around each percentile are fetched.
+    Percents are integers so the rank arithmetic stays exact on every backend.
+    Returns {key tuple: [value per percent]}.
+    """
+    partition = [F(key) for key in keys]
+    ranked = qs.annotate(_value=value).annotate(
+        _rank=Window(RowNumber(), partition_by=partition, order_by=F('_value').asc()),
+        _size=Window(Count('*'), partition_by=partition),
+    )
+    around = Q()
+    for percent in percents:
+        lower = Floor((F('_size') - 1) * percent / 100, output_field=IntegerField()) + 1
+        around |= Q(_rank=lower) | Q(_rank=lower + 1)
+
+    groups = {}
+    for *key, rank, size, current in ranked.filter(around).values_list(*keys, '_rank', '_size', '_value'):
+        groups.setdefault(tuple(key), (size, {}))[1][rank] = current
+
+    result = {}
+    for key, (size, by_rank) in groups.items():
+        result[key] = []
+        for percent in percents:
+            # linear interpolation between closest ranks, same as percentile_cont
+            lower, remainder = divmod((size - 1) * percent, 100)
+            low = by_rank[lower + 1]
+            high = by_rank.get(lower + 2, low)
+            result[key].append(low + (high - low) * (remainder / 100))
+    return result
+
+
+class ExpandableViewSetMixin:
+    """
+    Prefetch only the nested relations the serializer will render for this
+    request (see DynamicFieldsMixin) and, with ?include=users, side-load every
+    referenced user once under `included.users` instead of once per row.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return queryset.prefetch_related(*expansion_lookups(self.get_serializer_class(), self.request))
+
+    def list(self, request, *args, **kwargs):
+        return self._include_users(super().list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._include_users(super().retrieve(request, *args, **kwargs))
+
+    def _include_users(self, response):
+        include = self.request.query_params.get('include', '')
+        if 'users' not in include.split(','):
+            return response
+        users = batch.cached('users', collect_user_ids(response.data), lambda ids: {
+            user['id']: user
+            for user in UserSerializer(CustomUser.objects.filter(id__in=ids), many=True).data
+        })
+        included = {'users': users}
+        if isinstance(response.data, list):
+            response.data = {'results': response.data, 'included': included}
+        else:
+            response.data['included'] = included
+        return response
+
+
+class AuditHistoryMixin:
+    """GET <detail>/history/: audit events of the object, newest first."""
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        try:
+            object_id = self.get_object().pk
+        except Http404:
+            # archived or deleted objects keep their history
+            if not str(pk).isdigit():
+                raise
+            object_id = int(pk)
+        events = AuditEvent.objects.filter(
+            entity=self.queryset.model._meta.model_name, object_id=object_id
+        ).select_related('actor').order_by('-created_at')
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(events, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(AuditEventSerializer(page, many=True).data)
+        return Response(AuditEventSerializer(events, many=True).data)
+
+
 class CreateUserView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AuthThrottle]
 
 
 class ProjectFilter(filters.FilterSet):
@@ -63,13 +182,36 @@ class EscalationFilter(filters.FilterSet):
         fields = ['resolved', 'project']
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(IdempotencyMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
+    """
+    Forecast filters and ordering (api.forecasting), e.g.
+    ?forecast__risk_level=HIGH&ordering=-forecast__risk or
+    ?forecast__slip_days__gte=30&ordering=forecast__projected_end_date
+
+    POSTs accept an Idempotency-Key header (api.idempotency).
+    """
     queryset = Project.objects.all().order_by('-created_at')
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filterset_fields = ['code', 'name', 'current_phase']
+    filter_backends = [filters.DjangoFilterBackend, OrderingFilter]
+    filterset_fields = {
+        'code': ['exact'],
+        'name': ['exact'],
+        'current_phase': ['exact'],
+        'forecast__risk_level': ['exact'],
+        'forecast__risk': ['gte', 'lte'],
+        'forecast__slip_days': ['gte', 'lte'],
+        'forecast__schedule_variance': ['gte', 'lte'],
+    }
+    ordering_fields = [
+        'created_at', 'code', 'name', 'start_date', 'end_date',
+        'forecast__risk', 'forecast__slip_days', 'forecast__schedule_variance', 'forecast__projected_end_date',
+    ]
 
     def get_queryset(self):
+        # schema generation (drf_yasg) runs without an authenticated user
+        if getattr(self, 'swagger_fake_view', False):
+            return Project.objects.none()
         user = self.request.user
 
         # Admins / PMs see everything
@@ -97,31 +239,163 @@ class ProjectViewSet(viewsets.ModelViewSet):
         serializer = ProjectStatusSerializer(latest_status)
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get'], url_path='check-code')
+    MAX_CHECK_CODES = 500
+
+    @action(detail=False, methods=['get', 'post'], url_path='check-code')
     def check_code(self, request):
-        code = request.query_params.get('code')
-        if not code:
-            return Response({'error': 'Code parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        """
+        GET ?code=<code> -> {"exists": bool}
+        GET ?codes=a,b,c or POST {"codes": [...]} -> {"results": {code: {"valid", "exists"}}}
+        Answered from the in-memory set of taken codes (api.codes).
+        """
+        if request.method == 'POST':
+            candidates = request.data.get('codes')
+            if not isinstance(candidates, list):
+                return Response({'error': 'codes must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        elif 'codes' in request.query_params:
+            candidates = [c for c in request.query_params['codes'].split(',') if c]
+        else:
+            code = request.query_params.get('code')
+            if not code:
+                return Response({'error': 'Code parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'exists': code in codes.taken_codes()})
 
-        exists = Project.objects.filter(code=code).exists()
-        return Response({'exists': exists})
+        if len(candidates) > self.MAX_CHECK_CODES:
+            return Response({'error': f'At most {self.MAX_CHECK_CODES} codes per request'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': codes.check_codes(str(code).strip() for code in candidates)})
 
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Phase history as run-length encoded intervals (see api.timeline)."""
+        project = self.get_object()
+        result = timeline.timelines([project.pk])
+        return Response(dict(
+            result[0] if result else timeline.encode(project.pk, []),
+            phases=timeline.PHASES,
+        ))
+
+    @action(detail=False, methods=['get'], url_path='timeline')
+    def portfolio_timeline(self, request):
+        """
+        Timelines of every visible project, same filters as the list
+        (?current_phase=, ?code=) plus ?ids=1,2,3. Projects without
+        statuses are left out.
+        """
+        projects = self.filter_queryset(self.get_queryset())
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                projects = projects.filter(id__in=[int(i) for i in ids.split(',') if i])
+            except ValueError:
+                return Response({'error': 'ids must be a comma-separated list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'phases': timeline.PHASES,
+            'projects': timeline.timelines(projects.order_by().values('id')),
+        })
+
+    @action(detail=False, methods=['post'], url_path='next-code',
+            permission_classes=[permissions.IsAuthenticated, IsProjectManager])
+    def next_code(self, request):
+        """Reserve the next free project code; concurrent callers never get the same one."""
+        return Response({'code': codes.allocate_code()}, status=status.HTTP_201_CREATED)
 
-class ProjectStatusViewSet(viewsets.ModelViewSet):
+
+class ProjectStatusViewSet(IdempotencyMixin, VersionedViewSetMixin, AuditHistoryMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = ProjectStatus.objects.all()
     serializer_class = ProjectStatusSerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['project', 'phase', 'is_baseline', 'is_final']
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ProjectStatus.objects.none()
         qs = ProjectStatus.objects.all()
-        # eager load responsibilities + user relations for performance
-        qs = qs.prefetch_related('responsibilities__responsible', 'responsibilities__deputy')
+        # nested responsibilities / users are prefetched in filter_queryset, only when expanded
         project_id = self.request.query_params.get('project_id')
         if project_id:
             qs = qs.filter(project_id=project_id)
         return qs.order_by('-status_date')
 
+    def list(self, request, *args, **kwargs):
+        """
+        With ?project_id=, statuses moved to the archive by the retention job
+        are merged back in (newest first) unless include_archived=false.
+        """
+        response = super().list(request, *args, **kwargs)
+        project_id = request.query_params.get('project_id')
+        if not project_id or request.query_params.get('include_archived', '').lower() in ('false', '0'):
+            return response
+
+        archived = ArchivedStatus.objects.filter(project_id=project_id)
+        if request.query_params.get('phase'):
+            archived = archived.filter(phase=request.query_params['phase'])
+        archived = [snapshot.data for snapshot in archived]
+        if not archived:
+            return response
+
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        merged = sorted(list(rows) + archived, key=lambda row: row['status_date'], reverse=True)
+        if isinstance(response.data, dict):
+            response.data['results'] = merged
+        else:
+            response.data = merged
+        return response
+
+    def _plain_json(self, request):
+        """True when the response would be the stored snapshot byte for byte."""
+        return not set(request.query_params) - {'format'} and request.accepted_renderer.format == 'json'
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Baseline/final statuses are served from their pre-rendered snapshot;
+        the first read after an edit renders and stores a new version.
+        """
+        pk = kwargs.get('pk')
+        try:
+            instance = self.get_object()
+        except Http404:
+            archived = ArchivedStatus.objects.filter(original_id=pk).first() if str(pk).isdigit() else None
+            if archived is None:
+                raise
+            return Response(archived.data)
+        plain = instance.is_frozen and self._plain_json(request)
+        if plain:
+            snapshot = snapshots.current(instance.pk)
+            if snapshot is not None:
+                return snapshots.response(request, snapshot, row_version=instance.version)
+        response = self._include_users(Response(self.get_serializer(instance).data))
+        if plain:
+            snapshots.store(instance.pk, response.data)
+        return response
+
+    @action(detail=True, methods=['get'])
+    def snapshot(self, request, pk=None):
+        """
+        GET /api/status/{id}/snapshot/?version=<n>
+        A given version never changes and is sent with a year-long Cache-Control;
+        without ?version the latest one is returned and must be revalidated.
+        """
+        status_obj = self.get_object()
+        version = request.query_params.get('version')
+        if version is not None:
+            if not version.isdigit():
+                return Response({'error': 'version must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            snapshot = StatusSnapshot.objects.filter(status_id=status_obj.pk, version=version).first()
+            if snapshot is None:
+                raise Http404
+            return snapshots.response(request, snapshot, cache_control=snapshots.IMMUTABLE)
+
+        if not status_obj.is_frozen:
+            return Response({'error': 'Status is not a baseline or final status'}, status=status.HTTP_404_NOT_FOUND)
+        snapshot = snapshots.current(status_obj.pk)
+        if snapshot is None:
+            snapshots.render(status_obj.pk)
+            snapshot = snapshots.current(status_obj.pk)
+        if snapshot is None:
+            # edited while rendering: answer from the row
+            return Response(self.get_serializer(status_obj).data)
+        return snapshots.response(request, snapshot)
+
     def get_permissions(self):
         # restrict write actions to project managers/admins (IsProjectManager permission)
         if self.action in [
@@ -193,35 +467,80 @@ class ProjectStatusViewSet(viewsets.ModelViewSet):
         return Response({'status': 'previous responsibilities cloned', 'created': created_count})
 
 
-class ResponsibilityViewSet(viewsets.ModelViewSet):
+class ResponsibilityViewSet(VersionedViewSetMixin, AuditHistoryMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Responsibility.objects.all()
     serializer_class = ResponsibilitySerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['project_status', 'status', 'needs_escalation']
 
+    ESCALATION_FIELDS = ('status', 'needs_escalation')
+    BULK_LIMIT = 500
+
     def perform_update(self, serializer):
+        # FieldTracker is reset by save(), so remember the values beforehand
+        previous = {field: getattr(serializer.instance, field) for field in self.ESCALATION_FIELDS}
         instance = serializer.save()
-        self._check_escalation(instance)
+        self._check_escalation(instance, previous)
 
-    def _check_escalation(self, responsibility):
-        # relies on modeltracker / django-simple-history or similar to detect changes
-        try:
-            changed_status = getattr(responsibility, 'tracker', None) and responsibility.tracker.has_changed('status')
-            changed_escalation_flag = getattr(responsibility, 'tracker', None) and responsibility.tracker.has_changed('needs_escalation')
-            if changed_status or changed_escalation_flag:
-                if responsibility.status in ['Y', 'R'] or responsibility.needs_escalation:
-                    self._trigger_escalation(responsibility)
-        except Exception:
-            # fail safe: still try to trigger if conditions appear set
-            if responsibility.status in ['Y', 'R'] or responsibility.needs_escalation:
-                self._trigger_escalation(responsibility)
+    @action(detail=False, methods=['patch'])
+    def bulk(self, request):
+        """
+        PATCH /api/responsibilities/bulk/ with a list of partial updates, each
+        naming the `id` and the `version` it is based on. Rows are saved one by
+        one in a single transaction; a row that conflicts with a newer version
+        or fails validation is skipped and reported, the others are kept:
+        {"updated": [...], "conflicts": [{"id", "current_version"}], "errors": [{"id", "errors"}]}
+        """
+        rows = request.data
+        if not isinstance(rows, list) or not all(
+            isinstance(row, dict) and str(row.get('id', '')).isdigit() and 'version' in row for row in rows
+        ):
+            return Response({'error': 'Expected a list of objects with id and version'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.BULK_LIMIT:
+            return Response({'error': f'At most {self.BULK_LIMIT} rows per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+        instances = self.get_queryset().select_related(
+            'project_status__project', 'responsible', 'deputy'
+        ).in_bulk([int(row['id']) for row in rows])
+        updated, conflicts, errors = [], [], []
+        with transaction.atomic():
+            for row in rows:
+                pk = int(row['id'])
+                instance = instances.get(pk)
+                if instance is None:
+                    errors.append({'id': pk, 'errors': {'detail': 'Not found.'}})
+                    continue
+                serializer = self.get_serializer(instance, data=row, partial=True)
+                if not serializer.is_valid():
+                    errors.append({'id': pk, 'errors': serializer.errors})
+                    continue
+                try:
+                    with transaction.atomic():
+                        self.perform_update(serializer)
+                except VersionConflict as exc:
+                    conflicts.append({'id': pk, 'current_version': exc.current_version})
+                    continue
+                except NotFound:
+                    # deleted since it was loaded
+                    errors.append({'id': pk, 'errors': {'detail': 'Not found.'}})
+                    continue
+                updated.append(serializer.data)
+        return Response({'updated': updated, 'conflicts': conflicts, 'errors': errors})
+
+    def _check_escalation(self, responsibility, previous):
+        changed = any(getattr(responsibility, field) != value for field, value in previous.items())
+        if changed and (responsibility.status in ['Y', 'R'] or responsibility.needs_escalation):
+            self._trigger_escalation(responsibility)
 
     def _trigger_escalation(self, responsibility):
-        escalation = Escalation.objects.create(
-            responsibility=responsibility,
+        escalation, created = Escalation.objects.trigger(
+            responsibility,
             reason=f"Automatic escalation triggered for {responsibility.title}",
-            created_by=self.request.user
+            created_by=self.request.user,
         )
+        if not created:
+            # already escalated and still open: counted, no new mail
+            return
 
         recipients = []
         if responsibility.responsible and getattr(responsibility.responsible, 'email', None):
@@ -245,12 +564,35 @@ class ResponsibilityViewSet(viewsets.ModelViewSet):
                 logger.exception("Failed to send escalation email")
 
 
-class EscalationViewSet(viewsets.ModelViewSet):
+class EscalationViewSet(IdempotencyMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Escalation.objects.all().order_by('-created_at')
     serializer_class = EscalationSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filterset_fields = ['resolved', 'responsibility__project_status__project']
 
+    def create(self, request, *args, **kwargs):
+        """
+        Escalating a responsibility that already has an open escalation adds an
+        occurrence to it (200) instead of creating a duplicate (201).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        escalation, created = Escalation.objects.trigger(
+            data['responsibility'],
+            reason=data['reason'],
+            created_by=data.get('created_by') or request.user,
+        )
+        output = self.get_serializer(escalation)
+        return Response(output.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({'resolved': 'This responsibility already has an open escalation.'})
+
     @action(detail=True, methods=['post'])
     def resolve_escalation(self, request, pk=None):
         escalation = self.get_object()
@@ -263,7 +605,7 @@ class EscalationViewSet(viewsets.ModelViewSet):
         if not project_q:
             return Response({"detail": "project query param required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        qs = self.get_queryset()
+        qs = self.get_queryset().prefetch_related(*expansion_lookups(self.get_serializer_class(), request))
         if str(project_q).isdigit():
             qs = qs.filter(responsibility__project_status__project__id=project_q)
         else:
@@ -295,12 +637,80 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    LOOKUP_LIMIT = 20
+    MAX_LOOKUP_LIMIT = 50
+    DIRECTORY_CACHE_TIMEOUT = 3600
+
     def get_permissions(self):
         # list & retrieve allowed for authenticated; other mutating actions limited to admins
-        if self.action in ['list', 'retrieve', 'me']:
+        if self.action in ['list', 'retrieve', 'me', 'lookup', 'directory']:
             return [permissions.IsAuthenticated()]
         return [permissions.IsAdminUser()]
 
+    @staticmethod
+    def _label(first_name, last_name, username):
+        return f"{first_name} {last_name}".strip() or username
+
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """
+        GET /api/users/lookup/?q=<prefix>&role=&department=&limit=20
+        Typeahead: prefix match on username, first/last name or email.
+        """
+        params = request.query_params
+        try:
+            limit = min(int(params.get('limit', self.LOOKUP_LIMIT)), self.MAX_LOOKUP_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = CustomUser.objects.filter(is_active=True)
+        q = params.get('q', '').strip()
+        if q:
+            qs = qs.filter(
+                Q(username__istartswith=q) | Q(first_name__istartswith=q) |
+                Q(last_name__istartswith=q) | Q(email__istartswith=q)
+            )
+        if params.get('role'):
+            qs = qs.filter(role=params['role'])
+        if params.get('department'):
+            qs = qs.filter(department=params['department'])
+
+        rows = qs.order_by('username').values_list('id', 'username', 'first_name', 'last_name', 'role')[:max(limit, 1)]
+        return Response({'results': [
+            {'id': pk, 'label': self._label(first, last, username), 'username': username, 'role': role}
+            for pk, username, first, last, role in rows
+        ]})
+
+    @action(detail=False, methods=['get'])
+    def directory(self, request):
+        """
+        GET /api/users/directory/
+        Compact list of every user, versioned by the latest user change.
+        Send the ETag back in If-None-Match to get 304 while nothing changed.
+        """
+        stats = CustomUser.objects.aggregate(latest=Max('updated_at'), total=Count('id'))
+        version = f"{stats['total']}-{int(stats['latest'].timestamp() * 1e6) if stats['latest'] else 0}"
+        etag = f'"users-{version}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache_key = f'users:directory:{version}'
+        payload = cache.get(cache_key)
+        if payload is None:
+            payload = {'version': version, 'users': [
+                {
+                    'id': pk, 'username': username, 'full_name': self._label(first, last, username),
+                    'role': role, 'department': department, 'is_active': is_active,
+                }
+                for pk, username, first, last, role, department, is_active in CustomUser.objects.order_by('username').values_list(
+                    'id', 'username', 'first_name', 'last_name', 'role', 'department', 'is_active'
+                )
+            ]}
+            # the key changes with every user edit, so entries never go stale
+            cache.set(cache_key, payload, self.DIRECTORY_CACHE_TIMEOUT)
+        return Response(payload, headers=headers)
+
     @action(detail=False, methods=['get'])
     def me(self, request):
         serializer = self.get_serializer(request.user, context={'request': request})
@@ -329,27 +739,42 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class ReportingViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    # full-row dumps used for CSV export get their own, smaller budget
+    EXPORT_ACTIONS = ['escalation_report']
+
+    def get_throttles(self):
+        if self.action in self.EXPORT_ACTIONS:
+            return [ExportThrottle()]
+        if self.action != 'list':
+            return [ReportThrottle()]
+        return super().get_throttles()
 
     def list(self, request):
         return Response({
             "project_summary": "GET /api/reports/project_summary/",
+            "dashboard": "GET /api/reports/dashboard/",
+            "heatmap": "GET /api/reports/heatmap/?phase=&manager=&department=&title=...",
             "user_responsibilities": "GET /api/reports/user_responsibilities/?user_id=...",
-            "escalation_report": "GET /api/reports/escalation_report/"
+            "workload": "GET /api/reports/workload/?department=...",
+            "escalation_report": "GET /api/reports/escalation_report/",
+            "escalation_analytics": "GET /api/reports/escalation_analytics/?period=week|month",
+            "fragment_cache": "GET /api/reports/fragment_cache/",
+            "async": "GET /api/async/reports/{project_summary,dashboard,workload,escalation_report}/"
         })
 
     @action(detail=False, methods=['get'])
     def project_summary(self, request):
-        total = Project.objects.count()
-        in_production = Project.objects.filter(statuses__phase='PROD').distinct().count()
-        escalated = Responsibility.objects.filter(
-            Q(status='Y') | Q(status='R') | Q(needs_escalation=True)
-        ).values('project_status__project').distinct().count()
-        return Response({
-            'total_projects': total,
-            'in_production': in_production,
-            'escalated_projects': escalated,
-            'escalation_rate': round((escalated / total) * 100, 2) if total else 0
-        })
+        return Response(reports.project_summary(
+            reports.total_projects(), reports.projects_in_production(), reports.escalated_projects(),
+        ))
+
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        """Portfolio counts for the dashboard header plus the caller's open yellow/red items."""
+        return Response(reports.dashboard(
+            reports.projects_by_phase(), reports.latest_rag_counts(),
+            reports.open_escalations(), reports.my_open_items(request.user.pk),
+        ))
 
     @action(detail=False, methods=['get'])
     def user_responsibilities(self, request):
@@ -369,6 +794,16 @@ class ReportingViewSet(viewsets.ViewSet):
         )
         return Response(list(responsibilities))
 
+    @action(detail=False, methods=['get'])
+    def workload(self, request):
+        """
+        Workload per user, computed on the latest status of each project only:
+         - department (optional) restricts to users of that department
+        Responsible and deputy assignments are counted per RAG status together
+        with the open escalations on those assignments.
+        """
+        return Response(reports.workload(request.query_params.get('department') or ''))
+
     @action(detail=False, methods=['get'])
     def escalation_report(self, request):
         """
@@ -380,46 +815,7 @@ class ReportingViewSet(viewsets.ViewSet):
         Returns paginated results when pagination is configured.
         """
         try:
-            qs = Escalation.objects.select_related(
-                'responsibility__project_status__project',
-                'created_by',
-                'resolved_by'
-            ).order_by('-created_at')
-
-            # resolved / include_resolved
-            resolved_param = request.query_params.get('resolved') or request.query_params.get('include_resolved')
-            if resolved_param is not None:
-                if str(resolved_param).lower() in ('true', '1'):
-                    qs = qs.filter(resolved=True)
-                elif str(resolved_param).lower() in ('false', '0'):
-                    qs = qs.filter(resolved=False)
-
-            # project filter
-            project_q = request.query_params.get('project')
-            if project_q:
-                if str(project_q).isdigit():
-                    qs = qs.filter(responsibility__project_status__project__id=project_q)
-                else:
-                    qs = qs.filter(responsibility__project_status__project__code=project_q)
-
-            # date range
-            date_from = request.query_params.get('date_from')
-            date_to = request.query_params.get('date_to')
-            try:
-                if date_from:
-                    qs = qs.filter(created_at__date__gte=date_from)
-                if date_to:
-                    qs = qs.filter(created_at__date__lte=date_to)
-            except Exception:
-                return Response({"detail": "Invalid date_from or date_to. Use YYYY-MM-DD."},
-                                status=status.HTTP_400_BAD_REQUEST)
-
-            # responsibility passthrough
-            resp = request.query_params.get('responsibility')
-            if resp:
-                qs = qs.filter(responsibility__id=resp)
-
-            logger.debug("escalation_report query built; count=%d", qs.count())
+            qs = reports.escalations(request.query_params)
 
             paginator = PageNumberPagination()
             page = paginator.paginate_queryset(qs, request, view=self)
@@ -429,13 +825,247 @@ class ReportingViewSet(viewsets.ViewSet):
 
             serializer = EscalationSerializer(qs, many=True, context={'request': request})
             return Response(serializer.data)
+        except ValidationError:
+            raise
         except Exception:
             logger.exception("Failed to build escalation report")
             return Response({'detail': 'Server error while building escalation report'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'])
+    def escalation_analytics(self, request):
+        """
+        Escalations grouped by project, period bucket, creator and resolved state:
+         - period (week|month, default week)
+         - same filters as escalation_report
+        Each group carries its count and the mean / median / p90 time-to-resolve
+        in seconds (null for groups without resolved escalations). Cached for
+        REPORTS_CACHE_TIMEOUT seconds per set of parameters.
+        """
+        period = request.query_params.get('period', 'week')
+        if period not in ('week', 'month'):
+            return Response({'error': 'period must be week or month'}, status=status.HTTP_400_BAD_REQUEST)
+        trunc = TruncWeek if period == 'week' else TruncMonth
+
+        params = sorted((key, request.query_params.getlist(key)) for key in request.query_params)
+        cache_key = f"reports:escalation_analytics:{hashlib.sha256(repr(params).encode()).hexdigest()}"
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        qs = reports.filter_escalations(Escalation.objects.all(), request.query_params)
+        resolve_time = ExpressionWrapper(F('resolved_at') - F('created_at'), output_field=DurationField())
+        resolved_only = Q(resolved=True, resolved_at__isnull=False)
+        group = {
+            'project_id': F('responsibility__project_status__project'),
+            'bucket': trunc('created_at'),
+            'creator_id': F('created_by'),
+        }
+        dimensions = {
+            **group,
+            'project_code': F('responsibility__project_status__project__code'),
+            'creator': F('created_by__username'),
+            'group_resolved': F('resolved'),
+        }
+        aggregates = {
+            'count': Count('id'),
+            'mean_resolve': Avg(resolve_time, filter=resolved_only),
+        }
+        native_percentiles = connection.vendor == 'postgresql'
+        if native_percentiles:
+            aggregates['median_resolve'] = PercentileCont(0.5, resolve_time, filter=resolved_only)
+            aggregates['p90_resolve'] = PercentileCont(0.9, resolve_time, filter=resolved_only)
+
+        rows = list(
+            qs.values(**dimensions).annotate(**aggregates).order_by('bucket', 'project_code', 'creator')
+        )
+
+        if not native_percentiles:
+            # only resolved rows have a duration, so only the resolved groups get percentiles
+            percentiles = _window_percentiles(qs.filter(resolved_only).annotate(**group), list(group), resolve_time, [50, 90])
+            for row in rows:
+                key = tuple(row[name] for name in group)
+                row['median_resolve'], row['p90_resolve'] = (
+                    percentiles.get(key, (None, None)) if row['group_resolved'] else (None, None)
+                )
+
+        def seconds(value):
+            return value.total_seconds() if value is not None else None
+
+        data = {
+            'period': period,
+            'results': [
+                {
+                    'project_id': row['project_id'],
+                    'project_code': row['project_code'],
+                    'bucket': row['bucket'].date().isoformat() if row['bucket'] else None,
+                    'created_by': row['creator_id'],
+                    'created_by_username': row['creator'],
+                    'resolved': row['group_resolved'],
+                    'count': row['count'],
+                    'mean_resolve_seconds': seconds(row['mean_resolve']),
+                    'median_resolve_seconds': seconds(row['median_resolve']),
+                    'p90_resolve_seconds': seconds(row['p90_resolve']),
+                }
+                for row in rows
+            ],
+        }
+        cache.set(cache_key, data, settings.REPORTS_CACHE_TIMEOUT)
+        return Response(data)
+
+
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        """
+        Active projects x responsibility titles, colored by the latest RAG status:
+         - phase, manager (id), department (of the responsible user)
+         - title (repeatable) picks the columns, default: the most frequent titles
+        Returns {"rows", "columns", "cells"}; cells is one G/Y/R/. character per
+        cell, row-major. Versioned by the change log, so If-None-Match gets 304
+        until a project, status, responsibility or user changes.
+        """
+        params = request.query_params
+        manager = params.get('manager') or ''
+        if manager and not manager.isdigit():
+            return Response({'error': 'manager must be a user id'}, status=status.HTTP_400_BAD_REQUEST)
+        selection = (params.get('phase') or '', manager, params.get('department') or '', params.getlist('title'))
+
+        # the committed position of the change feed: ids are taken at insert
+        # time, and a long transaction can commit a lower one later
+        version = f"{changes.current_cursor()}-{hashlib.sha256(repr(selection).encode()).hexdigest()[:16]}"
+        etag = f'"heatmap-{version}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache_key = f'reports:heatmap:{version}'
+        data = cache.get(cache_key)
+        if data is None:
+            phase, manager, department, titles = selection
+            data = reports.heatmap(phase, manager, department, titles)
+            cache.set(cache_key, data, settings.REPORTS_CACHE_TIMEOUT)
+        return Response(data, headers=headers)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsProjectManager])
+    def fragment_cache(self, request):
+        """Hit counters of the serializer fragment cache, for this worker process."""
+        return Response(fragments.stats())
+
+
+class SearchView(APIView):
+    """
+    GET /api/search/?q=<text>&type=project,status,responsibility&limit=20
+    Ranked full-text search over projects, status notes and responsibilities,
+    limited to the projects visible to the caller.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_LIMIT = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < 2:
+            return Response({'error': 'q parameter must be at least 2 characters'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        kinds = [k for k in request.query_params.get('type', '').split(',') if k]
+        results = search.search(query, request.user, limit=max(limit, 1), kinds=kinds).values(
+            'kind', 'object_id', 'project_id', 'title', 'rank'
+        )
+        return Response({
+            'query': query,
+            'results': [
+                {
+                    'type': row['kind'],
+                    'id': row['object_id'],
+                    'project': row['project_id'],
+                    'title': row['title'],
+                    'rank': row['rank'],
+                }
+                for row in results
+            ],
+        })
+
+
+class ChangesView(APIView):
+    """
+    GET /api/changes/?since=<cursor>&limit=500
+    Created/updated/deleted rows of projects, statuses, responsibilities,
+    escalations and users in commit order. Without `since` only the current
+    cursor is returned (call it before a full load). 410 means the cursor is
+    older than the retained change log and the client must reload.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_LIMIT = 1000
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'cursor': changes.current_cursor(), 'has_more': False, 'changes': []})
+        try:
+            since = int(since)
+            limit = min(int(request.query_params.get('limit', 500)), self.MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(changes.changes_since(since, request, max(limit, 1)))
+        except changes.CursorExpired:
+            return Response({'error': 'cursor expired, reload and start again'}, status=status.HTTP_410_GONE)
+
+
+class BatchView(APIView):
+    """
+    POST /api/batch/ {"requests": ["/api/projects/1/", {"path": "/api/status/", "params": {"project_id": 1}}]}
+    Runs up to 25 GET requests in-process under the caller's credentials and
+    returns {"responses": [{"path", "status", "body"}, ...]} in request order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'requests must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            responses = batch.run(request, items)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'responses': responses})
+
+
+class ImportView(APIView):
+    """
+    POST /api/import/ (multipart): kind=projects|statuses|responsibilities, file=<.csv|.xlsx>
+    Optional: dry_run=true validates without writing, atomic=true rolls back
+    everything when any row fails. Returns counts and per-row errors.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsProjectManager]
+    parser_classes = [MultiPartParser, FormParser]
+    throttle_scope = 'export'
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def flag(name):
+            return request.data.get(name, '').lower() in ('1', 'true', 'yes')
+
+        try:
+            importer = Importer(request.data.get('kind', ''), user=request.user, dry_run=flag('dry_run'))
+            result = importer.run(read_rows(upload.file, upload.name), all_or_nothing=flag('atomic'))
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if result['error_count'] and not result['created']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] and not result['dry_run'] else status.HTTP_200_OK)
+
 
 class PasswordResetRequestView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AuthThrottle]
 
     def post(self, request):
         email = request.data.get('email')
@@ -468,6 +1098,7 @@ class PasswordResetRequestView(APIView):
 
 class PasswordResetConfirmView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AuthThrottle]
 
     def post(self, request):
         token = request.data.get('token')
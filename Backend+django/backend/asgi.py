@@ -2,6 +2,8 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The async report views (api.async_views) only run natively under this entry
+point, e.g. ``uvicorn backend.asgi:application --workers 2``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
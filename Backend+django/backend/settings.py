@@ -5,8 +5,10 @@ Django settings for backend project.
 
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 import os
 import sys
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -66,16 +68,22 @@ INSTALLED_APPS = [
     "django_filters",
     "drf_yasg",
     "api",
-    "django_rest_passwordreset",
 ]
+# Password reset is served by api.views; the third-party app is only kept
+# for deployments that still have its tables and admin
+if os.getenv("ENABLE_DJANGO_REST_PASSWORDRESET", "False") == "True":
+    INSTALLED_APPS.append("django_rest_passwordreset")
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.audit.AuditMiddleware",
+    "api.deferred.DeferredMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -111,6 +119,9 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD", "admin"),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "3306"),
+        # seconds a connection is reused (0: one per request / pooled report query)
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "0")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -169,8 +180,29 @@ REST_FRAMEWORK = {
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
+    # Views opt in with `throttle_scope`; auth and report views set their own classes
+    "DEFAULT_THROTTLE_CLASSES": [
+        "api.throttling.ScopedSlidingWindowThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "auth": os.getenv("THROTTLE_AUTH_RATE", "10/min"),
+        "reports": os.getenv("THROTTLE_REPORTS_RATE", "60/min"),
+        "export": os.getenv("THROTTLE_EXPORT_RATE", "10/min"),
+    },
+    # Reverse proxies in front of the app (e.g. 1 behind nginx). Throttles key
+    # anonymous clients on the address these proxies appended to X-Forwarded-For;
+    # with 0 the header is ignored, so clients cannot pick their own address
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.ORJSONRenderer",
+        "api.renderers.ColumnarJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ] + (["api.renderers.MessagePackRenderer"] if find_spec("msgpack") else []),
 }
 
+# Responses smaller than this (bytes) are sent uncompressed
+API_COMPRESSION_MIN_SIZE = int(os.getenv("API_COMPRESSION_MIN_SIZE", "1024"))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
         minutes=int(os.getenv("JWT_ACCESS_LIFETIME", "60"))
@@ -181,11 +213,83 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Written by the generate_schema command and served by /swagger/ and /redoc/
+OPENAPI_SCHEMA_PATH = os.getenv("OPENAPI_SCHEMA_PATH", str(BASE_DIR / "openapi.json"))
+
+# ------------------------------------------------------------------
+# CACHING
+# ------------------------------------------------------------------
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "DJANGO_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "project-status"),
+    }
+}
+
+# Short TTL (seconds) for aggregated report responses
+REPORTS_CACHE_TIMEOUT = int(os.getenv("REPORTS_CACHE_TIMEOUT", "60"))
+
+# Threads (and database connections) per process running the queries of the
+# async report views (api.async_views) concurrently
+REPORT_QUERY_THREADS = int(os.getenv("REPORT_QUERY_THREADS", "8"))
+
+# Per-object serializer output cache (api.fragments): shared cache alias,
+# shared-tier TTL in seconds and the number of fragments kept per process
+FRAGMENT_CACHE = {
+    "ALIAS": os.getenv("FRAGMENT_CACHE_ALIAS", "default"),
+    "TIMEOUT": int(os.getenv("FRAGMENT_CACHE_TIMEOUT", "3600")),
+    "LOCAL_SIZE": int(os.getenv("FRAGMENT_CACHE_LOCAL_SIZE", "5000")),
+}
+
+# /api/changes/ numbers change-log rows left unnumbered this long (seconds) after their
+# insert, e.g. by a worker that died between commit and ChangeLog.sequence_pending
+CHANGES_SETTLE_SECONDS = int(os.getenv("CHANGES_SETTLE_SECONDS", "5"))
+
+# Idempotency-Key header on POST (api.idempotency): hours a stored response is
+# replayed, seconds a retry waits for the first request still in progress, and
+# seconds after which a request that never answered (worker killed or timed
+# out) is abandoned and a retry takes its key over; keep it above the worker timeout
+IDEMPOTENCY = {
+    "TTL_HOURS": int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")),
+    "WAIT_SECONDS": int(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10")),
+    "LEASE_SECONDS": int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60")),
+}
+
+# ------------------------------------------------------------------
+# ESCALATION SLA
+# ------------------------------------------------------------------
+# Hours a responsibility may stay in a status before run_sla_scanner escalates it
+ESCALATION_SLA_HOURS = {
+    "R": int(os.getenv("SLA_RED_HOURS", "72")),
+    "Y": int(os.getenv("SLA_YELLOW_HOURS", "168")),
+}
+SLA_SCANNER_USERNAME = os.getenv("SLA_SCANNER_USERNAME", "")
+
+# ------------------------------------------------------------------
+# RETENTION
+# ------------------------------------------------------------------
+# Used by the apply_retention command
+RETENTION = {
+    # statuses of completed projects older than this are archived
+    "STATUS_MONTHS": int(os.getenv("RETENTION_STATUS_MONTHS", "12")),
+    # read notifications older than this are deleted
+    "READ_NOTIFICATION_DAYS": int(os.getenv("RETENTION_READ_NOTIFICATION_DAYS", "30")),
+    # /api/changes/ cursors older than this get 410 and must reload
+    "CHANGE_LOG_DAYS": int(os.getenv("RETENTION_CHANGE_LOG_DAYS", "30")),
+    "BATCH_SIZE": int(os.getenv("RETENTION_BATCH_SIZE", "500")),
+}
+
 # ------------------------------------------------------------------
 # CORS
 # ------------------------------------------------------------------
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "if-match")
+# lets the frontend read row versions for If-Match (api.concurrency)
+CORS_EXPOSE_HEADERS = ["etag"]
 
 # ------------------------------------------------------------------
 # EMAIL
@@ -1,11 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework import permissions
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from api.views import PasswordResetRequestView, PasswordResetConfirmView
+from api import async_views
+from api.lazy import lazy_view
+from api.views import PasswordResetRequestView, PasswordResetConfirmView, SearchView, ImportView, BatchView, ChangesView
+from api.throttling import AuthThrottle
 
 from api.views import (
     CreateUserView,
@@ -17,16 +16,6 @@ from api.views import (
     ReportingViewSet,
 )
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Project Status API",
-        default_version='v1',
-        description="API for project status tracking system",
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-)
-
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet)
 router.register(r'status', ProjectStatusViewSet)
@@ -41,10 +30,18 @@ urlpatterns = [
     path('api/password-reset-request/', PasswordResetRequestView.as_view(), name='password-reset-request'),
     path('api/password-reset-confirm/', PasswordResetConfirmView.as_view(), name='password-reset-confirm'),
     path('api/register/', CreateUserView.as_view(), name='user-register'),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/batch/', BatchView.as_view(), name='batch'),
+    path('api/changes/', ChangesView.as_view(), name='changes'),
+    path('api/import/', ImportView.as_view(), name='import'),
+    path('api/search/', SearchView.as_view(), name='search'),
+    path('api/token/', lazy_view('rest_framework_simplejwt.views.TokenObtainPairView', throttle_classes=[AuthThrottle]), name='token_obtain_pair'),
+    path('api/token/refresh/', lazy_view('rest_framework_simplejwt.views.TokenRefreshView'), name='token_refresh'),
     path('api/auth/', include('rest_framework.urls', namespace='rest_framework')),
+    path('api/async/reports/project_summary/', async_views.project_summary, name='async-project-summary'),
+    path('api/async/reports/dashboard/', async_views.dashboard, name='async-dashboard'),
+    path('api/async/reports/workload/', async_views.workload, name='async-workload'),
+    path('api/async/reports/escalation_report/', async_views.escalation_report, name='async-escalation-report'),
     path('api/', include(router.urls)),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger/', lazy_view('api.schema.SchemaView', 'with_ui', 'swagger'), name='schema-swagger-ui'),
+    path('redoc/', lazy_view('api.schema.SchemaView', 'with_ui', 'redoc'), name='schema-redoc'),
 ]
\ No newline at end of file
@@ -0,0 +1,23 @@
+import api from '../utils/api';
+
+/**
+ * Run several GET requests in one round trip.
+ * @param {Array<string|{path: string, params?: Object}>} requests - Paths relative to /api/
+ * @returns {Promise<Array<{path: string, status: number, body: any}>>} One result per request, in order
+ */
+export const batchGet = async (requests) => {
+  const { data } = await api.post('/batch/', { requests });
+  return data.responses;
+};
+
+/** Like batchGet but resolves to the bodies and rejects if any request failed. */
+export const batchGetBodies = async (requests) => {
+  const responses = await batchGet(requests);
+  const failed = responses.find((r) => r.status >= 400);
+  if (failed) {
+    const error = new Error(`Batched request ${failed.path} failed with ${failed.status}`);
+    error.response = { status: failed.status, data: failed.body };
+    throw error;
+  }
+  return responses.map((r) => r.body);
+};
@@ -0,0 +1,14 @@
+import api from '../utils/api';
+
+/**
+ * Fetch changes after `since`; without it only the current cursor is returned
+ * (take it before a full load so nothing committed meanwhile is missed).
+ * A 410 response means the cursor expired and the local cache must be reloaded.
+ * @param {number} [since] - Cursor from the previous call
+ * @returns {Promise<{cursor: number, has_more: boolean, changes: Array}>}
+ */
+export const fetchChanges = async (since, limit = 500) => {
+  const params = since === undefined ? {} : { since, limit };
+  const { data } = await api.get('/changes/', { params });
+  return data;
+};
@@ -1,5 +1,5 @@
 // src/api/escalations.js
-import api from '../utils/api';
+import api, { idempotent } from '../utils/api';
 
 /**
  * Fetch escalations.
@@ -26,7 +26,7 @@ export const fetchEscalations = async (params = {}) => {
  * Create an escalation (POST /escalations/)
  */
 export const triggerEscalation = async (payload) => {
-  const { data } = await api.post('/escalations/', payload);
+  const { data } = await api.post('/escalations/', payload, idempotent());
   return data;
 };
 
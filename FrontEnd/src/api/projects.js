@@ -24,4 +24,58 @@ export const fetchProjectStatuses = async (projectId) => {
 export const fetchLatestStatus = async (projectId) => {
   const response = await api.get(`/projects/${projectId}/status/`);
   return response.data;
-};
\ No newline at end of file
+};
+
+/**
+ * Check many project codes at once.
+ * @param {string[]} codes
+ * @returns {Promise<Object>} {code: {valid, exists}}
+ */
+export const checkProjectCodes = async (codes) => {
+  const response = await api.post('/projects/check-code/', { codes });
+  return response.data.results;
+};
+
+/** Reserve the next free project code (PM/ADMIN only). */
+export const allocateProjectCode = async () => {
+  const response = await api.post('/projects/next-code/');
+  return response.data.code;
+};
+
+const addDays = (origin, days) => {
+  const date = new Date(`${origin}T00:00:00Z`);
+  date.setUTCDate(date.getUTCDate() + days);
+  return date.toISOString().slice(0, 10);
+};
+
+/**
+ * Expand a run-length encoded timeline into phase intervals.
+ * @param {Object} timeline - {origin, runs, baseline, final}
+ * @param {string[]} phases - phase codes the run indexes point into
+ * @returns {Object} {intervals: [{phase, start, end, statuses}], baseline: [date], final: [date]}
+ */
+export const decodeTimeline = (timeline, phases) => ({
+  intervals: timeline.runs.map(([start, end, phase, statuses]) => ({
+    phase: phases[phase],
+    start: addDays(timeline.origin, start),
+    end: addDays(timeline.origin, end),
+    statuses,
+  })),
+  baseline: timeline.baseline.map((day) => addDays(timeline.origin, day)),
+  final: timeline.final.map((day) => addDays(timeline.origin, day)),
+});
+
+/** Phase history of one project, decoded (see decodeTimeline). */
+export const fetchProjectTimeline = async (projectId) => {
+  const { data } = await api.get(`/projects/${projectId}/timeline/`);
+  return data.origin ? decodeTimeline(data, data.phases) : { intervals: [], baseline: [], final: [] };
+};
+
+/**
+ * Phase histories of all visible projects, keyed by project id.
+ * @param {Object} [params] - current_phase, code or ids (comma-separated)
+ */
+export const fetchPortfolioTimeline = async (params = {}) => {
+  const { data } = await api.get('/projects/timeline/', { params });
+  return Object.fromEntries(data.projects.map((timeline) => [timeline.id, decodeTimeline(timeline, data.phases)]));
+};
@@ -5,7 +5,7 @@ import api from '../utils/api';
  * Reports API Service
  * Handles all reporting-related API operations
  */
-export default {
+const reportsApi = {
   /**
    * Fetch project summary statistics
    * @returns {Promise<Object>} Summary data object
@@ -15,6 +15,17 @@ export default {
     return data;
   },
 
+  /**
+   * Fetch dashboard counts: projects per phase, latest RAG counts,
+   * open escalations and the caller's open yellow/red items.
+   * Served by the async (ASGI) report endpoint.
+   * @returns {Promise<Object>} Dashboard counts
+   */
+  getDashboard: async () => {
+    const { data } = await api.get('/async/reports/dashboard/');
+    return data;
+  },
+
   /**
    * Fetch responsibilities for a specific user
    * @param {number} userId - User ID
@@ -27,6 +38,18 @@ export default {
     return data;
   },
 
+  /**
+   * Fetch aggregated workload per user (latest status of each project)
+   * @param {string} [department] - Optional department filter
+   * @returns {Promise<Array>} Per-user RAG counts and open escalations
+   */
+  getUserWorkload: async (department) => {
+    const { data } = await api.get('/reports/workload/', {
+      params: department ? { department } : {},
+    });
+    return data;
+  },
+
   /**
    * Fetch escalation report data
    * @param {boolean} includeResolved - Include resolved escalations
@@ -39,4 +62,34 @@ export default {
     return data;
   },
 
-};
\ No newline at end of file
+  /**
+   * Fetch the portfolio heatmap: active projects x responsibility titles.
+   * cells is a row-major string, one G/Y/R/. character per cell:
+   * the status of rows[i] for columns[j] is cells[i * columns.length + j].
+   * @param {Object} [params] - phase, manager, department, title (array)
+   * @returns {Promise<Object>} {rows: [{id, code}], columns: [title], cells}
+   */
+  getHeatmap: async (params = {}) => {
+    const { data } = await api.get('/reports/heatmap/', { params, paramsSerializer: { indexes: null } });
+    return data;
+  },
+
+  /**
+   * Fetch escalation analytics grouped by project, period, creator and state
+   * @param {Object} [params] - period (week|month) and escalation_report filters
+   * @returns {Promise<Object>} Grouped counts and time-to-resolve statistics
+   */
+  getEscalationAnalytics: async (params = {}) => {
+    const { data } = await api.get('/reports/escalation_analytics/', { params });
+    return data;
+  },
+
+};
+
+export const fetchProjectSummary = reportsApi.getProjectSummary;
+export const fetchDashboard = reportsApi.getDashboard;
+export const fetchUserWorkload = reportsApi.getUserWorkload;
+export const fetchEscalationReport = reportsApi.getEscalationReport;
+export const fetchHeatmap = reportsApi.getHeatmap;
+
+export default reportsApi;
@@ -26,3 +26,10 @@ export const createResponsibility = async (data) => {
   const response = await api.post('/responsibilities/', payload);
   return response.data;
 };
+
+
+// rows: [{ id, version, ...changes }]; returns { updated, conflicts, errors }
+export const bulkUpdateResponsibilities = async (rows) => {
+  const response = await api.patch('/responsibilities/bulk/', rows);
+  return response.data;
+};
@@ -0,0 +1,11 @@
+import api from '../utils/api';
+
+/**
+ * Ranked search across projects, status notes and responsibilities.
+ * @param {string} q - Search text (at least 2 characters)
+ * @param {Object} [params] - Optional `type` (comma separated) and `limit`
+ */
+export const searchAll = async (q, params = {}) => {
+  const { data } = await api.get('/search/', { params: { q, ...params } });
+  return data.results;
+};
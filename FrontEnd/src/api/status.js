@@ -1,5 +1,5 @@
 // src/api/status.js
-import api from '../utils/api';
+import api, { idempotent } from '../utils/api';
 
 /**
  * Fetch all statuses for a project.
@@ -50,7 +50,7 @@ export const saveStatus = async (id, payload) => {
 export const createStatus = async (payload, projectId) => {
   // ensure backend receives project PK in the request body
   const body = { ...payload, project: projectId };
-  const { data } = await api.post('/status/', body);
+  const { data } = await api.post('/status/', body, idempotent());
   return data;
 };
 
@@ -76,7 +76,7 @@ export const saveFinal = (statusId) =>
  * @returns {Promise<Object>} API response.
  */
 export const clonePrevious = (statusId) => 
-  api.post(`/status/${statusId}/clone_previous/`);
+  api.post(`/status/${statusId}/clone_previous/`, undefined, idempotent());
 
 
 /**
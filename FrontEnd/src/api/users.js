@@ -6,6 +6,35 @@ export const fetchUsers = async () => {
   return response.data;
 };
 
+/**
+ * Typeahead search on username, names and email (prefix match).
+ * @param {string} q - Typed prefix
+ * @param {Object} [params] - Optional `role`, `department`, `limit`
+ * @returns {Promise<Array<{id, label, username, role}>>}
+ */
+export const lookupUsers = async (q, params = {}) => {
+  const response = await api.get('/users/lookup/', { params: { q, ...params } });
+  return response.data.results;
+};
+
+// The directory is shared by every selector on a page; the browser revalidates
+// it with its ETag, so after this window a reload usually costs a 304.
+const DIRECTORY_TTL_MS = 60 * 1000;
+let directoryCache = null;
+
+/**
+ * Compact list of all users: {id, username, full_name, role, department, is_active}.
+ * @returns {Promise<Object[]>}
+ */
+export const fetchUserDirectory = () => {
+  if (!directoryCache || Date.now() - directoryCache.at > DIRECTORY_TTL_MS) {
+    const promise = api.get('/users/directory/').then((response) => response.data.users);
+    promise.catch(() => { directoryCache = null; });
+    directoryCache = { promise, at: Date.now() };
+  }
+  return directoryCache.promise;
+};
+
 export const updateUser = async (userId, data) => {
   const response = await axios.patch(`/api/users/${userId}/`, data, {
     headers: {
@@ -2,7 +2,7 @@
 import React, { useState, useEffect } from 'react';
 import { ExclamationCircleIcon, CheckCircleIcon } from '@heroicons/react/24/outline';
 import { triggerEscalation, resolveEscalation, fetchEscalations } from '../../api/escalations';
-import { fetchUsers } from '../../api/users';
+import { fetchUserDirectory } from '../../api/users';
 import UserSelector from '../ui/UserSelector';
 import Alert from '../ui/Alert';
 import Button from '../ui/Button';
@@ -53,7 +53,7 @@ const EscalationPanel = ({
     let mounted = true;
     const loadUsers = async () => {
       try {
-        const u = await fetchUsers();
+        const u = await fetchUserDirectory();
         if (!mounted) return;
         setUsers(Array.isArray(u) ? u : u.results ?? []);
         if (currentUser?.id) {
@@ -27,6 +27,7 @@ const ResponsibilityItem = ({ responsibility, onChange, currentUser }) => {
         progress: 0,
         comments: '',
         needs_escalation: false,
+        version: null,
       };
     }
 
@@ -42,6 +43,7 @@ const ResponsibilityItem = ({ responsibility, onChange, currentUser }) => {
       progress: r.progress ?? 0,
       comments: commentsVal,
       needs_escalation: !!r.needs_escalation,
+      version: r.version ?? null,
     };
   }
 
@@ -74,6 +76,8 @@ const ResponsibilityItem = ({ responsibility, onChange, currentUser }) => {
       // backend expects "comments"
       comments: String(data.comments || '').trim(),
       needs_escalation: !!data.needs_escalation,
+      // the version this edit is based on; the server answers 412 if it changed meanwhile
+      ...(data.version ? { version: data.version } : {}),
     };
   };
 
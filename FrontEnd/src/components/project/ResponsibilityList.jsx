@@ -4,7 +4,7 @@ import { Dialog, Transition } from '@headlessui/react';
 import { PlusIcon, XMarkIcon } from '@heroicons/react/24/outline';
 import ResponsibilityItem from './ResponsibilityItem';
 import { createResponsibility } from '../../api/responsibilities';
-import { fetchUsers } from '../../api/users';
+import { fetchUserDirectory } from '../../api/users';
 import { fetchProjectStatuses } from '../../api/status';
 
 const MAX_STATUSES_IN_PICKER = 10;
@@ -49,7 +49,7 @@ const ResponsibilityList = ({
   useEffect(() => {
     if (!isModalOpen) return;
 
-    fetchUsers().then(setUsers).catch(console.error);
+    fetchUserDirectory().then(setUsers).catch(console.error);
 
     if (!projectId) return;
     fetchProjectStatuses(projectId)
@@ -1,6 +1,6 @@
 /* eslint-disable no-unused-vars */
 import { useState, useEffect } from 'react';
-import { fetchUsers } from '../../api/users';
+import { fetchUserDirectory } from '../../api/users';
 import clsx from 'clsx';
 
 const UserSelector = ({
@@ -18,7 +18,7 @@ const UserSelector = ({
     let mounted = true;
     const loadUsers = async () => {
       try {
-        const data = await fetchUsers();
+        const data = await fetchUserDirectory();
         if (!mounted) return;
         setUsers(Array.isArray(data) ? data : data.results ?? []);
       } catch (error) {
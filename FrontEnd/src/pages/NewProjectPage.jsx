@@ -2,7 +2,7 @@
 /* eslint-disable no-unused-vars */
 import { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../context/AuthContext';
-import api from '../utils/api';
+import api, { idempotent } from '../utils/api';
 import { useNavigate } from 'react-router-dom';
 
 import { useForm, Controller } from 'react-hook-form';
@@ -139,7 +139,7 @@ const NewProjectPage = () => {
         end_date: data.end_date.toISOString().split('T')[0],
       };
 
-      await api.post('/projects/', payload);
+      await api.post('/projects/', payload, idempotent());
       toast.success('Project created successfully!');
       reset(); // reset form after success
       navigate('/dashboard');
@@ -6,10 +6,11 @@ import ResponsibilityList from '../components/project/ResponsibilityList';
 import StatusSavePanel from '../components/project/StatusSavePanel';
 import EscalationPanel from '../components/project/EscalationPanel';
 import StatusTimeline from '../components/project/StatusTimeline';
-import { fetchProjectDetails, fetchProjectStatuses, fetchLatestStatus } from '../api/projects';
+import { fetchProjectStatuses, fetchLatestStatus } from '../api/projects';
+import { batchGetBodies } from '../api/batch';
 import { saveStatus, createStatus } from '../api/status';
 import { createResponsibility } from '../api/responsibilities';
-import { fetchUsers } from '../api/users';
+import { fetchUserDirectory } from '../api/users';
 import { useAuth } from '../context/AuthContext';
 import Loader from '../components/ui/Loader';
 import Alert from '../components/ui/Alert';
@@ -56,10 +57,10 @@ const ProjectStatusPage = () => {
     try {
       setLoading(true);
       setError(null);
-      const [projectData, statusData, statusesData] = await Promise.all([
-        fetchProjectDetails(projectId),
-        fetchLatestStatus(projectId),
-        fetchProjectStatuses(projectId)
+      const [projectData, statusData, statusesData] = await batchGetBodies([
+        `projects/${projectId}/`,
+        `projects/${projectId}/status/`,
+        { path: 'status/', params: { project_id: projectId } },
       ]);
       setProject(projectData);
       setStatus(statusData);
@@ -83,7 +84,7 @@ const ProjectStatusPage = () => {
     let mounted = true;
     const load = async () => {
       try {
-        const u = await fetchUsers();
+        const u = await fetchUserDirectory();
         if (!mounted) return;
         setUsers(u || []);
         usersLoadedRef.current = true;
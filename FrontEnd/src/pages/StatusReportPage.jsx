@@ -2,7 +2,7 @@
 /* eslint-disable no-unused-vars */
 import React, { useEffect, useState, useMemo } from 'react';
 import reportsApi from '../api/reports';
-import { fetchUsers } from '../api/users';
+import { fetchUserDirectory } from '../api/users';
 import api from '../utils/api';
 import Alert from '../components/ui/Alert'; // adjust if your path differs
 import { format } from 'date-fns';
@@ -86,7 +86,7 @@ const StatusReportPage = () => {
       setUsersLoading(true);
       setProjectsLoading(true);
       try {
-        const [s, u] = await Promise.all([reportsApi.getProjectSummary(), fetchUsers()]);
+        const [s, u] = await Promise.all([reportsApi.getProjectSummary(), fetchUserDirectory()]);
         if (!mounted) return;
         setSummary(s);
         setUsers(u || []);
@@ -16,10 +16,29 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Creates that must not run twice pass idempotent() as their request config.
+// The key is made once per logical request: the retries below reuse the
+// config, so the server replays the first response instead of creating twice.
+export const idempotent = (config = {}) => ({
+  ...config,
+  headers: { ...config.headers, 'Idempotency-Key': crypto.randomUUID() },
+});
+
+const MAX_NETWORK_RETRIES = 2;
+
 api.interceptors.response.use(
     (response)=>response,
     async(error)=>{
         const originalRequest=error.config;
+        // no response (dropped connection, timeout): only keyed requests are safe to resend
+        if (!error.response) {
+            const retries = originalRequest?._networkRetries || 0;
+            if (originalRequest?.headers?.['Idempotency-Key'] && retries < MAX_NETWORK_RETRIES) {
+                originalRequest._networkRetries = retries + 1;
+                return api(originalRequest);
+            }
+            return Promise.reject(error);
+        }
         if (error.response.status===401 && !originalRequest._retry){
             originalRequest._retry=true;
             const refresh =localStorage.getItem('refresh_token');